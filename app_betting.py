@@ -13,7 +13,10 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta, timezone
 from api_client import FootballDataClient
-from ensemble import EnsembleModel
+from ensemble import EnsembleModel, POISSON_MODELS
+from data_loader import load_match_data
+from model_store import data_fingerprint, load_metadata
+from training_service import TrainingService
 from betting_tools import (
     analyze_bet, 
     print_bet_analysis,
@@ -25,6 +28,7 @@ from betting_tools import (
 )
 from bingo_analyzer import BingoAnalyzer
 import config
+from logger_config import setup_project_logging
 import numpy as np
 import os
 from glob import glob
@@ -166,25 +170,137 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def configure_logging():
+    """Configura uma vez por processo os handlers de log (logs/app_AAAAMMDD.log e console)"""
+    return setup_project_logging()
+
+
+configure_logging()
+
+
 @st.cache_resource
 def load_ensemble(league_code=None):
     """
     Carrega e treina o ensemble (cache para não retreinar)
     
+    Além do cache em memória, os modelos de Poisson são recarregados de
+    data/models quando os dados não mudaram, então reinícios do processo
+    não refazem a otimização. Só deve ser chamado quando
+    league_models_ready(league_code) for True; senão o fit treinaria aqui,
+    bloqueando a página, o que o serviço em segundo plano já está fazendo.
+    
     Args:
         league_code: Código da liga (ex: 'PL', 'BSA')
     """
     if league_code is None:
         league_code = config.PREMIER_LEAGUE_CODE
     
-    league_display = [name for name, info in config.LEAGUES.items() if info['code'] == league_code][0]
-    
-    with st.spinner(f"Treinando modelos para {league_display}... Aguarde..."):
-        ensemble = EnsembleModel()
-        ensemble.fit(league_code=league_code)
+    ensemble = EnsembleModel()
+    ensemble.fit(league_code=league_code)
     return ensemble
 
 
+@st.cache_resource
+def load_uncertainty_model(league_code):
+    """
+    Dixon-Coles da liga com sorteios de bootstrap para intervalos de confiança
+    
+    Os refits do bootstrap rodam em paralelo (process pool) e o resultado fica
+    em cache por liga, então só o primeiro pedido da liga paga esse custo. O
+    bootstrap roda numa cópia do modelo (o do ensemble compartilhado não é
+    alterado) com as partidas que o ensemble já carregou.
+    
+    Args:
+        league_code: Código da liga
+    """
+    import copy
+    
+    ensemble = load_ensemble(league_code)
+    dc_model = ensemble.models.get('dixon_coles')
+    if dc_model is None or ensemble.training_data is None:
+        return None
+    
+    dc_model = copy.deepcopy(dc_model)
+    dc_model.fit_uncertainty(ensemble.training_data, method='bootstrap', n_draws=100)
+    return dc_model
+
+
+@st.cache_resource
+def load_heuristics_model(league_code):
+    """
+    Modelo de heurísticas da liga com a tabela de features já calculada
+    
+    Reaproveita o modelo do ensemble, que já recebeu os dados carregados.
+    
+    Args:
+        league_code: Código da liga
+    """
+    model = load_ensemble(league_code).models.get('heuristicas')
+    if model is None:
+        return None
+    
+    model.build_feature_table()
+    return model
+
+
+@st.cache_data(ttl=600)  # Cache por 10 minutos
+def league_data_fingerprint(league_code):
+    """
+    Impressão digital dos dados atuais da liga (None se não puderem ser lidos)
+    
+    Args:
+        league_code: Código da liga
+    """
+    try:
+        return data_fingerprint(load_match_data(league_code=league_code))
+    except Exception:
+        return None
+
+
+def league_models_ready(league_code):
+    """
+    Indica se os modelos da liga podem ser servidos sem esperar o treino
+    
+    Prontos quando o treino em segundo plano da liga não está rodando e os
+    artefatos em data/models foram treinados com os dados atuais (mesma
+    impressão digital). Artefatos ausentes ou de dados antigos são retreinados
+    pelo serviço em segundo plano, nunca dentro da requisição (load_ensemble
+    só recarrega). Nunca bloqueia: enquanto for False, a página mostra
+    "treinando..." e o próximo rerun verifica de novo.
+    
+    Args:
+        league_code: Código da liga
+    """
+    service = start_training_service()
+    if not service.is_ready(league_code):
+        return False
+    
+    fingerprint = league_data_fingerprint(league_code)
+    if fingerprint is None:
+        # Sem dados não há o que treinar: load_ensemble mostra o erro
+        return True
+    
+    metadata = [load_metadata(league_code, model_name) for model_name, _ in POISSON_MODELS]
+    if all(meta is not None and meta.get('fingerprint') == fingerprint for meta in metadata):
+        return True
+    
+    # Artefatos velhos: retreina em segundo plano (se o último treino já usou
+    # esses dados e mesmo assim falhou, deixa load_ensemble tentar e mostrar o erro)
+    return not service.retrain(league_code, fingerprint)
+
+
+@st.cache_resource
+def start_training_service():
+    """
+    Inicia (uma vez por processo) o treino paralelo de todas as ligas
+    
+    Os modelos vão para o cache em disco, então trocar de liga no menu
+    lateral só recarrega artefatos prontos.
+    """
+    return TrainingService().start()
+
+
 @st.cache_data(ttl=86400)  # Cache por 24 horas
 def get_upcoming_matches(league_code=None):
     """
@@ -1048,6 +1164,46 @@ def display_team_analysis():
     
     st.markdown("---")
     
+    # Indicadores heurísticos (mesma tabela de features usada nas predições)
+    try:
+        features = load_heuristics_model(league_code).team_features(selected_team_name)
+    except Exception:
+        features = None
+    
+    if features and features['forma']:
+        forma = features['forma']
+        seq = features['sequencias']
+        tend = features['tendencia_gols']
+        
+        st.subheader("🧠 Indicadores Heurísticos")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(f"Forma (últimos {forma['jogos']})", forma['sequencia'],
+                      f"{forma['aproveitamento']:.0f}% aproveitamento")
+        with col2:
+            st.metric("Sequência Atual", seq['sequencia_desc'])
+        with col3:
+            st.metric("Jogos sem Vencer", seq['jogos_sem_vencer'],
+                      f"Máx. {seq['max_vitorias_consecutivas']} vitórias seguidas")
+        with col4:
+            st.metric("Over 2.5 (recente)", f"{tend['over_2.5_freq']:.0f}%",
+                      f"BTTS {tend['btts_freq']:.0f}%")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if features['casa']:
+                st.metric("Aproveitamento em Casa", f"{features['casa']['aproveitamento']:.0f}%",
+                          f"{features['casa']['jogos']} jogos")
+        with col2:
+            if features['fora']:
+                st.metric("Aproveitamento Fora", f"{features['fora']['aproveitamento']:.0f}%",
+                          f"{features['fora']['jogos']} jogos")
+        
+        st.markdown("---")
+    
     # Gráficos
     st.subheader("📊 Análise Visual")
     
@@ -1290,6 +1446,23 @@ def display_match_selector(matches):
     return matches[selected_idx]
 
 
+# Mercados extras: (chave em odds, rótulo, chave em derive_markets)
+EXTRA_MARKETS = [
+    ('over_1_5', '📈 Over 1.5', 'prob_over_1_5'),
+    ('under_1_5', '📉 Under 1.5', 'prob_under_1_5'),
+    ('over_3_5', '📈 Over 3.5', 'prob_over_3_5'),
+    ('under_3_5', '📉 Under 3.5', 'prob_under_3_5'),
+    ('dc_1x', '🛡️ Dupla Chance 1X', 'prob_dc_1x'),
+    ('dc_x2', '🛡️ Dupla Chance X2', 'prob_dc_x2'),
+    ('dc_12', '🛡️ Dupla Chance 12', 'prob_dc_12'),
+    ('dnb_casa', '↩️ Empate Anula - Casa', 'prob_dnb_home'),
+    ('dnb_fora', '↩️ Empate Anula - Fora', 'prob_dnb_away'),
+    ('casa_over_1_5', '🏠 Casa Over 1.5 Gols', 'prob_home_over_1_5'),
+    ('fora_over_1_5', '✈️ Fora Over 1.5 Gols', 'prob_away_over_1_5'),
+    ('casa_win_to_nil', '🧱 Casa Vence sem Sofrer Gols', 'prob_home_win_to_nil'),
+]
+
+
 def display_odds_input():
     """Exibe campos para entrada de odds"""
     st.subheader("📊 Insira as Odds da Casa de Apostas")
@@ -1312,7 +1485,7 @@ def display_odds_input():
         odds_btts_yes = st.number_input("✅ BTTS Sim", min_value=1.01, max_value=50.0, value=1.70, step=0.05)
         odds_btts_no = st.number_input("❌ BTTS Não", min_value=1.01, max_value=50.0, value=2.10, step=0.05)
     
-    return {
+    odds = {
         'casa': odds_casa,
         'empate': odds_empate,
         'fora': odds_fora,
@@ -1321,6 +1494,18 @@ def display_odds_input():
         'btts_yes': odds_btts_yes,
         'btts_no': odds_btts_no
     }
+    
+    # Mercados extras (derivados da matriz de placares do ensemble)
+    with st.expander("➕ Mais Mercados (opcional - deixe 0 para ignorar)", expanded=False):
+        cols = st.columns(3)
+        for idx, (odds_key, label, _) in enumerate(EXTRA_MARKETS):
+            with cols[idx % 3]:
+                odd = st.number_input(label, min_value=0.0, max_value=50.0, value=0.0, step=0.05,
+                                      key=f"odds_extra_{odds_key}")
+                if odd > 1.0:
+                    odds[odds_key] = odd
+    
+    return odds
 
 
 def display_bankroll_input():
@@ -1351,8 +1536,13 @@ def display_bankroll_input():
     return bankroll, kelly_fraction
 
 
-def get_data_info(home_team, away_team, league_code):
-    """Obtém informações sobre os dados utilizados na análise"""
+def get_data_info(home_team, away_team, league_code, heuristics_model=None):
+    """
+    Obtém informações sobre os dados utilizados na análise
+    
+    Os confrontos diretos vêm do índice de pares já montado pelo modelo de
+    heurísticas do ensemble (sem varrer as partidas a cada exibição).
+    """
     from data_loader import load_match_data
     from config import LEAGUES
     
@@ -1442,31 +1632,35 @@ def get_data_info(home_team, away_team, league_code):
                 'is_home': is_home
             })
         
-        # Confrontos diretos
-        direct_matches = df[
-            ((df['time_casa'] == home_team) & (df['time_visitante'] == away_team)) |
-            ((df['time_casa'] == away_team) & (df['time_visitante'] == home_team))
-        ].sort_values('data', ascending=False)
+        # Confrontos diretos (índice de pares do HeuristicasModel, montado uma vez)
+        from heuristicas import head_to_head
+        
+        confronto = None
+        if heuristics_model is not None:
+            confronto = head_to_head(heuristics_model.pair_index(), home_team, away_team)
         
-        direct_count = len(direct_matches)
+        direct_count = confronto['confrontos'] if confronto else 0
         direct_list = []
         
-        for _, match in direct_matches.head(5).iterrows():
-            date_str = match['data'].strftime('%d/%m/%Y')
-            if match['time_casa'] == home_team:
-                score = f"{match['gols_casa']}-{match['gols_visitante']}"
-                result = "V" if match['gols_casa'] > match['gols_visitante'] else ("E" if match['gols_casa'] == match['gols_visitante'] else "D")
-            else:
-                score = f"{match['gols_visitante']}-{match['gols_casa']}"
-                result = "V" if match['gols_visitante'] > match['gols_casa'] else ("E" if match['gols_visitante'] == match['gols_casa'] else "D")
-            
-            direct_list.append({
-                'date': date_str,
-                'score': score,
-                'result': result,
-                'home_was': match['time_casa'],
-                'away_was': match['time_visitante']
-            })
+        if confronto:
+            # rows são as linhas do mandante em heuristics_model.df
+            recentes = heuristics_model.df.iloc[confronto['rows'][:5]]
+            for date, home_was, away_was, gols_casa, gols_visitante in zip(
+                    pd.to_datetime(recentes['data']), recentes['time'].astype(str),
+                    recentes['adversario'].astype(str), recentes['gols_marcados'],
+                    recentes['gols_sofridos']):
+                if home_was == home_team:
+                    gols_pro, gols_contra = gols_casa, gols_visitante
+                else:
+                    gols_pro, gols_contra = gols_visitante, gols_casa
+                
+                direct_list.append({
+                    'date': date.strftime('%d/%m/%Y'),
+                    'score': f"{gols_pro}-{gols_contra}",
+                    'result': "V" if gols_pro > gols_contra else ("E" if gols_pro == gols_contra else "D"),
+                    'home_was': home_was,
+                    'away_was': away_was
+                })
         
         return {
             'league': league_name,
@@ -1524,7 +1718,7 @@ def analyze_and_display(ensemble, match, odds, bankroll, kelly_fraction):
     
     # Mostra informações sobre os dados utilizados
     league_code = st.session_state.get('selected_league_code', config.PREMIER_LEAGUE_CODE)
-    data_info = get_data_info(home_team, away_team, league_code)
+    data_info = get_data_info(home_team, away_team, league_code, ensemble.models.get('heuristicas'))
     
     if data_info:
         with st.expander("📊 Dados Utilizados na Análise", expanded=False):
@@ -1637,6 +1831,50 @@ def analyze_and_display(ensemble, match, odds, bankroll, kelly_fraction):
         st.metric("✅ BTTS Sim", f"{ens['prob_btts']*100:.1f}%")
         st.metric("❌ BTTS Não", f"{(1-ens['prob_btts'])*100:.1f}%")
     
+    derived = ens.get('markets')
+    if derived:
+        with st.expander("📚 Todos os Mercados (Odds Justas)", expanded=False):
+            rows = [(label, derived[market_key]) for _, label, market_key in EXTRA_MARKETS]
+            rows += [(f"📈 Over {line}", derived[f"prob_over_{line.replace('.', '_')}"])
+                     for line in ('0.5', '4.5', '5.5')]
+            for line, outcome in derived['asian_handicap'].items():
+                if line in (-1.5, -0.5, 0.5, 1.5):
+                    rows.append((f"⚖️ Handicap Asiático Casa {line:+g}", outcome['win']))
+            
+            st.dataframe(pd.DataFrame({
+                'Mercado': [label for label, _ in rows],
+                'Probabilidade': [f"{prob*100:.1f}%" for _, prob in rows],
+                'Odd Justa': [f"{1/prob:.2f}" if prob > 0 else "-" for _, prob in rows]
+            }), hide_index=True, use_container_width=True)
+    
+    # Incerteza das probabilidades (bootstrap do Dixon-Coles)
+    with st.expander("📏 Incerteza das Probabilidades (Dixon-Coles, intervalo de 90%)", expanded=False):
+        # O corpo do expander roda mesmo fechado: o bootstrap só começa a pedido
+        show_intervals = st.checkbox("Calcular intervalos (100 reajustes em paralelo, pode levar alguns segundos)",
+                                     key=f"uncertainty_{league_code}")
+        try:
+            dc_model = None
+            if show_intervals:
+                with st.spinner("Calculando intervalos (bootstrap em paralelo)..."):
+                    dc_model = load_uncertainty_model(league_code)
+            if dc_model is not None:
+                intervals = dc_model.predict_intervals(home_team, away_team, percentiles=(5, 95))
+                interval_markets = [
+                    ('🏠 Vitória Casa', 'prob_home_win'), ('🤝 Empate', 'prob_draw'),
+                    ('✈️ Vitória Fora', 'prob_away_win'), ('📈 Over 2.5', 'prob_over_2_5'),
+                    ('📉 Under 2.5', 'prob_under_2_5'), ('✅ BTTS Sim', 'prob_btts_yes')
+                ]
+                st.dataframe(pd.DataFrame({
+                    'Mercado': [label for label, _ in interval_markets],
+                    'Média': [f"{intervals[key]['mean']*100:.1f}%" for _, key in interval_markets],
+                    'Intervalo 90%': [f"{intervals[key]['low']*100:.1f}% - {intervals[key]['high']*100:.1f}%"
+                                      for _, key in interval_markets]
+                }), hide_index=True, use_container_width=True)
+                st.caption(f"Baseado em {len(dc_model.param_draws)} reajustes do modelo em reamostragens das partidas. "
+                           "Intervalos largos indicam que a probabilidade é pouco confiável para dimensionar o stake.")
+        except Exception as e:
+            st.info(f"Intervalos indisponíveis: {e}")
+    
     # Análise de cada mercado
     st.subheader("💡 Análise de Value Bets com Filtros de Qualidade")
     
@@ -1650,6 +1888,12 @@ def analyze_and_display(ensemble, match, odds, bankroll, kelly_fraction):
         ('❌ BTTS Não', 1 - ens['prob_btts'], odds['btts_no'])
     ]
     
+    # Mercados extras com odds informadas (probabilidades da matriz do ensemble)
+    derived_markets = ens.get('markets') or {}
+    for odds_key, label, market_key in EXTRA_MARKETS:
+        if odds_key in odds and market_key in derived_markets:
+            markets.append((label, derived_markets[market_key], odds[odds_key]))
+    
     # NOVO: Calcula consenso dos modelos
     consensus_metrics = calculate_consensus(prediction)
     consensus_level = consensus_metrics['consensus_level']
@@ -2191,6 +2435,104 @@ def analyze_and_display(ensemble, match, odds, bankroll, kelly_fraction):
             """)
 
 
+def display_betting_analysis(selected_league_code, selected_league_name, selected_league_flag):
+    """
+    Exibe a aba de análise de apostas da liga selecionada
+    
+    Retorna cedo (sem st.stop, que pararia o script inteiro e deixaria as
+    outras abas em branco) enquanto a liga treina ou se algo falhar.
+    
+    Args:
+        selected_league_code: Código da liga
+        selected_league_name: Nome da liga
+        selected_league_flag: Bandeira da liga
+    """
+    # Treino da liga ainda em andamento: avisa e encerra só esta aba, sem esperar
+    if not league_models_ready(selected_league_code):
+        st.info(f"⏳ Treinando modelos para {selected_league_flag} {selected_league_name}... "
+                f"A análise fica disponível assim que o treino terminar.")
+        st.button("🔄 Verificar novamente")
+        return
+    
+    # Carrega ensemble
+    try:
+        ensemble = load_ensemble(selected_league_code)
+        
+        # Verifica status dos modelos
+        models_status = []
+        if ensemble.models.get('dixon_coles'):
+            models_status.append("✅ Dixon-Coles")
+        else:
+            models_status.append("❌ Dixon-Coles")
+        
+        if ensemble.models.get('offensive_defensive'):
+            models_status.append("✅ Offensive-Defensive")
+        else:
+            models_status.append("❌ Offensive-Defensive")
+        
+        if ensemble.models.get('heuristicas'):
+            models_status.append("✅ Heurísticas")
+        else:
+            models_status.append("❌ Heurísticas")
+        
+        # Exibe status
+        st.success(f"✅ Sistema carregado para {selected_league_flag} {selected_league_name}!")
+        with st.expander("📊 Status dos Modelos", expanded=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if ensemble.models.get('dixon_coles'):
+                    st.success("**Dixon-Coles**\n✅ Ativo (55%)")
+                else:
+                    st.error("**Dixon-Coles**\n❌ Falhou")
+            with col2:
+                if ensemble.models.get('offensive_defensive'):
+                    st.success("**Offensive-Defensive**\n✅ Ativo (30%)")
+                else:
+                    st.error("**Offensive-Defensive**\n❌ Falhou")
+            with col3:
+                if ensemble.models.get('heuristicas'):
+                    st.success("**Heurísticas**\n✅ Ativo (15%)")
+                else:
+                    st.error("**Heurísticas**\n❌ Falhou")
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar modelos: {e}")
+        return
+    
+    # Busca partidas
+    st.subheader(f"📅 Próximas Partidas - {selected_league_flag} {selected_league_name}")
+    st.caption("🕐 Horários em UTC-3 (Brasília)")
+    
+    with st.spinner("Buscando próximas partidas..."):
+        matches = get_upcoming_matches(selected_league_code)
+    
+    if not matches:
+        st.warning("Nenhuma partida futura encontrada. Verifique a API.")
+        return
+    
+    # Seleção da partida
+    selected_match = display_match_selector(matches)
+    
+    if selected_match:
+        st.info(f"**Partida selecionada:** {selected_match['home_team']} vs {selected_match['away_team']}")
+    
+    st.markdown("---")
+    
+    # Entrada de odds
+    odds = display_odds_input()
+    
+    st.markdown("---")
+    
+    # Configuração de banca
+    bankroll, kelly_fraction = display_bankroll_input()
+    
+    st.markdown("---")
+    
+    # Botão de análise
+    if st.button("🔍 ANALISAR APOSTAS", type="primary", use_container_width=True):
+        with st.container():
+            analyze_and_display(ensemble, selected_match, odds, bankroll, kelly_fraction)
+
+
 def main():
     """Função principal da aplicação"""
     
@@ -2277,6 +2619,14 @@ def main():
                 else:
                     st.error(message)
         
+        # Situação do treino em segundo plano das ligas
+        training_status = start_training_service().status()
+        ready = sum(1 for status in training_status.values() if status != 'pendente')
+        if ready < len(training_status):
+            st.caption(f"🧠 Modelos prontos: {ready}/{len(training_status)} ligas (treinando em segundo plano)")
+        else:
+            st.caption(f"🧠 Modelos prontos para todas as {len(training_status)} ligas")
+        
         st.markdown("---")
     
     # Título com liga selecionada
@@ -2334,83 +2684,7 @@ def main():
     ])
     
     with tab1:
-        # Carrega ensemble
-        try:
-            ensemble = load_ensemble(selected_league_code)
-            
-            # Verifica status dos modelos
-            models_status = []
-            if ensemble.models.get('dixon_coles'):
-                models_status.append("✅ Dixon-Coles")
-            else:
-                models_status.append("❌ Dixon-Coles")
-            
-            if ensemble.models.get('offensive_defensive'):
-                models_status.append("✅ Offensive-Defensive")
-            else:
-                models_status.append("❌ Offensive-Defensive")
-            
-            if ensemble.models.get('heuristicas'):
-                models_status.append("✅ Heurísticas")
-            else:
-                models_status.append("❌ Heurísticas")
-            
-            # Exibe status
-            st.success(f"✅ Sistema carregado para {selected_league_flag} {selected_league_name}!")
-            with st.expander("📊 Status dos Modelos", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    if ensemble.models.get('dixon_coles'):
-                        st.success("**Dixon-Coles**\n✅ Ativo (55%)")
-                    else:
-                        st.error("**Dixon-Coles**\n❌ Falhou")
-                with col2:
-                    if ensemble.models.get('offensive_defensive'):
-                        st.success("**Offensive-Defensive**\n✅ Ativo (30%)")
-                    else:
-                        st.error("**Offensive-Defensive**\n❌ Falhou")
-                with col3:
-                    if ensemble.models.get('heuristicas'):
-                        st.success("**Heurísticas**\n✅ Ativo (15%)")
-                    else:
-                        st.error("**Heurísticas**\n❌ Falhou")
-        except Exception as e:
-            st.error(f"❌ Erro ao carregar modelos: {e}")
-            st.stop()
-        
-        # Busca partidas
-        st.subheader(f"📅 Próximas Partidas - {selected_league_flag} {selected_league_name}")
-        st.caption("🕐 Horários em UTC-3 (Brasília)")
-        
-        with st.spinner("Buscando próximas partidas..."):
-            matches = get_upcoming_matches(selected_league_code)
-        
-        if not matches:
-            st.warning("Nenhuma partida futura encontrada. Verifique a API.")
-            st.stop()
-        
-        # Seleção da partida
-        selected_match = display_match_selector(matches)
-        
-        if selected_match:
-            st.info(f"**Partida selecionada:** {selected_match['home_team']} vs {selected_match['away_team']}")
-        
-        st.markdown("---")
-        
-        # Entrada de odds
-        odds = display_odds_input()
-        
-        st.markdown("---")
-        
-        # Configuração de banca
-        bankroll, kelly_fraction = display_bankroll_input()
-        
-        st.markdown("---")
-        
-        # Botão de análise
-        if st.button("🔍 ANALISAR APOSTAS", type="primary", use_container_width=True):
-            with st.container():
-                analyze_and_display(ensemble, selected_match, odds, bankroll, kelly_fraction)
+        display_betting_analysis(selected_league_code, selected_league_name, selected_league_flag)
     
     with tab2:
         display_team_analysis()
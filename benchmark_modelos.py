@@ -0,0 +1,575 @@
+"""
+Benchmarks de desempenho dos modelos
+
+Usa um histórico sintético de várias ligas/temporadas (mesmo formato de
+data_loader.load_match_data) para medir o custo de treino e predição.
+
+Uso:
+    python benchmark_modelos.py likelihood   # Dixon-Coles: loop Python vs vetorizado
+    python benchmark_modelos.py gradiente    # Gradiente analítico vs diferenças finitas
+    python benchmark_modelos.py solver       # Offensive-Defensive: BFGS vs Newton/IRLS
+    python benchmark_modelos.py conjunto     # Dixon-Coles conjunto de várias ligas (160 times)
+    python benchmark_modelos.py eventos      # Ensemble: custo de I/O do log no caminho de predição
+    python benchmark_modelos.py sequencias   # Heurísticas: kernels de sequências (20 temporadas)
+    python benchmark_modelos.py lote         # Ensemble: predict_match em loop vs predict_batch
+    python benchmark_modelos.py pesos        # Ensemble: pesos aprendidos (stacking) por mercado e liga
+    python benchmark_modelos.py paralelo     # Ensemble: fit sequencial vs modelos em processos paralelos
+"""
+
+import io
+import os
+import time
+import logging
+import contextlib
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from dixon_coles import DixonColesModel
+from offensive_defensive import OffensiveDefensiveModel
+from joint_dixon_coles import JointDixonColesModel
+from heuristicas import HeuristicasModel
+from ensemble import PREDICTION_CACHE_SIZE, EnsembleModel
+from logger_config import set_event_logging
+from stacking import MARKET_KEYS, learn_ensemble_weights
+from streak_kernels import NUMBA_AVAILABLE, _streak_scan, streak_stats
+
+
+def gerar_dados_sinteticos(n_ligas=4, n_temporadas=5, n_times=20, seed=42):
+    """
+    Gera um histórico sintético de partidas (turno e returno por temporada)
+
+    Args:
+        n_ligas: Número de ligas independentes
+        n_temporadas: Número de temporadas por liga
+        n_times: Número de times por liga
+        seed: Semente do gerador aleatório
+
+    Returns:
+        DataFrame com colunas: time_casa, time_visitante, gols_casa, gols_visitante, data
+    """
+    rng = np.random.default_rng(seed)
+    partidas = []
+
+    for liga in range(n_ligas):
+        times = [f"Liga{liga + 1} Time {i + 1:02d}" for i in range(n_times)]
+        ataque = rng.normal(0, 0.3, n_times)
+        defesa = rng.normal(0, 0.3, n_times)
+
+        inicio = pd.Timestamp('2020-08-01')
+        for temporada in range(n_temporadas):
+            data = inicio + pd.DateOffset(years=temporada)
+            for i in range(n_times):
+                for j in range(n_times):
+                    if i == j:
+                        continue
+                    lambda_casa = np.exp(0.25 + ataque[i] - defesa[j])
+                    lambda_fora = np.exp(ataque[j] - defesa[i])
+                    partidas.append({
+                        'time_casa': times[i],
+                        'time_visitante': times[j],
+                        'gols_casa': rng.poisson(lambda_casa),
+                        'gols_visitante': rng.poisson(lambda_fora),
+                        'data': data + pd.Timedelta(days=int(rng.integers(0, 280)))
+                    })
+
+    df = pd.DataFrame(partidas)
+    return df.sort_values('data', ascending=False).reset_index(drop=True)
+
+
+def _cronometrar(func, repeticoes=1):
+    """Executa func repetidas vezes e retorna (melhor tempo em segundos, último resultado)"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def benchmark_likelihood(n_ligas=4, n_temporadas=5, seed=42):
+    """
+    Compara a verossimilhança do Dixon-Coles com loop Python e vetorizada
+
+    Mede o tempo de uma avaliação da função objetivo e de um fit completo
+    com a mesma inicialização, e confere que os parâmetros ajustados coincidem.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    n_times = len(set(df['time_casa']) | set(df['time_visitante']))
+
+    print("=" * 80)
+    print("BENCHMARK: VEROSSIMILHANCA DIXON-COLES (LOOP vs VETORIZADA)")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | Times: {n_times} | Ligas: {n_ligas} | Temporadas: {n_temporadas}")
+
+    # Custo de uma avaliação da função objetivo
+    modelo = DixonColesModel(xi=0.003)
+    modelo.teams = sorted(set(df['time_casa']) | set(df['time_visitante']))
+    team_to_idx = {team: idx for idx, team in enumerate(modelo.teams)}
+    home_teams = df['time_casa'].map(team_to_idx).values
+    away_teams = df['time_visitante'].map(team_to_idx).values
+    home_goals = df['gols_casa'].values.astype(float)
+    away_goals = df['gols_visitante'].values.astype(float)
+    terms = modelo._precompute_terms(home_goals, away_goals)
+    params = np.concatenate([[0.3, -0.05], np.random.default_rng(seed).normal(0, 0.1, 2 * n_times)])
+
+    t_loop, nll_loop = _cronometrar(
+        lambda: modelo.dc_log_likelihood(params, home_teams, away_teams, home_goals, away_goals), 3)
+    t_vec, nll_vec = _cronometrar(
+        lambda: modelo.dc_log_likelihood_vectorized(params, home_teams, away_teams,
+                                                    home_goals, away_goals, None, terms), 20)
+
+    print(f"\nAvaliacao da funcao objetivo:")
+    print(f"  Loop Python:  {t_loop * 1000:>9.2f} ms  (NLL={nll_loop:.6f})")
+    print(f"  Vetorizada:   {t_vec * 1000:>9.2f} ms  (NLL={nll_vec:.6f})")
+    print(f"  Speedup:      {t_loop / t_vec:>9.1f}x")
+
+    # Fit completo com a mesma semente para os dois caminhos
+    resultados = {}
+    for vectorized in (False, True):
+        np.random.seed(seed)
+        modelo = DixonColesModel(xi=0.003, vectorized=vectorized)
+        tempo, _ = _cronometrar(lambda: modelo.fit(df, time_decay=True))
+        resultados[vectorized] = (tempo, modelo.params)
+
+    diferenca = np.max(np.abs(resultados[True][1] - resultados[False][1]))
+    print(f"\nFit completo (L-BFGS-B):")
+    print(f"  Loop Python:  {resultados[False][0]:>9.2f} s")
+    print(f"  Vetorizada:   {resultados[True][0]:>9.2f} s")
+    print(f"  Speedup:      {resultados[False][0] / resultados[True][0]:>9.1f}x")
+    print(f"  Maior diferenca entre parametros ajustados: {diferenca:.2e}")
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_gradiente(n_ligas=4, n_temporadas=2, seed=42):
+    """
+    Compara a otimização com gradiente analítico e com diferenças finitas
+
+    Usa os mesmos argumentos e chute inicial de fit() (80 times por padrão,
+    tamanho de uma tabela de Champions League) e reporta tempo, avaliações
+    da função objetivo e valor final da log-verossimilhança negativa.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    teams = sorted(set(df['time_casa']) | set(df['time_visitante']))
+    team_to_idx = {team: idx for idx, team in enumerate(teams)}
+    home_teams = df['time_casa'].map(team_to_idx).values
+    away_teams = df['time_visitante'].map(team_to_idx).values
+    home_goals = df['gols_casa'].values.astype(float)
+    away_goals = df['gols_visitante'].values.astype(float)
+    n_times = len(teams)
+    rng = np.random.default_rng(seed)
+
+    print("=" * 80)
+    print("BENCHMARK: GRADIENTE ANALITICO vs DIFERENCAS FINITAS")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | Times: {n_times}")
+
+    dc = DixonColesModel()
+    dc.teams = teams
+    terms = dc._precompute_terms(home_goals, away_goals)
+    dc_init = np.concatenate([[0.3, 0.0], rng.normal(0, 0.1, 2 * n_times)])
+    dc_args = (home_teams, away_teams, home_goals, away_goals, None, terms)
+    dc_bounds = [(0, 1), (-0.2, 0.2)] + [(None, None)] * (2 * n_times)
+
+    od = OffensiveDefensiveModel()
+    od.teams = teams
+    od_init = np.concatenate([[0.3], rng.normal(0, 0.1, 2 * n_times)])
+    od_args = (home_teams, away_teams, home_goals, away_goals, None)
+
+    casos = [
+        ('Dixon-Coles (L-BFGS-B)', dc.dc_log_likelihood_vectorized, dc_init, dc_args,
+         {'method': 'L-BFGS-B', 'bounds': dc_bounds}),
+        ('Offensive-Defensive (BFGS)', od.negative_log_likelihood, od_init, od_args,
+         {'method': 'BFGS'}),
+    ]
+
+    resultados = {}
+    for nome, objetivo, init, args, kwargs in casos:
+        print(f"\n{nome}:")
+        for rotulo, jac, args_objetivo in (('Diferencas finitas', None, args),
+                                            ('Gradiente analitico', True, args + (True,))):
+            tempo, result = _cronometrar(lambda: minimize(
+                objetivo, init, args=args_objetivo, jac=jac,
+                options={'maxiter': 100, 'disp': False}, **kwargs))
+            resultados[(nome, rotulo)] = tempo
+            print(f"  {rotulo:<20} {tempo:>8.2f} s | avaliacoes: {result.nfev:>6} | "
+                  f"iteracoes: {result.nit:>4} | NLL: {result.fun:.4f}")
+        print(f"  Speedup: {resultados[(nome, 'Diferencas finitas')] / resultados[(nome, 'Gradiente analitico')]:.1f}x")
+
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_solver(n_ligas=4, n_temporadas=5, seed=42):
+    """
+    Compara os solvers do Offensive-Defensive (BFGS e Newton/IRLS esparso)
+
+    Reporta tempo, iterações, log-verossimilhança final e a maior diferença
+    entre as forças ajustadas pelos dois solvers.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    n_times = len(set(df['time_casa']) | set(df['time_visitante']))
+
+    print("=" * 80)
+    print("BENCHMARK: OFFENSIVE-DEFENSIVE - BFGS vs NEWTON/IRLS")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | Times: {n_times}")
+
+    team_to_idx = {team: idx for idx, team in enumerate(sorted(set(df['time_casa']) | set(df['time_visitante'])))}
+    args = (df['time_casa'].map(team_to_idx).values, df['time_visitante'].map(team_to_idx).values,
+            df['gols_casa'].values, df['gols_visitante'].values)
+
+    resultados = {}
+    for solver in ('bfgs', 'newton'):
+        np.random.seed(seed)
+        modelo = OffensiveDefensiveModel(xi=0.003)
+        tempo, _ = _cronometrar(lambda: modelo.fit(df, time_decay=False, solver=solver))
+        nll = modelo.negative_log_likelihood(modelo.params, *args)
+        resultados[solver] = (tempo, modelo)
+        print(f"\n  {solver.upper():<8} {tempo:>8.3f} s | iteracoes: {modelo.n_iter:>4} | "
+              f"log-verossimilhanca: {-nll:.8f}")
+
+    # Compara gols esperados (ligas sem confrontos entre si deixam as forças
+    # definidas só a menos de um deslocamento por liga)
+    fixtures = list(zip(df['time_casa'], df['time_visitante']))
+    lambdas_bfgs = np.concatenate(resultados['bfgs'][1].predict_goals_many(*zip(*fixtures)))
+    lambdas_newton = np.concatenate(resultados['newton'][1].predict_goals_many(*zip(*fixtures)))
+    diferenca = np.max(np.abs(lambdas_bfgs - lambdas_newton))
+    print(f"\n  Speedup: {resultados['bfgs'][0] / resultados['newton'][0]:.1f}x")
+    print(f"  Maior diferenca entre gols esperados: {diferenca:.2e}")
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_conjunto(n_ligas=8, n_temporadas=2, seed=42):
+    """
+    Mede o ajuste conjunto do Dixon-Coles com todas as ligas num só problema
+
+    Usa 8 ligas de 20 times (160 times) e acrescenta partidas "europeias"
+    entre ligas para que as forças fiquem comparáveis entre elas.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    df['liga'] = df['time_casa'].str.split(' ').str[0]
+
+    # Partidas entre ligas (competição continental)
+    rng = np.random.default_rng(seed)
+    times = sorted(set(df['time_casa']))
+    europeus = pd.DataFrame({
+        'time_casa': rng.choice(times, 300),
+        'time_visitante': rng.choice(times, 300),
+        'gols_casa': rng.poisson(1.4, 300),
+        'gols_visitante': rng.poisson(1.1, 300),
+        'data': pd.Timestamp('2021-03-01'),
+        'liga': 'CL'
+    })
+    europeus = europeus[europeus['time_casa'] != europeus['time_visitante']]
+    df = pd.concat([df, europeus], ignore_index=True)
+
+    print("=" * 80)
+    print("BENCHMARK: DIXON-COLES CONJUNTO (VARIAS LIGAS)")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | Times: {len(times)} | Ligas: {df['liga'].nunique()}")
+
+    modelo = JointDixonColesModel(xi=0.003)
+    tempo, _ = _cronometrar(lambda: modelo.fit(df, time_decay=True))
+
+    n_ligas_total = len(modelo.leagues)
+    team_to_idx = {team: idx for idx, team in enumerate(modelo.teams)}
+    league_to_idx = {league: idx for idx, league in enumerate(modelo.leagues)}
+    args = (df['time_casa'].map(team_to_idx).values, df['time_visitante'].map(team_to_idx).values,
+            df['liga'].map(league_to_idx).values, df['gols_casa'].values.astype(float),
+            df['gols_visitante'].values.astype(float))
+    tempo_avaliacao, _ = _cronometrar(lambda: modelo.joint_log_likelihood(modelo.params, *args, None, None, True), 20)
+
+    print(f"\n  Fit completo (L-BFGS-B):   {tempo:>8.2f} s | iteracoes: {modelo.n_iter}")
+    print(f"  Avaliacao com gradiente:   {tempo_avaliacao * 1000:>8.2f} ms | parametros: {len(modelo.params)}")
+    print(f"  Home advantage por liga (valor simulado: 0.25):")
+    for league in modelo.leagues:
+        print(f"    {league:<6} {modelo.home_advantages[league]:.3f}")
+    print("=" * 80)
+
+    return tempo, modelo
+
+class _ContadorEscrita(io.TextIOBase):
+    """Stream que só conta os caracteres escritos"""
+
+    def __init__(self):
+        self.caracteres = 0
+
+    def write(self, texto):
+        self.caracteres += len(texto)
+        return len(texto)
+
+
+class _ContadorRegistros(logging.Handler):
+    """Handler que conta os registros que chegaram aos handlers do logger"""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.registros = 0
+
+    def emit(self, record):
+        self.registros += 1
+
+
+def _montar_ensemble(df, cache_size=PREDICTION_CACHE_SIZE):
+    """Ensemble com os três modelos ajustados em df (saída dos fits descartada)"""
+    with contextlib.redirect_stdout(_ContadorEscrita()):
+        dixon_coles = DixonColesModel(xi=0.003).fit(df, time_decay=True)
+        offensive_defensive = OffensiveDefensiveModel(xi=0.003).fit(df, time_decay=True)
+
+    ensemble = EnsembleModel(cache_size=cache_size)
+    ensemble.models = {
+        'dixon_coles': dixon_coles,
+        'offensive_defensive': offensive_defensive,
+        'heuristicas': HeuristicasModel().load_data(df=df)
+    }
+    ensemble._fitted = True
+    return ensemble
+
+
+def benchmark_eventos(n_partidas=500, n_temporadas=3, seed=42):
+    """
+    Mede o custo de I/O do log no caminho de predição do ensemble
+
+    Roda n_partidas predições com stdout/stderr redirecionados para um contador
+    e um handler contador nos loggers 'ensemble' e 'heuristicas', em três modos:
+    nível padrão (INFO), DEBUG ligado (handlers em memória) e loggers desligados.
+    O cache de predições fica desligado para que os três modos façam o mesmo
+    trabalho (senão só o primeiro calcularia as predições).
+    """
+    df = gerar_dados_sinteticos(n_ligas=1, n_temporadas=n_temporadas, seed=seed)
+
+    print("=" * 80)
+    print("BENCHMARK: ENSEMBLE - EVENTOS DE LOG NO CAMINHO DE PREDICAO")
+    print("=" * 80)
+    print(f"Partidas de treino: {len(df)} | Predicoes por modo: {n_partidas}")
+
+    ensemble = _montar_ensemble(df, cache_size=0)
+
+    rng = np.random.default_rng(seed)
+    times = sorted(set(df['time_casa']))
+    fixtures = [tuple(rng.choice(times, 2, replace=False)) for _ in range(n_partidas)]
+
+    loggers = [logging.getLogger(name) for name in ('ensemble', 'heuristicas')]
+    estado_original = [(logger.level, list(logger.handlers)) for logger in loggers]
+
+    def medir(modo):
+        contador = _ContadorRegistros()
+        for logger in loggers:
+            logger.addHandler(contador)
+        saida, erros = _ContadorEscrita(), _ContadorEscrita()
+        try:
+            with contextlib.redirect_stdout(saida), contextlib.redirect_stderr(erros):
+                tempo, _ = _cronometrar(lambda: [ensemble.predict_match(h, a) for h, a in fixtures])
+        finally:
+            for logger in loggers:
+                logger.removeHandler(contador)
+        print(f"\n  {modo:<22} {tempo / n_partidas * 1e6:>8.1f} us/predicao | "
+              f"stdout+stderr: {saida.caracteres + erros.caracteres:>8} caracteres | "
+              f"registros: {contador.registros}")
+        return tempo, saida.caracteres + erros.caracteres, contador.registros
+
+    resultados = {}
+    try:
+        resultados['padrao'] = medir('Nivel padrao (INFO)')
+
+        # DEBUG ligado, com handlers em memória para não gravar em logs/
+        for logger in loggers:
+            logger.setLevel(logging.DEBUG)
+            logger.handlers = [logging.StreamHandler(io.StringIO())]
+        resultados['debug'] = medir('DEBUG ligado')
+
+        set_event_logging(False)
+        resultados['desligado'] = medir('Loggers desligados')
+    finally:
+        set_event_logging(True)
+        for logger, (level, handlers) in zip(loggers, estado_original):
+            logger.setLevel(level)
+            logger.handlers = handlers
+
+    print(f"\n  Custo do DEBUG ligado: {resultados['debug'][0] / resultados['padrao'][0]:.2f}x")
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_sequencias(n_ligas=4, n_temporadas=20, seed=42):
+    """
+    Compara as formas de calcular as sequências de todos os times
+
+    Loop de sequencias() time a time, varredura em Python puro, kernel NumPy
+    e kernel Numba (se instalado), sobre o índice por time de um histórico
+    sintético de 20 temporadas.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    modelo = HeuristicasModel()
+    modelo.df = modelo._normalize_data(df)
+    index = modelo._ensure_index()
+    inicios, fins = np.array(list(index['slices'].values()), dtype=np.int64).reshape(-1, 2).T
+    resultado = index['resultado']
+
+    print("=" * 80)
+    print("BENCHMARK: HEURISTICAS - KERNELS DE SEQUENCIAS")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | Times: {len(inicios)} | Jogos por time: {int((fins - inicios).mean())}")
+
+    variantes = {
+        'sequencias() por time': lambda: [modelo.sequencias(team) for team in index['slices']],
+        'Varredura Python': lambda: _streak_scan(resultado, inicios, fins),
+        'Kernel NumPy': lambda: streak_stats(resultado, inicios, fins, backend='numpy'),
+    }
+    if NUMBA_AVAILABLE:
+        streak_stats(resultado, inicios, fins, backend='numba')  # compilação fora da medição
+        variantes['Kernel Numba'] = lambda: streak_stats(resultado, inicios, fins, backend='numba')
+
+    referencia = streak_stats(resultado, inicios, fins, backend='numpy')
+    resultados = {}
+    for nome, func in variantes.items():
+        tempo, _ = _cronometrar(func, 5)
+        resultados[nome] = tempo
+        print(f"\n  {nome:<24} {tempo * 1000:>8.2f} ms")
+
+    iguais = all(np.array_equal(a, b) for a, b in zip(_streak_scan(resultado, inicios, fins), referencia))
+    if not NUMBA_AVAILABLE:
+        print("\n  Kernel Numba: numba nao instalado (usando o kernel NumPy)")
+    print(f"\n  Speedup NumPy vs sequencias() por time: "
+          f"{resultados['sequencias() por time'] / resultados['Kernel NumPy']:.1f}x")
+    print(f"  Varredura e kernel NumPy iguais: {iguais}")
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_lote(n_temporadas=3, seed=42):
+    """
+    Compara predict_match em loop com predict_batch do ensemble
+
+    Usa uma rodada (10 partidas) e uma temporada inteira (380 partidas,
+    turno e returno) e reporta a maior diferença entre as probabilidades.
+    """
+    df = gerar_dados_sinteticos(n_ligas=1, n_temporadas=n_temporadas, seed=seed)
+    ensemble = _montar_ensemble(df)
+    times = sorted(set(df['time_casa']))
+    temporada = [(casa, fora) for casa in times for fora in times if casa != fora]
+
+    print("=" * 80)
+    print("BENCHMARK: ENSEMBLE - PREDICT_MATCH EM LOOP vs PREDICT_BATCH")
+    print("=" * 80)
+    print(f"Partidas de treino: {len(df)} | Times: {len(times)}")
+
+    resultados = {}
+    for nome, fixtures in (('Rodada', temporada[:10]), ('Temporada', temporada)):
+        tempo_loop, individuais = _cronometrar(lambda: [ensemble.predict_match(h, a) for h, a in fixtures])
+        tempo_lote, lote = _cronometrar(lambda: ensemble.predict_batch(fixtures), 3)
+        diferenca = max(abs(pred['ensemble'][chave] - lote[chave][pos])
+                        for pos, pred in enumerate(individuais)
+                        for chave in ('prob_casa', 'prob_empate', 'prob_fora', 'prob_over_2_5', 'prob_btts'))
+        resultados[nome] = (tempo_loop, tempo_lote)
+        print(f"\n  {nome} ({len(fixtures)} partidas)")
+        print(f"    predict_match em loop: {tempo_loop * 1000:>9.1f} ms")
+        print(f"    predict_batch:         {tempo_lote * 1000:>9.1f} ms | speedup: {tempo_loop / tempo_lote:.1f}x")
+        print(f"    Maior diferenca:       {diferenca:.2e}")
+    print("=" * 80)
+
+    return resultados
+
+
+def benchmark_pesos(n_ligas=4, n_temporadas=4, seed=42):
+    """
+    Tempo para aprender os pesos do ensemble com predições fora da amostra
+
+    Os modelos são ajustados nas temporadas anteriores e preveem a última
+    (fora da amostra); os pesos são aprendidos por mercado, no geral e por liga.
+    """
+    df = gerar_dados_sinteticos(n_ligas=n_ligas, n_temporadas=n_temporadas, seed=seed)
+    df['liga'] = df['time_casa'].str.split(' ').str[0]
+    corte = df['data'].max() - pd.DateOffset(years=1)
+    treino, teste = df[df['data'] <= corte], df[df['data'] > corte]
+    ensemble = _montar_ensemble(treino)
+
+    chaves = sorted({chave for chaves in MARKET_KEYS.values() for chave in chaves})
+    predicoes = {}
+    for nome, modelo in ensemble.models.items():
+        lote = modelo.predict_many(teste)
+        predicoes[nome] = {idx: {chave: lote[chave][pos] for chave in chaves}
+                           for pos, idx in enumerate(teste.index)}
+
+    print("=" * 80)
+    print("BENCHMARK: ENSEMBLE - PESOS APRENDIDOS (STACKING)")
+    print("=" * 80)
+    print(f"Partidas fora da amostra: {len(teste)} | Ligas: {n_ligas} | Modelos: {len(predicoes)}")
+
+    tempo_geral, geral = _cronometrar(lambda: learn_ensemble_weights(teste, predicoes), 3)
+    tempo_liga, _ = _cronometrar(lambda: learn_ensemble_weights(teste, predicoes, league_col='liga'), 3)
+
+    print(f"\n  Pesos padrao: {ensemble.weights}")
+    for mercado, pesos in geral.items():
+        print(f"  {mercado:<9} " + " | ".join(f"{nome}: {peso:.3f}" for nome, peso in pesos.items()))
+    print(f"\n  Por mercado:          {tempo_geral * 1000:>8.1f} ms")
+    print(f"  Por mercado e liga:   {tempo_liga * 1000:>8.1f} ms")
+    print("=" * 80)
+
+    return geral
+
+
+def benchmark_paralelo(n_temporadas=10, seed=42):
+    """
+    Compara o treino a frio do ensemble sequencial e com processos paralelos
+
+    Sem cache de modelos (use_cache=False). O tempo do modo paralelo inclui
+    abrir os processos e importar os módulos neles, então ele só compensa
+    quando cada otimização leva mais do que isso.
+    """
+    df = gerar_dados_sinteticos(n_ligas=1, n_temporadas=n_temporadas, seed=seed)
+
+    print("=" * 80)
+    print("BENCHMARK: ENSEMBLE - FIT SEQUENCIAL vs PARALELO")
+    print("=" * 80)
+    print(f"Partidas: {len(df)} | CPUs: {os.cpu_count()}")
+
+    resultados = {}
+    for nome, parallel in (('Sequencial', False), ('Paralelo', True)):
+        with contextlib.redirect_stdout(_ContadorEscrita()):
+            tempo, ensemble = _cronometrar(
+                lambda: EnsembleModel().fit(league_code='PL', use_cache=False, parallel=parallel, df=df))
+        resultados[nome] = tempo
+        membros = " | ".join(f"{modelo}: {info['elapsed'] * 1000:.0f} ms"
+                             for modelo, info in ensemble.fit_report.items())
+        print(f"\n  {nome:<10} total: {tempo * 1000:>8.0f} ms")
+        print(f"             {membros}")
+    print("=" * 80)
+
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmarks = {
+        'likelihood': benchmark_likelihood,
+        'gradiente': benchmark_gradiente,
+        'solver': benchmark_solver,
+        'conjunto': benchmark_conjunto,
+        'eventos': benchmark_eventos,
+        'sequencias': benchmark_sequencias,
+        'lote': benchmark_lote,
+        'pesos': benchmark_pesos,
+        'paralelo': benchmark_paralelo,
+    }
+
+    if len(sys.argv) > 1:
+        if sys.argv[1] in benchmarks:
+            benchmarks[sys.argv[1]]()
+        else:
+            print(f"Uso: python benchmark_modelos.py [{'|'.join(benchmarks)}]")
+    else:
+        # Por padrão, executa todos os benchmarks
+        for benchmark in benchmarks.values():
+            benchmark()
+            print()
@@ -5,11 +5,52 @@ Busca do banco SQLite primeiro, fallback para CSV se necessário
 
 import pandas as pd
 import os
+from collections import Counter
 from glob import glob
 from datetime import datetime
 import config
 
 
+# Quantas vezes os dados de partidas foram lidos de cada fonte (CSV, banco, API)
+_parse_counts = Counter()
+
+
+def count_parse(source):
+    """
+    Registra uma leitura de dados de partidas
+    
+    Args:
+        source: Fonte lida (ex: 'persistent', 'database', 'csv', 'api')
+    """
+    _parse_counts[source] += 1
+
+
+def parse_counts():
+    """
+    Leituras de dados de partidas desde o início (ou o último reset)
+    
+    Returns:
+        Dict {fonte: número de leituras}
+    """
+    return dict(_parse_counts)
+
+
+def reset_parse_counts():
+    """Zera o contador de leituras"""
+    _parse_counts.clear()
+
+
+def league_prefixes():
+    """
+    Prefixo dos arquivos de cada liga (ex: 'PL' -> 'premier_league')
+    
+    Returns:
+        Dict {league_code: prefixo}
+    """
+    return {info['code']: name.lower().replace(' ', '_').replace('ã', 'a').replace('é', 'e')
+            for name, info in config.LEAGUES.items()}
+
+
 def load_match_data(league_code=None):
     """
     Carrega dados de partidas com sistema de persistência
@@ -30,15 +71,14 @@ def load_match_data(league_code=None):
     
     # Obtém nome da liga para exibição
     league_display = [name for name, info in config.LEAGUES.items() if info['code'] == league_code][0]
-    league_name_map = {info['code']: name.lower().replace(' ', '_').replace('ã', 'a').replace('é', 'e')
-                      for name, info in config.LEAGUES.items()}
-    league_prefix = league_name_map.get(league_code, 'league')
+    league_prefix = league_prefixes().get(league_code, 'league')
     
     # PRIORIDADE 1: CSV Persistente (commitado no Git - SEMPRE disponível após deploy!)
     persistent_csv = f'data/persistent/{league_prefix}_latest.csv'
     if os.path.exists(persistent_csv):
         try:
             df = pd.read_csv(persistent_csv)
+            count_parse('persistent')
             
             # Verifica se tem as colunas necessárias
             if all(col in df.columns for col in ['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data']):
@@ -58,6 +98,7 @@ def load_match_data(league_code=None):
         df = db.get_matches(league_code=league_code)
         
         if len(df) > 0:
+            count_parse('database')
             # Mapeia colunas do banco para o formato esperado pelos modelos
             df_matches = pd.DataFrame({
                 'time_casa': df['home_team'],
@@ -89,6 +130,7 @@ def load_match_data(league_code=None):
     print(f"[CSV] Carregando de {os.path.basename(latest_csv)}...")
     
     df = pd.read_csv(latest_csv)
+    count_parse('csv')
     
     # Processa dados dependendo do formato do CSV
     if 'time_casa' in df.columns:
@@ -140,6 +182,41 @@ def load_match_data(league_code=None):
     return df_matches
 
 
+def load_all_leagues_data(persistent_dir='data/persistent'):
+    """
+    Junta os CSVs persistentes de todas as ligas (data/persistent/*_latest.csv)
+    
+    Usado pelo ajuste conjunto de várias ligas. Uma partida que aparece em mais
+    de um arquivo (ex: jogo europeu no histórico de dois times) entra uma vez só,
+    atribuída à primeira liga na ordem de config.LEAGUES.
+    
+    Args:
+        persistent_dir: Diretório dos CSVs persistentes
+        
+    Returns:
+        DataFrame com colunas: time_casa, time_visitante, gols_casa, gols_visitante, data, liga
+    """
+    frames = []
+    for league_code, prefix in league_prefixes().items():
+        csv_path = os.path.join(persistent_dir, f'{prefix}_latest.csv')
+        if not os.path.exists(csv_path):
+            continue
+        
+        df = pd.read_csv(csv_path, usecols=['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data'])
+        df['data'] = pd.to_datetime(df['data'])
+        df['liga'] = league_code
+        frames.append(df)
+        print(f"[PERSISTENT] {league_code}: {len(df)} jogos")
+    
+    if not frames:
+        raise FileNotFoundError(f"Nenhum CSV persistente encontrado em {persistent_dir}")
+    
+    df_all = pd.concat(frames, ignore_index=True)
+    df_all = df_all.drop_duplicates(subset=['time_casa', 'time_visitante', 'data'], keep='first')
+    
+    return df_all.sort_values('data', ascending=False).reset_index(drop=True)
+
+
 def load_team_history(team_name, league_code=None, limit=50):
     """
     Carrega histórico de um time específico
@@ -213,9 +290,7 @@ def get_data_info(league_code=None):
         pass
     
     # Fallback para CSV
-    league_name_map = {info['code']: name.lower().replace(' ', '_').replace('ã', 'a').replace('é', 'e')
-                      for name, info in config.LEAGUES.items()}
-    league_prefix = league_name_map.get(league_code, 'league')
+    league_prefix = league_prefixes().get(league_code, 'league')
     
     csv_files = glob(f'data/{league_prefix}_matches_*.csv')
     
@@ -13,26 +13,46 @@ and Inefficiencies in the Football Betting Market.
 import numpy as np
 import pandas as pd
 from scipy.optimize import minimize
+from scipy.special import gammaln
 from scipy.stats import poisson
 from datetime import datetime
+from score_matrix import (build_score_tensor, summarize_score_tensor,
+                          top_scores_from_tensor, parse_fixtures)
+from markets import derive_markets
 from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
+import multiprocessing
 import os
 
 
 class DixonColesModel:
     """Modelo Dixon-Coles para predição de resultados de futebol"""
     
-    def __init__(self, xi=0.0):
+    def __init__(self, xi=0.0, vectorized=True):
         """
         Inicializa o modelo Dixon-Coles
         
         Args:
             xi: Fator de decaimento temporal (0 = sem decaimento)
+            vectorized: Se True, usa a verossimilhança vetorizada (sem loop Python
+                        por partida). Se False, usa a implementação original com rho_correction
         """
         self.xi = xi
+        self.vectorized = vectorized
         self.params = None
         self.teams = None
         self.home_advantage = None
+        self.n_iter = None
+        self.warm_start_info = None
+        self.param_draws = None
+        self.uncertainty_method = None
+        self._cold_start_iterations = None
+        # Incrementada a cada fit: quem guarda predições do modelo (ex: cache
+        # do EnsembleModel) percebe um refit no mesmo objeto
+        self.version = 0
+        self._fitted = False
         
     def rho_correction(self, home_goals, away_goals, lambda_home, lambda_away, rho):
         """
@@ -111,17 +131,211 @@ class DixonColesModel:
         
         return -log_lik.sum()
     
-    def fit(self, df, time_decay=True):
+    def _precompute_terms(self, home_goals, away_goals):
+        """
+        Pré-calcula os termos da verossimilhança que não dependem dos parâmetros
+        
+        Args:
+            home_goals: Gols marcados pelo time da casa
+            away_goals: Gols marcados pelo time visitante
+            
+        Returns:
+            Dict com máscaras dos placares baixos (0-0, 0-1, 1-0, 1-1) e log-fatoriais dos gols
+        """
+        home_goals = np.asarray(home_goals, dtype=float)
+        away_goals = np.asarray(away_goals, dtype=float)
+        
+        return {
+            'mask_00': (home_goals == 0) & (away_goals == 0),
+            'mask_01': (home_goals == 0) & (away_goals == 1),
+            'mask_10': (home_goals == 1) & (away_goals == 0),
+            'mask_11': (home_goals == 1) & (away_goals == 1),
+            'log_factorial': gammaln(home_goals + 1) + gammaln(away_goals + 1)
+        }
+    
+    @staticmethod
+    def _match_log_likelihood(log_lambda_home, log_lambda_away, rho, home_goals, away_goals, terms,
+                              return_derivatives=False):
+        """
+        Log-verossimilhança Dixon-Coles de cada partida (sem pesos)
+        
+        Núcleo comum da verossimilhança vetorizada: aplica a correção tau com
+        as máscaras de placar baixo. rho pode ser escalar ou um array com um
+        valor por partida (ajuste conjunto de várias ligas).
+        
+        Args:
+            log_lambda_home: Log do lambda do time da casa, por partida
+            log_lambda_away: Log do lambda do time visitante, por partida
+            rho: Parâmetro de correlação (escalar ou array por partida)
+            home_goals: Gols marcados pelo time da casa
+            away_goals: Gols marcados pelo time visitante
+            terms: Termos pré-calculados por _precompute_terms
+            return_derivatives: Se True, retorna também as derivadas por partida
+            
+        Returns:
+            Array de log-verossimilhanças ou, com return_derivatives=True,
+            (log_lik, d_log_lambda_home, d_log_lambda_away, d_rho)
+        """
+        lambda_home = np.exp(log_lambda_home)
+        lambda_away = np.exp(log_lambda_away)
+        rho = np.broadcast_to(rho, lambda_home.shape)
+        
+        # Log-verossimilhança de Poisson: k*log(lambda) - lambda - log(k!)
+        log_lik = (home_goals * log_lambda_home - lambda_home +
+                   away_goals * log_lambda_away - lambda_away -
+                   terms['log_factorial'])
+        
+        # Correção rho apenas nas células de placar baixo
+        tau = np.ones_like(lambda_home)
+        mask_00, mask_01 = terms['mask_00'], terms['mask_01']
+        mask_10, mask_11 = terms['mask_10'], terms['mask_11']
+        lambda_prod = lambda_home * lambda_away
+        tau[mask_00] = 1 - lambda_prod[mask_00] * rho[mask_00]
+        tau[mask_01] = 1 + lambda_home[mask_01] * rho[mask_01]
+        tau[mask_10] = 1 + lambda_away[mask_10] * rho[mask_10]
+        tau[mask_11] = 1 - rho[mask_11]
+        
+        # Mesmo piso de rho_correction para evitar log(0)
+        tau_clipped = np.maximum(tau, 1e-10)
+        log_lik = log_lik + np.log(tau_clipped)
+        
+        if not return_derivatives:
+            return log_lik
+        
+        # Derivadas de tau em relação a log(lambda_home), log(lambda_away) e rho
+        dtau_home = np.zeros_like(tau)
+        dtau_away = np.zeros_like(tau)
+        dtau_rho = np.zeros_like(tau)
+        dtau_home[mask_00] = -lambda_prod[mask_00] * rho[mask_00]
+        dtau_away[mask_00] = -lambda_prod[mask_00] * rho[mask_00]
+        dtau_rho[mask_00] = -lambda_prod[mask_00]
+        dtau_home[mask_01] = lambda_home[mask_01] * rho[mask_01]
+        dtau_rho[mask_01] = lambda_home[mask_01]
+        dtau_away[mask_10] = lambda_away[mask_10] * rho[mask_10]
+        dtau_rho[mask_10] = lambda_away[mask_10]
+        dtau_rho[mask_11] = -1.0
+        
+        # No piso de tau a derivada é zero
+        inv_tau = np.where(tau > 1e-10, 1.0 / tau_clipped, 0.0)
+        
+        # Derivadas da log-verossimilhança em relação aos preditores lineares
+        d_home = home_goals - lambda_home + dtau_home * inv_tau
+        d_away = away_goals - lambda_away + dtau_away * inv_tau
+        d_rho = dtau_rho * inv_tau
+        
+        return log_lik, d_home, d_away, d_rho
+    
+    def dc_log_likelihood_vectorized(self, params, home_teams, away_teams, home_goals, away_goals,
+                                     weights=None, terms=None, return_gradient=False):
+        """
+        Versão vetorizada de dc_log_likelihood (mesmo resultado, sem loop por partida)
+        
+        A correção tau é aplicada com máscaras pré-calculadas para os placares
+        0-0, 0-1, 1-0 e 1-1, e o log da Poisson usa log-fatoriais pré-calculados.
+        Com return_gradient=True também devolve o gradiente analítico, já
+        projetado pela normalização de média zero de ataque e defesa.
+        
+        Args:
+            params: Parâmetros do modelo [home_adv, rho, attack_params..., defense_params...]
+            home_teams: Índices dos times da casa
+            away_teams: Índices dos times visitantes
+            home_goals: Gols marcados pelo time da casa
+            away_goals: Gols marcados pelo time visitante
+            weights: Pesos temporais (opcional)
+            terms: Termos pré-calculados por _precompute_terms (opcional)
+            return_gradient: Se True, retorna também o gradiente
+            
+        Returns:
+            Log-verossimilhança negativa (e gradiente, se return_gradient=True)
+        """
+        n_teams = len(self.teams)
+        home_advantage = params[0]
+        rho = params[1]
+        
+        attack_params = params[2:2+n_teams]
+        defense_params = params[2+n_teams:]
+        
+        # Normalização: média de ataque = média de defesa = 0
+        attack_params = attack_params - np.mean(attack_params)
+        defense_params = defense_params - np.mean(defense_params)
+        
+        if terms is None:
+            terms = self._precompute_terms(home_goals, away_goals)
+        
+        # Log dos lambdas (evita exp seguido de log)
+        log_lambda_home = home_advantage + attack_params[home_teams] - defense_params[away_teams]
+        log_lambda_away = attack_params[away_teams] - defense_params[home_teams]
+        
+        if not return_gradient:
+            log_lik = self._match_log_likelihood(log_lambda_home, log_lambda_away, rho,
+                                                 home_goals, away_goals, terms)
+            if weights is not None:
+                log_lik = weights * log_lik
+            return -log_lik.sum()
+        
+        log_lik, d_home, d_away, d_rho = self._match_log_likelihood(
+            log_lambda_home, log_lambda_away, rho, home_goals, away_goals, terms, return_derivatives=True)
+        if weights is not None:
+            log_lik = weights * log_lik
+            d_home = weights * d_home
+            d_away = weights * d_away
+            d_rho = weights * d_rho
+        
+        grad_attack = (np.bincount(home_teams, weights=d_home, minlength=n_teams) +
+                       np.bincount(away_teams, weights=d_away, minlength=n_teams))
+        grad_defense = -(np.bincount(away_teams, weights=d_home, minlength=n_teams) +
+                         np.bincount(home_teams, weights=d_away, minlength=n_teams))
+        
+        # Regra da cadeia pela normalização (x - média(x))
+        grad_attack = grad_attack - grad_attack.mean()
+        grad_defense = grad_defense - grad_defense.mean()
+        
+        grad = np.concatenate([[d_home.sum(), d_rho.sum()], grad_attack, grad_defense])
+        
+        return -log_lik.sum(), -grad
+    
+    def _warm_start_params(self, previous_fit):
+        """
+        Monta o chute inicial a partir de um fit anterior
+        
+        Times são mapeados pelo nome; times novos (ex: promovidos) começam em zero.
+        
+        Args:
+            previous_fit: Tupla (home_advantage, rho, attack, defense) do fit anterior
+            
+        Returns:
+            (init_params, lista de times novos)
+        """
+        home_advantage, rho, attack, defense = previous_fit
+        new_teams = [team for team in self.teams if team not in attack]
+        
+        init_params = np.concatenate([
+            [np.clip(home_advantage, 0, 1)],
+            [np.clip(rho, -0.2, 0.2)],
+            [attack.get(team, 0.0) for team in self.teams],
+            [defense.get(team, 0.0) for team in self.teams]
+        ])
+        
+        return init_params, new_teams
+    
+    def fit(self, df, time_decay=True, warm_start=False):
         """
         Treina o modelo Dixon-Coles
         
         Args:
             df: DataFrame com colunas ['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data']
             time_decay: Se True, aplica decaimento temporal aos dados
+            warm_start: Se True e o modelo já foi treinado, parte dos parâmetros do
+                        último fit (refit incremental) em vez de um chute aleatório
             
         Returns:
             self
         """
+        # Estado do fit anterior (antes de sobrescrever self.teams)
+        previous_fit = None
+        if warm_start and self._fitted:
+            previous_fit = (self.home_advantage, self.rho, self.attack, self.defense)
+        
         # Prepara dados
         df = df.copy()
         df['data'] = pd.to_datetime(df['data'])
@@ -142,22 +356,27 @@ class DixonColesModel:
         if time_decay and self.xi > 0:
             max_date = df['data'].max()
             days_diff = (max_date - df['data']).dt.days
-            weights = np.exp(-self.xi * days_diff / 365.25)
+            weights = np.exp(-self.xi * days_diff / 365.25).values
         
         # Chute inicial para parâmetros
         n_teams = len(self.teams)
-        init_params = np.concatenate([
-            [0.3],  # home advantage
-            [0.0],  # rho (começar em 0 é mais seguro)
-            np.random.normal(0, 0.1, n_teams),  # attack
-            np.random.normal(0, 0.1, n_teams)   # defense
-        ])
+        if previous_fit is not None:
+            init_params, new_teams = self._warm_start_params(previous_fit)
+        else:
+            init_params = np.concatenate([
+                [0.3],  # home advantage
+                [0.0],  # rho (começar em 0 é mais seguro)
+                np.random.normal(0, 0.1, n_teams),  # attack
+                np.random.normal(0, 0.1, n_teams)   # defense
+            ])
         
         # Otimização
         print("Treinando modelo Dixon-Coles...")
         print(f"- Times: {n_teams}")
         print(f"- Partidas: {len(df)}")
         print(f"- Decaimento temporal: {time_decay} (xi={self.xi})")
+        if previous_fit is not None:
+            print(f"- Warm start a partir do fit anterior ({len(new_teams)} times novos)")
         
         # Definir bounds para evitar valores extremos
         # home_advantage: [0, 1], rho: [-0.2, 0.2], attack/defense: sem limite
@@ -165,10 +384,22 @@ class DixonColesModel:
         
         options = {'maxiter': 100, 'disp': False}
         
+        if self.vectorized:
+            # Função objetivo retorna (valor, gradiente analítico): evita diferenças finitas
+            objective = self.dc_log_likelihood_vectorized
+            args = (home_teams, away_teams, home_goals.astype(float), away_goals.astype(float),
+                    weights, self._precompute_terms(home_goals, away_goals), True)
+            jac = True
+        else:
+            objective = self.dc_log_likelihood
+            args = (home_teams, away_teams, home_goals, away_goals, weights)
+            jac = None
+        
         result = minimize(
-            self.dc_log_likelihood,
+            objective,
             init_params,
-            args=(home_teams, away_teams, home_goals, away_goals, weights),
+            args=args,
+            jac=jac,
             method='L-BFGS-B',  # Mudado para L-BFGS-B que suporta bounds
             bounds=bounds,
             options=options
@@ -179,6 +410,24 @@ class DixonColesModel:
         else:
             print(f"AVISO: Otimizacao nao convergiu completamente: {result.message}")
         
+        # Iterações: fits do zero servem de referência para medir o ganho do warm start
+        self.n_iter = result.nit
+        if previous_fit is not None:
+            saved = None
+            if self._cold_start_iterations is not None:
+                saved = self._cold_start_iterations - result.nit
+            self.warm_start_info = {
+                'iterations': result.nit,
+                'cold_start_iterations': self._cold_start_iterations,
+                'iterations_saved': saved,
+                'new_teams': new_teams
+            }
+            if saved is not None:
+                print(f"- Iteracoes: {result.nit} (warm start economizou {saved} vs ultimo fit do zero)")
+        else:
+            self._cold_start_iterations = result.nit
+            self.warm_start_info = None
+        
         # Extrai parâmetros otimizados
         self.params = result.x
         self.home_advantage = result.x[0]
@@ -197,6 +446,9 @@ class DixonColesModel:
         print(f"- Home advantage: {self.home_advantage:.3f}")
         print(f"- Rho (correlacao): {self.rho:.3f}")
         
+        self.version += 1
+        self._fitted = True
+        
         return self
     
     def predict_goals(self, home_team, away_team):
@@ -240,19 +492,7 @@ class DixonColesModel:
         """
         lambda_home, lambda_away = self.predict_goals(home_team, away_team)
         
-        # Matriz de probabilidades
-        prob_matrix = np.zeros((max_goals + 1, max_goals + 1))
-        
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                prob_poisson = poisson.pmf(i, lambda_home) * poisson.pmf(j, lambda_away)
-                tau = self.rho_correction(i, j, lambda_home, lambda_away, self.rho)
-                prob_matrix[i, j] = prob_poisson * tau
-        
-        # Normaliza
-        prob_matrix = prob_matrix / prob_matrix.sum()
-        
-        return prob_matrix
+        return build_score_tensor([lambda_home], [lambda_away], max_goals, rho=self.rho)[0]
     
     def predict_match(self, home_team, away_team, max_goals=10):
         """
@@ -269,30 +509,9 @@ class DixonColesModel:
         lambda_home, lambda_away = self.predict_goals(home_team, away_team)
         prob_matrix = self.predict_score_probabilities(home_team, away_team, max_goals)
         
-        # Probabilidades de resultado (1X2)
-        prob_home_win = np.tril(prob_matrix, -1).sum()  # Casa ganha
-        prob_draw = np.trace(prob_matrix)  # Empate
-        prob_away_win = np.triu(prob_matrix, 1).sum()  # Fora ganha
-        
-        # Over/Under 2.5 gols
-        prob_under_2_5 = sum([prob_matrix[i, j] 
-                              for i in range(max_goals + 1) 
-                              for j in range(max_goals + 1) 
-                              if i + j < 2.5])
-        prob_over_2_5 = 1 - prob_under_2_5
-        
-        # Ambos marcam (BTTS)
-        prob_btts_yes = sum([prob_matrix[i, j] 
-                             for i in range(1, max_goals + 1) 
-                             for j in range(1, max_goals + 1)])
-        prob_btts_no = 1 - prob_btts_yes
-        
-        # Placares mais prováveis
-        top_scores = []
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                top_scores.append(((i, j), prob_matrix[i, j]))
-        top_scores.sort(key=lambda x: x[1], reverse=True)
+        # 1X2, Over/Under 2.5 e BTTS com reduções sobre a matriz
+        summary = {key: value[0] for key, value in summarize_score_tensor(prob_matrix).items()}
+        top_scores = top_scores_from_tensor(prob_matrix[None], k=10)[0]
         
         return {
             'home_team': home_team,
@@ -301,14 +520,67 @@ class DixonColesModel:
             'lambda_away': lambda_away,
             'expected_goals_home': lambda_home,
             'expected_goals_away': lambda_away,
-            'prob_home_win': prob_home_win,
-            'prob_draw': prob_draw,
-            'prob_away_win': prob_away_win,
-            'prob_over_2_5': prob_over_2_5,
-            'prob_under_2_5': prob_under_2_5,
-            'prob_btts_yes': prob_btts_yes,
-            'prob_btts_no': prob_btts_no,
-            'top_scores': top_scores[:10],  # Top 10 placares
+            **summary,
+            'top_scores': top_scores,  # Top 10 placares
+            'prob_matrix': prob_matrix
+        }
+    
+    def predict_goals_many(self, home_teams, away_teams):
+        """
+        Prediz lambdas esperados para várias partidas de uma vez
+        
+        Args:
+            home_teams: Lista de times da casa
+            away_teams: Lista de times visitantes
+            
+        Returns:
+            (array lambda_home, array lambda_away)
+        """
+        unknown = sorted((set(home_teams) | set(away_teams)) - set(self.teams))
+        if unknown:
+            raise ValueError(f"Time nao encontrado no modelo: {', '.join(unknown)}")
+        
+        attack_home = np.array([self.attack[team] for team in home_teams])
+        attack_away = np.array([self.attack[team] for team in away_teams])
+        defense_home = np.array([self.defense[team] for team in home_teams])
+        defense_away = np.array([self.defense[team] for team in away_teams])
+        
+        lambda_home = np.exp(self.home_advantage + attack_home - defense_away)
+        lambda_away = np.exp(attack_away - defense_home)
+        
+        return lambda_home, lambda_away
+    
+    def predict_many(self, fixtures, max_goals=10, top_k=10):
+        """
+        Gera predições para várias partidas de uma vez (formato colunar)
+        
+        As matrizes de placares são calculadas juntas como um tensor
+        (n_partidas, max_goals+1, max_goals+1) e os mercados saem de reduções de array.
+        
+        Args:
+            fixtures: Lista de tuplas (time_casa, time_visitante) ou DataFrame
+                      com colunas time_casa e time_visitante
+            max_goals: Número máximo de gols
+            top_k: Número de placares em top_scores (None = não calcula, ex:
+                   quando o chamador combina os tensores antes de escolher)
+            
+        Returns:
+            Dicionário com as mesmas chaves de predict_match, com um array
+            (ou lista) por chave e uma posição por partida
+        """
+        home_teams, away_teams = parse_fixtures(fixtures)
+        lambda_home, lambda_away = self.predict_goals_many(home_teams, away_teams)
+        prob_matrix = build_score_tensor(lambda_home, lambda_away, max_goals, rho=self.rho)
+        
+        return {
+            'home_team': home_teams,
+            'away_team': away_teams,
+            'lambda_home': lambda_home,
+            'lambda_away': lambda_away,
+            'expected_goals_home': lambda_home,
+            'expected_goals_away': lambda_away,
+            **summarize_score_tensor(prob_matrix),
+            'top_scores': top_scores_from_tensor(prob_matrix, k=top_k) if top_k else None,
             'prob_matrix': prob_matrix
         }
     
@@ -332,6 +604,193 @@ class DixonColesModel:
         df = df.sort_values('Forca_Total', ascending=False).reset_index(drop=True)
         return df
 
+    
+    def _training_arrays(self, df, time_decay=True):
+        """
+        Converte um DataFrame de partidas nos arrays usados pela verossimilhança
+        
+        Args:
+            df: DataFrame com ['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data']
+            time_decay: Se True, calcula os pesos temporais
+            
+        Returns:
+            Tupla (home_teams, away_teams, home_goals, away_goals, weights)
+        """
+        team_to_idx = {team: idx for idx, team in enumerate(self.teams)}
+        datas = pd.to_datetime(df['data'])
+        
+        weights = None
+        if time_decay and self.xi > 0:
+            days_diff = (datas.max() - datas).dt.days
+            weights = np.exp(-self.xi * days_diff / 365.25).values
+        
+        return (df['time_casa'].map(team_to_idx).values,
+                df['time_visitante'].map(team_to_idx).values,
+                df['gols_casa'].values.astype(float),
+                df['gols_visitante'].values.astype(float),
+                weights)
+    
+    def _centered_params(self):
+        """Parâmetros ajustados com ataque e defesa já centralizados"""
+        return np.concatenate([
+            [self.home_advantage, self.rho],
+            [self.attack[team] for team in self.teams],
+            [self.defense[team] for team in self.teams]
+        ])
+    
+    def fit_uncertainty(self, df, method='bootstrap', n_draws=200, time_decay=True, n_jobs=None, seed=None):
+        """
+        Estima a incerteza dos parâmetros e guarda os sorteios em self.param_draws
+        
+        - 'bootstrap': reamostra as partidas com reposição e reajusta o modelo em
+          paralelo (process pool), cada refit com warm start a partir do fit atual
+        - 'laplace': aproximação normal em torno do ótimo, com a covariância dada
+          pela inversa (pseudo-inversa) da Hessiana da log-verossimilhança
+        
+        Args:
+            df: DataFrame usado no fit
+            method: 'bootstrap' ou 'laplace'
+            n_draws: Número de sorteios de parâmetros
+            time_decay: Se True, aplica decaimento temporal (como no fit)
+            n_jobs: Processos do pool no bootstrap (None = número de CPUs, 1 = serial)
+            seed: Semente do gerador aleatório
+            
+        Returns:
+            Array (n_draws, 2 + 2*n_times) no layout [home_adv, rho, ataque..., defesa...]
+        """
+        if not self._fitted:
+            raise ValueError("Modelo nao treinado! Execute fit() primeiro.")
+        
+        rng = np.random.default_rng(seed)
+        
+        if method == 'laplace':
+            draws = self._laplace_draws(df, n_draws, time_decay, rng)
+        elif method == 'bootstrap':
+            draws = self._bootstrap_draws(df, n_draws, time_decay, n_jobs, rng)
+        else:
+            raise ValueError(f"Metodo desconhecido: {method} (use 'bootstrap' ou 'laplace')")
+        
+        self.param_draws = draws
+        self.uncertainty_method = method
+        
+        return draws
+    
+    def _laplace_draws(self, df, n_draws, time_decay, rng):
+        """Sorteios da aproximação de Laplace (Hessiana por diferenças do gradiente analítico)"""
+        home_teams, away_teams, home_goals, away_goals, weights = self._training_arrays(df, time_decay)
+        terms = self._precompute_terms(home_goals, away_goals)
+        args = (home_teams, away_teams, home_goals, away_goals, weights, terms, True)
+        
+        center = self._centered_params()
+        n_params = len(center)
+        step = 1e-5
+        hessian = np.empty((n_params, n_params))
+        for k in range(n_params):
+            delta = np.zeros(n_params)
+            delta[k] = step
+            _, grad_plus = self.dc_log_likelihood_vectorized(center + delta, *args)
+            _, grad_minus = self.dc_log_likelihood_vectorized(center - delta, *args)
+            hessian[:, k] = (grad_plus - grad_minus) / (2 * step)
+        hessian = (hessian + hessian.T) / 2
+        
+        # A normalização de média zero deixa duas direções sem curvatura: pseudo-inversa
+        covariance = np.linalg.pinv(hessian, rcond=1e-10, hermitian=True)
+        draws = rng.multivariate_normal(center, covariance, size=n_draws, method='eigh')
+        
+        n_teams = len(self.teams)
+        draws[:, 2:2+n_teams] -= draws[:, 2:2+n_teams].mean(axis=1, keepdims=True)
+        draws[:, 2+n_teams:] -= draws[:, 2+n_teams:].mean(axis=1, keepdims=True)
+        
+        return draws
+    
+    def _bootstrap_draws(self, df, n_draws, time_decay, n_jobs, rng):
+        """Sorteios do bootstrap: refits em paralelo sobre reamostragens das partidas"""
+        previous_fit = (self.home_advantage, self.rho, self.attack, self.defense)
+        tasks = [
+            (self.xi, self.teams, previous_fit, df.iloc[rng.integers(0, len(df), len(df))], time_decay)
+            for _ in range(n_draws)
+        ]
+        
+        if n_jobs == 1:
+            draws = [_bootstrap_refit(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                draws = list(executor.map(_bootstrap_refit, tasks, chunksize=max(1, n_draws // 32)))
+        
+        return np.vstack(draws)
+    
+    def predict_intervals(self, home_team, away_team, percentiles=(5, 95), max_goals=10):
+        """
+        Intervalos de confiança de todos os mercados de uma partida
+        
+        Calcula de uma vez as matrizes de placares de todos os sorteios de
+        parâmetros (tensor n_draws x G+1 x G+1) e tira os percentis de cada mercado.
+        
+        Args:
+            home_team: Time da casa
+            away_team: Time visitante
+            percentiles: Percentis (inferior, superior) do intervalo
+            max_goals: Número máximo de gols
+            
+        Returns:
+            Dict {mercado: {'mean', 'low', 'high'}} com as chaves de derive_markets (prob_*)
+        """
+        if self.param_draws is None:
+            raise ValueError("Sem sorteios de parametros! Execute fit_uncertainty() primeiro.")
+        if home_team not in self.teams or away_team not in self.teams:
+            raise ValueError(f"Time nao encontrado no modelo: {home_team} ou {away_team}")
+        
+        n_teams = len(self.teams)
+        home_idx = self.teams.index(home_team)
+        away_idx = self.teams.index(away_team)
+        draws = self.param_draws
+        attack = draws[:, 2:2+n_teams]
+        defense = draws[:, 2+n_teams:]
+        
+        lambda_home = np.exp(draws[:, 0] + attack[:, home_idx] - defense[:, away_idx])
+        lambda_away = np.exp(attack[:, away_idx] - defense[:, home_idx])
+        tensor = build_score_tensor(lambda_home, lambda_away, max_goals, rho=draws[:, 1])
+        
+        low, high = percentiles
+        intervals = {}
+        for key, values in derive_markets(tensor).items():
+            if not key.startswith('prob_'):
+                continue
+            intervals[key] = {
+                'mean': float(values.mean()),
+                'low': float(np.percentile(values, low)),
+                'high': float(np.percentile(values, high))
+            }
+        
+        return intervals
+
+
+def _bootstrap_refit(task):
+    """
+    Reajusta o Dixon-Coles numa reamostragem (executado nos processos do pool)
+    
+    Args:
+        task: Tupla (xi, teams, previous_fit, df_reamostrado, time_decay)
+        
+    Returns:
+        Array [home_adv, rho, ataque..., defesa...] alinhado com teams
+    """
+    xi, teams, previous_fit, sample, time_decay = task
+    
+    model = DixonColesModel(xi=xi)
+    model.home_advantage, model.rho, model.attack, model.defense = previous_fit
+    model._fitted = True
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(sample, time_decay=time_decay, warm_start=True)
+    
+    # Times ausentes da reamostragem mantêm a estimativa original
+    attack = np.array([model.attack.get(team, previous_fit[2][team]) for team in teams])
+    defense = np.array([model.defense.get(team, previous_fit[3][team]) for team in teams])
+    
+    return np.concatenate([[model.home_advantage, model.rho],
+                           attack - attack.mean(), defense - defense.mean()])
 
 def print_prediction(prediction):
     """Imprime predição de forma formatada"""
@@ -7,44 +7,158 @@ Pesos:
 - Heurísticas: 15%
 """
 
+import copy
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 from dixon_coles import DixonColesModel
 from offensive_defensive import OffensiveDefensiveModel
 from heuristicas import HeuristicasModel
 from data_loader import load_match_data  # Loader universal (DB primeiro)
+from markets import derive_markets
+from model_store import data_fingerprint, fit_or_load, load_model
+from score_matrix import parse_fixtures, top_scores_from_tensor
+from stacking import MARKET_KEYS
+from logger_config import log_event
+
+
+# Só o logger do módulo: handlers (arquivo em logs/, console) são configurados
+# pelos pontos de entrada (ex: app_betting via setup_project_logging)
+logger = logging.getLogger(__name__)
+
+
+# Modelos de Poisson treinados pelo ensemble: (chave, nome de exibição)
+POISSON_MODELS = [
+    ('dixon_coles', 'Dixon-Coles'),
+    ('offensive_defensive', 'Offensive-Defensive'),
+]
+MODEL_XI = 0.003
+
+# Máximo de predições de predict_match guardadas em memória (LRU)
+PREDICTION_CACHE_SIZE = 256
+
+
+def _freeze(value):
+    """Converte dicts (aninhados) em tuplas para usar como parte de uma chave de cache"""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _normalize_weights(weights):
+    """Normaliza cada dict {modelo: peso} (também os aninhados por mercado/liga) para somar 1"""
+    if any(isinstance(value, dict) for value in weights.values()):
+        return {key: _normalize_weights(value) for key, value in weights.items()}
+    total = sum(weights.values())
+    return {k: v/total for k, v in weights.items()}
+
+# Probabilidades combinadas pelo ensemble: (chave do ensemble, chave do predict_many dos modelos)
+COMBINED_KEYS = [
+    ('prob_casa', 'prob_home_win'),
+    ('prob_empate', 'prob_draw'),
+    ('prob_fora', 'prob_away_win'),
+    ('prob_over_2_5', 'prob_over_2_5'),
+    ('prob_btts', 'prob_btts_yes'),
+]
+
+# Pesos padrão: DC=55%, OD=30%, H=15%
+DEFAULT_WEIGHTS = {
+    'dixon_coles': 0.55,
+    'offensive_defensive': 0.30,
+    'heuristicas': 0.15
+}
+
+# Probabilidades combinadas de cada mercado de stacking.MARKET_KEYS
+MARKET_COMBINED_KEYS = {
+    market: tuple(key for key, model_key in COMBINED_KEYS if model_key in model_keys)
+    for market, model_keys in MARKET_KEYS.items()
+}
+
+
+def _fit_poisson_member(model_name, df, league_code, fingerprint, use_cache):
+    """
+    Treina (ou recarrega do cache) um modelo de Poisson do ensemble, medindo o tempo
+    
+    Função de módulo para poder rodar nos processos de EnsembleModel.fit(parallel=True).
+    
+    Args:
+        model_name: Chave de POISSON_MODELS
+        df: DataFrame de treino
+        league_code: Código da liga
+        fingerprint: Impressão digital de df
+        use_cache: Se True, usa/atualiza o cache de modelos em disco
+    
+    Returns:
+        Tupla (modelo, origem, segundos)
+    """
+    inicio = time.perf_counter()
+    model, source = fit_or_load(model_name, df, league_code, fingerprint,
+                                xi=MODEL_XI, use_cache=use_cache)
+    return model, source, time.perf_counter() - inicio
 
 
 class EnsembleModel:
     """Ensemble que combina Dixon-Coles, Offensive-Defensive e Heurísticas"""
     
-    def __init__(self, weights=None):
+    def __init__(self, weights=None, cache_size=PREDICTION_CACHE_SIZE):
         """
         Inicializa o ensemble
         
         Args:
-            weights: Dict com pesos {'dixon_coles': float, 'offensive_defensive': float, 'heuristicas': float}
+            weights: Dict com pesos {'dixon_coles': float, 'offensive_defensive': float, 'heuristicas': float},
+                     por mercado {mercado: {modelo: peso}} ou por liga
+                     {liga: {mercado: {modelo: peso}}} (formatos de
+                     stacking.learn_ensemble_weights; ver market_weights)
                      Se None, usa pesos padrão: DC=55%, OD=30%, H=15%
+            cache_size: Máximo de predições guardadas por predict_match (0 desativa o cache)
         """
         if weights is None:
-            self.weights = {
-                'dixon_coles': 0.55,
-                'offensive_defensive': 0.30,
-                'heuristicas': 0.15
-            }
+            self.weights = dict(DEFAULT_WEIGHTS)
         else:
             # Normaliza pesos para somarem 1
-            total = sum(weights.values())
-            self.weights = {k: v/total for k, v in weights.items()}
+            self.weights = _normalize_weights(weights)
         
+        self.league_code = None
         self.models = {}
+        self.data_fingerprint = None
+        self.training_data = None
+        self.fit_report = {}
         self._fitted = False
         
-    def fit(self, league_code=None):
+        # Cache LRU de predict_match: (versão do modelo, casa, fora, max_goals) -> predição
+        self.cache_size = cache_size
+        self._prediction_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+    def fit(self, league_code=None, use_cache=True, parallel=False, df=None):
         """
         Treina todos os modelos
         
+        Os dados da liga são lidos uma única vez e o mesmo DataFrame é usado
+        pelos três modelos. Dixon-Coles e Offensive-Defensive são recarregados
+        de data/models quando o artefato salvo foi treinado com exatamente os
+        mesmos dados (mesma impressão digital); caso contrário são treinados e salvos.
+        
+        Com parallel=True, os modelos de Poisson que precisam de otimização são
+        treinados ao mesmo tempo em processos separados (contexto 'spawn', como
+        em training_service) enquanto as heurísticas são montadas no processo
+        principal; o treino leva aproximadamente o tempo do modelo mais lento.
+        
+        A origem, o tempo e o erro (se houver) de cada modelo ficam em
+        self.fit_report; um modelo que falha fica como None, sem derrubar os outros.
+        
         Args:
             league_code: Código da liga (ex: 'PL', 'BSA'). Se None, usa Premier League
+            use_cache: Se True, usa/atualiza o cache de modelos em disco
+            parallel: Se True, treina os modelos de Poisson em processos paralelos
+            df: DataFrame já carregado da liga (None = lê com load_match_data)
         
         Returns:
             self
@@ -57,57 +171,155 @@ class EnsembleModel:
         # Obtém nome da liga para exibição
         league_display = [name for name, info in LEAGUES.items() if info['code'] == league_code][0]
         
-        print(f"Treinando ensemble para {league_display}...")
+        log_event(logger, 'ensemble.fit.start', logging.INFO, league=league_code, parallel=parallel)
+        inicio = time.perf_counter()
         
         # Carrega dados uma vez (do banco se disponível, senão CSV)
-        try:
-            df = load_match_data(league_code=league_code)
-        except Exception as e:
-            print(f"ERRO ao carregar dados: {e}")
-            return self
-        
-        # Dixon-Coles
-        print("\n[1/3] Treinando Dixon-Coles...")
-        try:
-            self.models['dixon_coles'] = DixonColesModel(xi=0.003)
-            self.models['dixon_coles'].fit(df, time_decay=True)
-            print("OK - Dixon-Coles treinado")
-        except Exception as e:
-            print(f"ERRO - Dixon-Coles: {e}")
-            self.models['dixon_coles'] = None
+        if df is None:
+            try:
+                df = load_match_data(league_code=league_code)
+            except Exception as e:
+                logger.error(f"Erro ao carregar dados de {league_display}: {e}")
+                return self
         
-        # Offensive-Defensive
-        print("\n[2/3] Treinando Offensive-Defensive...")
-        try:
-            self.models['offensive_defensive'] = OffensiveDefensiveModel(xi=0.003)
-            self.models['offensive_defensive'].fit(df, time_decay=True)
-            print("OK - Offensive-Defensive treinado")
-        except Exception as e:
-            print(f"ERRO - Offensive-Defensive: {e}")
-            self.models['offensive_defensive'] = None
+        self.league_code = league_code
+        self.data_fingerprint = data_fingerprint(df)
+        self.training_data = df
+        self.clear_prediction_cache()
+        self.fit_report = {}
         
-        # Heurísticas
-        print("\n[3/3] Carregando Heuristicas...")
-        try:
-            self.models['heuristicas'] = HeuristicasModel()
-            self.models['heuristicas'].load_data(league_code=league_code)
-            print("OK - Heuristicas carregadas")
-        except Exception as e:
-            print(f"ERRO - Heuristicas: {e}")
-            self.models['heuristicas'] = None
+        if parallel:
+            self._fit_members_parallel(df, league_code, use_cache)
+        else:
+            for step, (model_name, display_name) in enumerate(POISSON_MODELS, 1):
+                try:
+                    model, source, elapsed = _fit_poisson_member(
+                        model_name, df, league_code, self.data_fingerprint, use_cache)
+                    self._set_member(model_name, step, model, source, elapsed)
+                except Exception as e:
+                    logger.error(f"Erro ao treinar {display_name}: {e}")
+                    self._set_member(model_name, step, error=e)
+            self._load_heuristics(df, league_code)
         
         self._fitted = True
-        print(f"\nEnsemble treinado com sucesso para {league_display}!")
+        log_event(logger, 'ensemble.fit.done', logging.INFO, league=league_code,
+                  models=[name for name, model in self.models.items() if model is not None],
+                  elapsed=round(time.perf_counter() - inicio, 3))
         
         return self
     
-    def predict_match(self, home_team, away_team):
+    def _fit_members_parallel(self, df, league_code, use_cache):
+        """
+        Treina os modelos de Poisson em processos paralelos
+        
+        Artefatos válidos no cache são recarregados aqui mesmo (não compensa
+        abrir um processo para isso); só os modelos que precisam de otimização
+        vão para o pool. Com um único modelo a treinar, treina no processo atual.
+        
+        Args:
+            df: DataFrame de treino
+            league_code: Código da liga
+            use_cache: Se True, usa/atualiza o cache de modelos em disco
+        """
+        to_fit = []
+        for step, (model_name, display_name) in enumerate(POISSON_MODELS, 1):
+            inicio = time.perf_counter()
+            cached = None
+            if use_cache:
+                try:
+                    cached = load_model(model_name, league_code, self.data_fingerprint, xi=MODEL_XI)
+                except Exception as e:
+                    logger.warning(f"Erro ao recarregar {display_name} do cache: {e}")
+            if cached is not None:
+                self._set_member(model_name, step, cached, 'cache', time.perf_counter() - inicio)
+            else:
+                to_fit.append((step, model_name, display_name))
+        
+        if len(to_fit) <= 1:
+            for step, model_name, display_name in to_fit:
+                try:
+                    model, source, elapsed = _fit_poisson_member(
+                        model_name, df, league_code, self.data_fingerprint, use_cache)
+                    self._set_member(model_name, step, model, source, elapsed)
+                except Exception as e:
+                    logger.error(f"Erro ao treinar {display_name}: {e}")
+                    self._set_member(model_name, step, error=e)
+            self._load_heuristics(df, league_code)
+            return
+        
+        with ProcessPoolExecutor(max_workers=len(to_fit),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {
+                executor.submit(_fit_poisson_member, model_name, df, league_code,
+                                self.data_fingerprint, use_cache): (step, model_name, display_name)
+                for step, model_name, display_name in to_fit
+            }
+            
+            # Heurísticas no processo principal enquanto os processos otimizam
+            self._load_heuristics(df, league_code)
+            
+            for future in as_completed(futures):
+                step, model_name, display_name = futures[future]
+                try:
+                    model, source, elapsed = future.result()
+                    self._set_member(model_name, step, model, source, elapsed)
+                except Exception as e:
+                    logger.error(f"Erro ao treinar {display_name}: {e}")
+                    self._set_member(model_name, step, error=e)
+    
+    def _load_heuristics(self, df, league_code):
+        """
+        Monta as heurísticas com o DataFrame já carregado (sem nova leitura de arquivo/API)
+        
+        As probabilidades das heurísticas são calibradas nas partidas mais
+        recentes da liga (HeuristicasModel.calibrate; ligas com histórico
+        curto ficam com as escalas fixas).
+        """
+        inicio = time.perf_counter()
+        try:
+            model = HeuristicasModel().load_data(league_code=league_code, df=df)
+            model.calibrate(df)
+            self._set_member('heuristicas', 3, model, 'shared', time.perf_counter() - inicio)
+        except Exception as e:
+            logger.error(f"Erro ao carregar Heuristicas: {e}")
+            self._set_member('heuristicas', 3, error=e, elapsed=time.perf_counter() - inicio)
+    
+    def _set_member(self, model_name, step, model=None, source=None, elapsed=None, error=None):
+        """
+        Registra o resultado do treino de um modelo em self.models e self.fit_report
+        
+        Args:
+            model_name: Chave do modelo
+            step: Posição do modelo (1 a 3) para o log
+            model: Modelo treinado (None em caso de erro)
+            source: Origem ('cache', 'fit' ou 'shared')
+            elapsed: Tempo em segundos
+            error: Exceção do treino, se houver
+        """
+        self.models[model_name] = model if error is None else None
+        self.fit_report[model_name] = {
+            'source': source if error is None else None,
+            'elapsed': elapsed,
+            'error': None if error is None else str(error)
+        }
+        if error is None:
+            log_event(logger, 'ensemble.fit.model', logging.INFO, step=f"{step}/3",
+                      model=model_name, source=source, elapsed=round(elapsed, 3))
+    
+    def predict_match(self, home_team, away_team, max_goals=10):
         """
         Predição combinada dos 3 modelos
         
+        O resultado fica num cache LRU chaveado pela versão do modelo (ver
+        _model_version), time da casa, time visitante e max_goals, então a mesma
+        partida pedida de novo (ex: a cada rerun do Streamlit) não é recalculada,
+        e trocar pesos ou modelos gera uma chave nova. Cada chamada recebe uma
+        cópia da predição guardada, que pode ser alterada à vontade.
+        
         Args:
             home_team: Time da casa
             away_team: Time visitante
+            max_goals: Número máximo de gols nas matrizes de placares
             
         Returns:
             Dict com probabilidades combinadas e predições individuais
@@ -115,16 +327,108 @@ class EnsembleModel:
         if not self._fitted:
             raise RuntimeError("Ensemble não foi treinado. Execute fit() primeiro.")
         
+        key = (self._model_version(), home_team, away_team, max_goals)
+        with self._cache_lock:
+            if key in self._prediction_cache:
+                self._prediction_cache.move_to_end(key)
+                self.cache_hits += 1
+                return copy.deepcopy(self._prediction_cache[key])
+            self.cache_misses += 1
+        
+        # Calcula fora do lock: chamadas concorrentes para partidas
+        # diferentes não esperam umas pelas outras
+        result = self._predict_match(home_team, away_team, max_goals)
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._prediction_cache[key] = result
+                self._prediction_cache.move_to_end(key)
+                while len(self._prediction_cache) > self.cache_size:
+                    self._prediction_cache.popitem(last=False)
+            return copy.deepcopy(result)
+        
+        return result
+    
+    def _model_version(self):
+        """
+        Identifica o estado do ensemble que determina as predições
+        
+        Inclui a impressão digital dos dados, os pesos (também alterações feitas
+        no próprio dict), os objetos dos modelos e a versão de cada um, que os
+        modelos incrementam ao mudar no lugar (fit, update, calibrate). Guardar
+        os modelos na chave os mantém vivos enquanto estiverem no cache, então
+        a identidade de um modelo substituído não pode ser reaproveitada por outro.
+        
+        Returns:
+            Tupla hashable
+        """
+        members = tuple((name, model, getattr(model, 'version', 0)) for name, model in self.models.items())
+        return (self.data_fingerprint, self.league_code, _freeze(self.weights), members)
+    
+    def market_weights(self):
+        """
+        Pesos usados em cada probabilidade combinada
+        
+        Pesos por liga usam a liga do último fit (ou a chave None, com os pesos
+        gerais, se a liga não tiver pesos próprios). Pesos por mercado valem para
+        as probabilidades daquele mercado; um mercado sem pesos usa os pesos
+        padrão. As matrizes de placares usam os pesos do 1X2.
+        
+        Returns:
+            Dict {chave de COMBINED_KEYS: {modelo: peso}}, mais 'score_matrix'
+        """
+        weights = self.weights
+        nested = any(isinstance(value, dict) for value in weights.values())
+        if nested and not set(weights) <= set(MARKET_KEYS):
+            weights = weights.get(self.league_code, weights.get(None, DEFAULT_WEIGHTS))
+        if not any(isinstance(value, dict) for value in weights.values()):
+            weights = {market: weights for market in MARKET_KEYS}
+        
+        resolved = {key: weights.get(market, DEFAULT_WEIGHTS)
+                    for market, keys in MARKET_COMBINED_KEYS.items() for key in keys}
+        resolved['score_matrix'] = resolved['prob_casa']
+        return resolved
+    
+    def cache_info(self):
+        """
+        Estatísticas do cache de predições
+        
+        Returns:
+            Dict com hits, misses, size (entradas atuais) e maxsize
+        """
+        with self._cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self._prediction_cache),
+                'maxsize': self.cache_size
+            }
+    
+    def clear_prediction_cache(self):
+        """Esvazia o cache de predições e zera os contadores"""
+        with self._cache_lock:
+            self._prediction_cache.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
+    
+    def _predict_match(self, home_team, away_team, max_goals):
+        """
+        Calcula a predição combinada sem passar pelo cache
+        
+        Args:
+            home_team: Time da casa
+            away_team: Time visitante
+            max_goals: Número máximo de gols nas matrizes de placares
+            
+        Returns:
+            Dict no formato de predict_match
+        """
         predictions = {}
         
         # Dixon-Coles
         if self.models['dixon_coles']:
             try:
-                pred_dc = self.models['dixon_coles'].predict_match(home_team, away_team)
-                
-                # Debug: verificar se prob_matrix existe
-                if 'prob_matrix' not in pred_dc:
-                    print(f"AVISO: Dixon-Coles não retornou 'prob_matrix'. Keys disponíveis: {pred_dc.keys()}")
+                pred_dc = self.models['dixon_coles'].predict_match(home_team, away_team, max_goals=max_goals)
                 
                 predictions['dixon_coles'] = {
                     'prob_casa': pred_dc['prob_home_win'],
@@ -136,26 +440,17 @@ class EnsembleModel:
                     'score_matrix': pred_dc.get('prob_matrix', None)
                 }
                 
-                # Debug: confirmar se score_matrix foi atribuído
-                if predictions['dixon_coles']['score_matrix'] is not None:
-                    print(f"[OK] Dixon-Coles: score_matrix atribuido com shape {predictions['dixon_coles']['score_matrix'].shape}")
-                else:
-                    print(f"[X] Dixon-Coles: score_matrix e None")
+                log_event(logger, 'ensemble.predict.member', model='dixon_coles',
+                          has_matrix=predictions['dixon_coles']['score_matrix'] is not None)
                     
             except Exception as e:
-                print(f"Erro em Dixon-Coles: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.error(f"Erro em Dixon-Coles: {e}", exc_info=True)
                 predictions['dixon_coles'] = None
         
         # Offensive-Defensive
         if self.models['offensive_defensive']:
             try:
-                pred_od = self.models['offensive_defensive'].predict_match(home_team, away_team)
-                
-                # Debug: verificar se prob_matrix existe
-                if 'prob_matrix' not in pred_od:
-                    print(f"AVISO: Offensive-Defensive não retornou 'prob_matrix'. Keys disponíveis: {pred_od.keys()}")
+                pred_od = self.models['offensive_defensive'].predict_match(home_team, away_team, max_goals=max_goals)
                 
                 predictions['offensive_defensive'] = {
                     'prob_casa': pred_od['prob_home_win'],
@@ -167,67 +462,30 @@ class EnsembleModel:
                     'score_matrix': pred_od.get('prob_matrix', None)
                 }
                 
-                # Debug: confirmar se score_matrix foi atribuído
-                if predictions['offensive_defensive']['score_matrix'] is not None:
-                    print(f"[OK] Offensive-Defensive: score_matrix atribuido com shape {predictions['offensive_defensive']['score_matrix'].shape}")
-                else:
-                    print(f"[X] Offensive-Defensive: score_matrix e None")
+                log_event(logger, 'ensemble.predict.member', model='offensive_defensive',
+                          has_matrix=predictions['offensive_defensive']['score_matrix'] is not None)
                     
             except Exception as e:
-                print(f"Erro em Offensive-Defensive: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.error(f"Erro em Offensive-Defensive: {e}", exc_info=True)
                 predictions['offensive_defensive'] = None
         
         # Heurísticas
         if self.models['heuristicas']:
             try:
-                pred_heur = self.models['heuristicas'].predict_match(home_team, away_team)
-                
-                # Converte heurísticas para probabilidades
-                # Baseado na confiança e resultado previsto
-                confianca = pred_heur['confianca'] / 100.0
-                
-                if 'Casa' in pred_heur['resultado_previsto'] or home_team in pred_heur['resultado_previsto']:
-                    prob_casa = 0.5 + (confianca - 0.5) * 0.8  # Ajusta para range razoável
-                    prob_fora = (1 - prob_casa) * 0.4
-                    prob_empate = 1 - prob_casa - prob_fora
-                elif 'Fora' in pred_heur['resultado_previsto'] or away_team in pred_heur['resultado_previsto']:
-                    prob_fora = 0.5 + (confianca - 0.5) * 0.8
-                    prob_casa = (1 - prob_fora) * 0.4
-                    prob_empate = 1 - prob_casa - prob_fora
-                else:  # Empate
-                    prob_empate = 0.3 + (confianca - 0.3) * 0.5
-                    prob_casa = (1 - prob_empate) * 0.55
-                    prob_fora = 1 - prob_casa - prob_empate
-                
-                # Over/Under
-                if pred_heur['over_under'] == 'Over 2.5':
-                    prob_over = 0.5 + (pred_heur['confianca_ou'] / 100 - 0.5) * 0.6
-                elif pred_heur['over_under'] == 'Under 2.5':
-                    prob_over = 0.5 - (pred_heur['confianca_ou'] / 100 - 0.5) * 0.6
-                else:
-                    prob_over = 0.5
-                
-                # BTTS
-                if pred_heur['btts'] == 'Sim':
-                    prob_btts = 0.5 + (pred_heur['confianca_btts'] / 100 - 0.5) * 0.6
-                elif pred_heur['btts'] == 'Nao':
-                    prob_btts = 0.5 - (pred_heur['confianca_btts'] / 100 - 0.5) * 0.6
-                else:
-                    prob_btts = 0.5
+                # Probabilidades numéricas calculadas da tabela de features
+                pred_heur = self.models['heuristicas'].predict_many([(home_team, away_team)])
                 
                 predictions['heuristicas'] = {
-                    'prob_casa': prob_casa,
-                    'prob_empate': prob_empate,
-                    'prob_fora': prob_fora,
-                    'prob_over_2_5': prob_over,
-                    'prob_btts': prob_btts,
+                    'prob_casa': float(pred_heur['prob_home_win'][0]),
+                    'prob_empate': float(pred_heur['prob_draw'][0]),
+                    'prob_fora': float(pred_heur['prob_away_win'][0]),
+                    'prob_over_2_5': float(pred_heur['prob_over_2_5'][0]),
+                    'prob_btts': float(pred_heur['prob_btts_yes'][0]),
                     'top_scores': [],  # Heurísticas não gera placares específicos
                     'score_matrix': None  # Heurísticas não gera matriz de placares
                 }
             except Exception as e:
-                print(f"Erro em Heuristicas: {e}")
+                logger.error(f"Erro em Heuristicas: {e}")
                 predictions['heuristicas'] = None
         
         # Combina probabilidades com pesos
@@ -238,6 +496,9 @@ class EnsembleModel:
         ensemble_probs['score_matrix'] = ensemble_matrix
         ensemble_probs['top_scores'] = ensemble_top_scores
         
+        # Todos os mercados derivados da matriz combinada (O/U, handicap, dupla chance...)
+        ensemble_probs['markets'] = derive_markets(ensemble_matrix) if ensemble_matrix is not None else {}
+        
         return {
             'home_team': home_team,
             'away_team': away_team,
@@ -246,6 +507,115 @@ class EnsembleModel:
             'weights': self.weights
         }
     
+    def predict_batch(self, fixtures, max_goals=10):
+        """
+        Predição combinada de várias partidas de uma vez (formato colunar)
+        
+        Cada modelo prevê todas as partidas com predict_many. As probabilidades
+        ficam num array (modelos, partidas, mercados) combinado por um único
+        produto com os pesos de cada mercado (market_weights), e o 1X2 é
+        renormalizado linha a linha. As
+        matrizes de placares de Dixon-Coles e Offensive-Defensive são
+        misturadas com np.tensordot e os placares mais prováveis saem de uma
+        única seleção top-k sobre o tensor combinado (os modelos não calculam
+        os seus). Um modelo que não conhece um dos times
+        fica fora da média daquela partida (mesma regra de predict_match).
+        
+        Args:
+            fixtures: Lista de tuplas (time_casa, time_visitante) ou DataFrame
+                      com colunas time_casa e time_visitante
+            max_goals: Número máximo de gols das matrizes de placares
+            
+        Returns:
+            Dict com home_team, away_team, prob_casa, prob_empate, prob_fora,
+            prob_over_2_5, prob_btts, score_matrix (tensor (n, G+1, G+1)),
+            top_scores, markets e individual ({modelo: {chave: array}}), com
+            uma posição por partida (NaN onde nenhum modelo pôde prever)
+        """
+        if not self._fitted:
+            raise RuntimeError("Ensemble não foi treinado. Execute fit() primeiro.")
+        
+        home_teams, away_teams = parse_fixtures(fixtures)
+        n = len(home_teams)
+        names = [name for name in self.models if self.models.get(name)]
+        size = max_goals + 1
+        
+        probs = np.zeros((len(names), n, len(COMBINED_KEYS)))
+        valid = np.zeros((len(names), n), dtype=bool)
+        tensors = np.zeros((len(names), n, size, size))
+        has_matrix = np.zeros((len(names), n), dtype=bool)
+        individual = {}
+        
+        for m, name in enumerate(names):
+            model = self.models[name]
+            if name == 'heuristicas':
+                rows = np.arange(n)
+            else:
+                known = set(model.teams)
+                rows = np.flatnonzero([home in known and away in known
+                                       for home, away in zip(home_teams, away_teams)])
+            if len(rows) == 0:
+                continue
+            
+            subset = [(home_teams[i], away_teams[i]) for i in rows]
+            try:
+                if name == 'heuristicas':
+                    batch = model.predict_many(subset)
+                else:
+                    batch = model.predict_many(subset, max_goals=max_goals, top_k=None)
+            except Exception as e:
+                logger.error(f"Erro em {name}: {e}", exc_info=True)
+                continue
+            
+            probs[m, rows] = np.column_stack([batch[key] for _, key in COMBINED_KEYS])
+            valid[m, rows] = True
+            if batch.get('prob_matrix') is not None:
+                tensors[m, rows] = batch['prob_matrix']
+                has_matrix[m, rows] = True
+            
+            individual[name] = {key: np.where(valid[m], probs[m, :, j], np.nan)
+                                for j, (key, _) in enumerate(COMBINED_KEYS)}
+            log_event(logger, 'ensemble.predict_batch.member', model=name, n_fixtures=len(rows))
+        
+        market_weights = self.market_weights()
+        # Pesos (mercados, modelos): uma linha por chave de COMBINED_KEYS
+        weights = np.array([[market_weights[key].get(name, 0.0) for name in names]
+                            for key, _ in COMBINED_KEYS]).reshape(len(COMBINED_KEYS), len(names))
+        
+        # Média ponderada entre os modelos válidos de cada partida
+        # (probs é zero onde o modelo não previu, então só o denominador muda)
+        total_weight = valid.T.astype(float) @ weights.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            combined = np.einsum('km,mnk->nk', weights, np.clip(probs, 0, 1)) / total_weight
+        combined = np.clip(combined, 0, 1)
+        
+        # Normaliza 1X2 linha a linha (uniforme se a soma for zero)
+        total_1x2 = combined[:, :3].sum(axis=1, keepdims=True)
+        combined[:, :3] = np.divide(combined[:, :3], total_1x2, out=np.full((n, 3), 1 / 3), where=total_1x2 > 0)
+        combined[total_weight == 0] = np.nan
+        
+        # Matrizes de placares: média ponderada sobre o eixo dos modelos (pesos do 1X2)
+        matrix_weights = np.array([market_weights['score_matrix'].get(name, 0.0) for name in names])
+        matrix_weight = matrix_weights @ has_matrix
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score_matrix = np.tensordot(matrix_weights, tensors, axes=1) / matrix_weight[:, None, None]
+        
+        top_scores = top_scores_from_tensor(np.nan_to_num(score_matrix), k=10)
+        top_scores = [scores if ok else [] for scores, ok in zip(top_scores, matrix_weight > 0)]
+        
+        log_event(logger, 'ensemble.predict_batch', n_fixtures=n, n_models=len(names))
+        
+        return {
+            'home_team': np.array(home_teams, dtype=object),
+            'away_team': np.array(away_teams, dtype=object),
+            **{key: combined[:, j] for j, (key, _) in enumerate(COMBINED_KEYS)},
+            'score_matrix': score_matrix,
+            'top_scores': top_scores,
+            'markets': derive_markets(score_matrix),
+            'individual': individual,
+            'weights': self.weights
+        }
+    
     def _combine_predictions(self, predictions):
         """
         Combina predições individuais usando pesos
@@ -266,19 +636,20 @@ class EnsembleModel:
         }
         
         valid_weights = {key: [] for key in valid_probs.keys()}
+        weights = self.market_weights()
         
         for model_name, pred in predictions.items():
             if pred is not None:
-                weight = self.weights[model_name]
                 for key in valid_probs.keys():
+                    weight = weights[key].get(model_name, 0.0)
                     if key in pred and pred[key] is not None:
                         # VALIDAÇÃO: Garante que probabilidades estão no intervalo [0, 1]
                         prob_value = pred[key]
                         if prob_value < 0:
-                            print(f"AVISO: {model_name} retornou {key}={prob_value:.4f} (negativo). Corrigindo para 0.")
+                            logger.warning(f"{model_name} retornou {key}={prob_value:.4f} (negativo). Corrigindo para 0.")
                             prob_value = 0.0
                         elif prob_value > 1:
-                            print(f"AVISO: {model_name} retornou {key}={prob_value:.4f} (>1). Corrigindo para 1.")
+                            logger.warning(f"{model_name} retornou {key}={prob_value:.4f} (>1). Corrigindo para 1.")
                             prob_value = 1.0
                         
                         valid_probs[key].append(prob_value)
@@ -287,9 +658,9 @@ class EnsembleModel:
         # Calcula média ponderada
         combined = {}
         for key in valid_probs.keys():
-            if valid_probs[key]:
+            total_weight = sum(valid_weights[key])
+            if valid_probs[key] and total_weight > 0:
                 # Normaliza pesos
-                total_weight = sum(valid_weights[key])
                 normalized_weights = [w / total_weight for w in valid_weights[key]]
                 
                 # Média ponderada
@@ -309,7 +680,7 @@ class EnsembleModel:
                 combined['prob_fora'] /= total
             else:
                 # Fallback: distribuição uniforme
-                print("AVISO: Soma de probabilidades 1X2 é zero. Usando distribuição uniforme.")
+                logger.warning("Soma de probabilidades 1X2 é zero. Usando distribuição uniforme.")
                 combined['prob_casa'] = 1.0 / 3.0
                 combined['prob_empate'] = 1.0 / 3.0
                 combined['prob_fora'] = 1.0 / 3.0
@@ -331,25 +702,17 @@ class EnsembleModel:
         # Coleta matrizes válidas
         matrices = []
         weights = []
+        matrix_weights = self.market_weights()['score_matrix']
         
-        print(f"\n=== DEBUG: Combinando score matrices ===")
         for model_name in ['dixon_coles', 'offensive_defensive']:
-            if model_name in predictions and predictions[model_name] is not None:
-                score_matrix = predictions[model_name].get('score_matrix')
-                print(f"{model_name}: score_matrix é None? {score_matrix is None}")
-                if score_matrix is not None:
-                    print(f"{model_name}: shape = {score_matrix.shape}")
-                    matrices.append(score_matrix)
-                    weights.append(self.weights[model_name])
-                else:
-                    print(f"{model_name}: Nenhuma matriz encontrada")
-            else:
-                print(f"{model_name}: Modelo não está em predictions ou é None")
+            if predictions.get(model_name) is not None and predictions[model_name].get('score_matrix') is not None:
+                matrices.append(predictions[model_name]['score_matrix'])
+                weights.append(matrix_weights.get(model_name, 0.0))
         
-        print(f"Total de matrizes coletadas: {len(matrices)}")
+        log_event(logger, 'ensemble.combine_matrices', n_matrices=len(matrices))
         
-        if not matrices:
-            print("AVISO: Nenhuma matriz de placar disponível para combinar")
+        if not matrices or sum(weights) == 0:
+            logger.warning("Nenhuma matriz de placar disponível para combinar")
             return None, []
         
         # Normaliza pesos
@@ -362,14 +725,9 @@ class EnsembleModel:
             ensemble_matrix += matrix * weight
         
         # Gera top scores da matriz ensemble
-        max_goals = ensemble_matrix.shape[0] - 1
-        top_scores = []
-        for i in range(ensemble_matrix.shape[0]):
-            for j in range(ensemble_matrix.shape[1]):
-                top_scores.append(((i, j), ensemble_matrix[i, j]))
-        top_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        return ensemble_matrix, top_scores[:10]
+        top_scores = top_scores_from_tensor(ensemble_matrix[None], k=10)[0]
+        
+        return ensemble_matrix, top_scores
 
 
 if __name__ == "__main__":
@@ -410,9 +768,11 @@ if __name__ == "__main__":
     print(f"  BTTS:              {ens['prob_btts']*100:>6.2f}%")
     
     print("\nPROBABILIDADES INDIVIDUAIS:")
+    # Pesos podem ser por mercado/liga: mostra os do 1X2
+    pesos_1x2 = ensemble.market_weights()['prob_casa']
     for model_name, model_pred in pred['individual'].items():
         if model_pred:
-            print(f"\n  {model_name.upper()} (peso: {pred['weights'][model_name]*100:.0f}%):")
+            print(f"\n  {model_name.upper()} (peso 1X2: {pesos_1x2.get(model_name, 0.0)*100:.0f}%):")
             print(f"    Casa:    {model_pred['prob_casa']*100:>6.2f}%")
             print(f"    Empate:  {model_pred['prob_empate']*100:>6.2f}%")
             print(f"    Fora:    {model_pred['prob_fora']*100:>6.2f}%")
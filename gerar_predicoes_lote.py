@@ -1,11 +1,48 @@
 """
 Gera predições em lote para múltiplas partidas e salva em CSV
 """
-from dixon_coles import DixonColesModel, load_match_data
+from dixon_coles import DixonColesModel
+from data_loader import load_match_data
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
 
+def tabela_predicoes(pred, top_3=False):
+    """
+    Converte o resultado colunar de predict_many no DataFrame salvo em CSV
+    
+    Args:
+        pred: Dicionário retornado por model.predict_many
+        top_3: Se True, inclui a coluna com os 3 placares mais prováveis
+    """
+    placar_top = [scores[0] for scores in pred['top_scores']]
+    
+    tabela = pd.DataFrame({
+        'Time_Casa': pred['home_team'],
+        'Time_Visitante': pred['away_team'],
+        'Gols_Esp_Casa': np.round(pred['expected_goals_home'], 2),
+        'Gols_Esp_Fora': np.round(pred['expected_goals_away'], 2),
+        'Prob_Vit_Casa_%': np.round(pred['prob_home_win'] * 100, 1),
+        'Prob_Empate_%': np.round(pred['prob_draw'] * 100, 1),
+        'Prob_Vit_Fora_%': np.round(pred['prob_away_win'] * 100, 1),
+        'Prob_Over_2.5_%': np.round(pred['prob_over_2_5'] * 100, 1),
+        'Prob_Under_2.5_%': np.round(pred['prob_under_2_5'] * 100, 1),
+        'Prob_BTTS_Sim_%': np.round(pred['prob_btts_yes'] * 100, 1),
+        'Prob_BTTS_Nao_%': np.round(pred['prob_btts_no'] * 100, 1),
+        'Placar_Mais_Provavel': [f"{gols[0]}-{gols[1]}" for gols, _ in placar_top],
+        'Prob_Placar_Top_%': [round(prob * 100, 2) for _, prob in placar_top],
+    })
+    
+    if top_3:
+        tabela['Top_3_Placares'] = [
+            ', '.join([f"{s[0][0]}-{s[0][1]} ({s[1]*100:.1f}%)" for s in scores[:3]])
+            for scores in pred['top_scores']
+        ]
+    
+    return tabela
+
+
 def gerar_todas_combinacoes(model, max_por_time=5):
     """
     Gera predições para as combinações mais interessantes
@@ -15,52 +52,24 @@ def gerar_todas_combinacoes(model, max_por_time=5):
         max_por_time: Máximo de partidas por time
     """
     times = model.teams
-    predicoes = []
     
     print(f"Gerando predicoes para {len(times)} times...")
-    print("Isso pode levar alguns minutos...\n")
     
     # Pega top times por força
     strengths = model.get_team_strengths()
     top_times = strengths.head(10)['Time'].tolist()
     
-    total = len(top_times) * (len(top_times) - 1)
-    contador = 0
-    
-    # Gera predições para todos contra todos (top times)
-    for i, time_casa in enumerate(top_times):
-        for time_visitante in top_times:
-            if time_casa == time_visitante:
-                continue
-            
-            contador += 1
-            print(f"[{contador}/{total}] {time_casa} vs {time_visitante}", end='\r')
-            
-            try:
-                pred = model.predict_match(time_casa, time_visitante)
-                
-                predicoes.append({
-                    'Time_Casa': time_casa,
-                    'Time_Visitante': time_visitante,
-                    'Gols_Esp_Casa': round(pred['expected_goals_home'], 2),
-                    'Gols_Esp_Fora': round(pred['expected_goals_away'], 2),
-                    'Prob_Vit_Casa_%': round(pred['prob_home_win'] * 100, 1),
-                    'Prob_Empate_%': round(pred['prob_draw'] * 100, 1),
-                    'Prob_Vit_Fora_%': round(pred['prob_away_win'] * 100, 1),
-                    'Prob_Over_2.5_%': round(pred['prob_over_2_5'] * 100, 1),
-                    'Prob_Under_2.5_%': round(pred['prob_under_2_5'] * 100, 1),
-                    'Prob_BTTS_Sim_%': round(pred['prob_btts_yes'] * 100, 1),
-                    'Prob_BTTS_Nao_%': round(pred['prob_btts_no'] * 100, 1),
-                    'Placar_Mais_Provavel': f"{pred['top_scores'][0][0][0]}-{pred['top_scores'][0][0][1]}",
-                    'Prob_Placar_Top_%': round(pred['top_scores'][0][1] * 100, 2),
-                })
-            except Exception as e:
-                print(f"\nErro em {time_casa} vs {time_visitante}: {e}")
-                continue
-    
-    print(f"\n\nTotal de predicoes geradas: {len(predicoes)}")
-    
-    return pd.DataFrame(predicoes)
+    # Todos contra todos (top times), calculados de uma vez
+    partidas = [(time_casa, time_visitante)
+                for time_casa in top_times
+                for time_visitante in top_times
+                if time_casa != time_visitante]
+    
+    predicoes = tabela_predicoes(model.predict_many(partidas))
+    
+    print(f"\nTotal de predicoes geradas: {len(predicoes)}")
+    
+    return predicoes
 
 
 def gerar_partidas_especificas(model, partidas):
@@ -71,35 +80,22 @@ def gerar_partidas_especificas(model, partidas):
         model: Modelo treinado
         partidas: Lista de tuplas (time_casa, time_visitante)
     """
-    predicoes = []
+    validas = []
     
     for i, (time_casa, time_visitante) in enumerate(partidas, 1):
         print(f"[{i}/{len(partidas)}] {time_casa} vs {time_visitante}")
         
-        try:
-            pred = model.predict_match(time_casa, time_visitante)
-            
-            predicoes.append({
-                'Time_Casa': time_casa,
-                'Time_Visitante': time_visitante,
-                'Gols_Esp_Casa': round(pred['expected_goals_home'], 2),
-                'Gols_Esp_Fora': round(pred['expected_goals_away'], 2),
-                'Prob_Vit_Casa_%': round(pred['prob_home_win'] * 100, 1),
-                'Prob_Empate_%': round(pred['prob_draw'] * 100, 1),
-                'Prob_Vit_Fora_%': round(pred['prob_away_win'] * 100, 1),
-                'Prob_Over_2.5_%': round(pred['prob_over_2_5'] * 100, 1),
-                'Prob_Under_2.5_%': round(pred['prob_under_2_5'] * 100, 1),
-                'Prob_BTTS_Sim_%': round(pred['prob_btts_yes'] * 100, 1),
-                'Prob_BTTS_Nao_%': round(pred['prob_btts_no'] * 100, 1),
-                'Placar_Mais_Provavel': f"{pred['top_scores'][0][0][0]}-{pred['top_scores'][0][0][1]}",
-                'Prob_Placar_Top_%': round(pred['top_scores'][0][1] * 100, 2),
-                'Top_3_Placares': ', '.join([f"{s[0][0]}-{s[0][1]} ({s[1]*100:.1f}%)" for s in pred['top_scores'][:3]])
-            })
-        except Exception as e:
-            print(f"  ERRO: {e}")
+        desconhecidos = [time for time in (time_casa, time_visitante) if time not in model.teams]
+        if desconhecidos:
+            print(f"  ERRO: Time nao encontrado no modelo: {', '.join(desconhecidos)}")
             continue
+        
+        validas.append((time_casa, time_visitante))
+    
+    if not validas:
+        return pd.DataFrame()
     
-    return pd.DataFrame(predicoes)
+    return tabela_predicoes(model.predict_many(validas), top_3=True)
 
 
 if __name__ == "__main__":
@@ -10,20 +10,414 @@ Heurísticas são regras simples baseadas em padrões observados:
 - Tendências ofensivas/defensivas
 """
 
+import logging
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from scipy.optimize import minimize
 from glob import glob
 import os
 
+from data_loader import count_parse
+from logger_config import log_event
+from score_matrix import parse_fixtures
+from streak_kernels import streak_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+# Códigos usados no índice por time
+RESULT_CODES = {'Vitoria': 1, 'Empate': 0, 'Derrota': -1}
+RESULT_NAMES = {code: name for name, code in RESULT_CODES.items()}
+RESULT_LETTERS = {1: 'V', 0: 'E', -1: 'D'}
+VENUE_CODES = {'Casa': 0, 'Fora': 1}
+
+# Conversão do veredito heurístico em probabilidades quando o modelo não foi
+# calibrado (histórico curto demais): a confiança do veredito é comprimida por
+# estes fatores em torno de 50% (30% no empate)
+RESULT_CONFIDENCE_SCALE = 0.8
+DRAW_CONFIDENCE_SCALE = 0.5
+MARKET_CONFIDENCE_SCALE = 0.6
+
+# Calibração (calibrate): partidas mais recentes usadas no ajuste, mínimo
+# para ajustar e penalidade L2 dos coeficientes (exceto intercepto)
+CALIBRATION_MATCHES = 380
+CALIBRATION_MIN_MATCHES = 100
+CALIBRATION_L2 = 1e-3
+
+# Features de cada mercado na calibração (colunas de predict_many)
+CALIBRATION_FEATURES = {
+    '1x2': ('diferenca_pontos', 'gols_esperados'),
+    'over_2_5': ('gols_esperados',),
+    'btts': ('btts_medio',),
+}
+
+
+def _softmax_last_reference(scores):
+    """Probabilidades de uma softmax com a última classe de referência (escore 0)"""
+    scores = np.column_stack([scores, np.zeros(len(scores))])
+    scores -= scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit_multinomial_logit(X, y, n_classes, l2=CALIBRATION_L2):
+    """
+    Regressão logística multinomial por máxima verossimilhança
+    
+    A última classe é a de referência, então são n_classes - 1 linhas de
+    coeficientes. O log loss com penalidade L2 é convexo; L-BFGS-B com o
+    gradiente analítico converge em poucas iterações.
+    
+    Args:
+        X: Array (n, d) de features; a primeira coluna é o intercepto (1)
+        y: Array (n,) com a classe observada (0 a n_classes - 1)
+        n_classes: Número de classes
+        l2: Penalidade L2 dos coeficientes (o intercepto não é penalizado)
+    
+    Returns:
+        Array (n_classes - 1, d) de coeficientes
+    """
+    n, d = X.shape
+    onehot = np.eye(n_classes)[y][:, :-1]
+    penalty = np.ones((n_classes - 1, d))
+    penalty[:, 0] = 0
+    
+    def objective(flat):
+        coefs = flat.reshape(n_classes - 1, d)
+        probs = _softmax_last_reference(X @ coefs.T)
+        loss = -np.mean(np.log(np.maximum(probs[np.arange(n), y], 1e-15)))
+        loss += 0.5 * l2 * np.sum(penalty * coefs ** 2)
+        grad = (probs[:, :-1] - onehot).T @ X / n + l2 * penalty * coefs
+        return loss, grad.ravel()
+    
+    result = minimize(objective, np.zeros((n_classes - 1) * d), jac=True, method='L-BFGS-B')
+    return result.x.reshape(n_classes - 1, d)
+
+
+def build_pair_index(home_teams, away_teams, home_goals, away_goals, dates, positions=None):
+    """
+    Índice de confrontos diretos por par de times (sem ordem de mando)
+    
+    Cada par guarda as posições das suas partidas, da mais recente para a
+    mais antiga, e os totais acumulados do ponto de vista do primeiro time
+    do par (ordem alfabética). Os totais dos últimos N confrontos são então
+    lidos numa única linha dos acumulados.
+    
+    As posições em rows são sempre as de positions: passe as linhas das
+    partidas no DataFrame que vai ser lido com df.iloc[rows] (ex: as linhas
+    dos mandantes no DataFrame normalizado). append_to_pair_index recebe
+    posições no mesmo referencial.
+    
+    Args:
+        home_teams: Time da casa de cada partida
+        away_teams: Time visitante de cada partida
+        home_goals: Gols do time da casa
+        away_goals: Gols do time visitante
+        dates: Data de cada partida
+        positions: Posição de cada partida (None = 0..n-1, a ordem recebida)
+        
+    Returns:
+        Dict {frozenset({time_a, time_b}): {'teams': (a, b), 'rows': posições,
+        'tallies': array (k, 5) com acumulados de [gols_a, gols_b, vitorias_a,
+        empates, vitorias_b], 'appended': partidas de append_to_pair_index
+        ainda não incorporadas}}
+    """
+    home_teams = np.asarray(home_teams, dtype=str)
+    away_teams = np.asarray(away_teams, dtype=str)
+    home_goals = np.asarray(home_goals)
+    away_goals = np.asarray(away_goals)
+    dates = np.asarray(pd.to_datetime(dates)).astype('datetime64[ns]')
+    positions = np.arange(len(home_teams)) if positions is None else np.asarray(positions)
+    
+    # Perspectiva canônica: time_a é o primeiro do par em ordem alfabética
+    a_em_casa = home_teams <= away_teams
+    time_a = np.where(a_em_casa, home_teams, away_teams)
+    time_b = np.where(a_em_casa, away_teams, home_teams)
+    gols_a = np.where(a_em_casa, home_goals, away_goals)
+    gols_b = np.where(a_em_casa, away_goals, home_goals)
+    valores = np.column_stack([gols_a, gols_b, gols_a > gols_b, gols_a == gols_b, gols_a < gols_b])
+    
+    if len(home_teams) == 0:
+        return {}
+    
+    # Ordena por par e, dentro do par, da partida mais recente para a mais antiga
+    ordem = np.lexsort((-dates.view(np.int64), time_b, time_a))
+    a_ordenado = time_a[ordem]
+    b_ordenado = time_b[ordem]
+    novo_par = (a_ordenado[1:] != a_ordenado[:-1]) | (b_ordenado[1:] != b_ordenado[:-1])
+    inicios = np.flatnonzero(np.r_[True, novo_par])
+    fins = np.r_[inicios[1:], len(ordem)]
+    
+    index = {}
+    for inicio, fim in zip(inicios, fins):
+        linhas = ordem[inicio:fim]
+        a, b = time_a[linhas[0]], time_b[linhas[0]]
+        index[frozenset((a, b))] = {
+            'teams': (a, b),
+            'rows': positions[linhas],
+            'tallies': np.cumsum(valores[linhas], axis=0),
+            'appended': [],
+        }
+    
+    return index
+
+
+def append_to_pair_index(pair_index, home_team, away_team, home_goals, away_goals, row):
+    """
+    Acrescenta uma partida nova (a mais recente do par) ao índice de confrontos
+    
+    Custo O(1): a partida vai para a lista 'appended' do par e só é
+    incorporada a rows/tallies quando o par for lido (_merge_appended), uma
+    vez para todas as partidas acumuladas.
+    
+    Args:
+        pair_index: Resultado de build_pair_index (alterado no lugar)
+        home_team: Time da casa
+        away_team: Time visitante
+        home_goals: Gols do time da casa
+        away_goals: Gols do time visitante
+        row: Posição da partida, no mesmo referencial das posições de build_pair_index
+    """
+    if home_team <= away_team:
+        a, b, gols_a, gols_b = home_team, away_team, home_goals, away_goals
+    else:
+        a, b, gols_a, gols_b = away_team, home_team, away_goals, home_goals
+    
+    entrada = pair_index.get(frozenset((a, b)))
+    if entrada is None:
+        entrada = pair_index[frozenset((a, b))] = {
+            'teams': (a, b),
+            'rows': np.array([], dtype=int),
+            'tallies': np.zeros((0, 5), dtype=int),
+            'appended': [],
+        }
+    entrada['appended'].append((row, (gols_a, gols_b, gols_a > gols_b, gols_a == gols_b, gols_a < gols_b)))
+
+
+def _merge_appended(entrada):
+    """
+    Incorpora a rows/tallies as partidas anexadas a um par (da mais antiga à mais recente)
+    
+    Args:
+        entrada: Entrada de um par do índice de confrontos (alterada no lugar)
+    """
+    anexadas = entrada['appended']
+    if not anexadas:
+        return
+    
+    # Mais recente primeiro, como em rows
+    linhas = np.array([linha for linha, _ in reversed(anexadas)])
+    valores = np.array([valor for _, valor in reversed(anexadas)], dtype=int)
+    acumulados = np.cumsum(valores, axis=0)
+    
+    entrada['rows'] = np.r_[linhas, entrada['rows']]
+    entrada['tallies'] = np.vstack([acumulados, entrada['tallies'] + acumulados[-1]])
+    entrada['appended'] = []
+
+
+def head_to_head(pair_index, team_a, team_b, n_jogos=None):
+    """
+    Resumo dos confrontos diretos a partir do índice de pares
+    
+    Args:
+        pair_index: Resultado de build_pair_index
+        team_a: Time de referência (vitorias_a/gols_a são dele)
+        team_b: Adversário
+        n_jogos: Número de confrontos mais recentes (None = todos)
+        
+    Returns:
+        Dict com confrontos, vitorias_a, empates, vitorias_b, gols_a, gols_b
+        e rows (posições das partidas, mais recente primeiro) ou None se os
+        times nunca se enfrentaram
+    """
+    entrada = pair_index.get(frozenset((team_a, team_b)))
+    if entrada is None or team_a == team_b:
+        return None
+    _merge_appended(entrada)
+    
+    total = len(entrada['rows'])
+    confrontos = total if n_jogos is None else min(n_jogos, total)
+    if confrontos == 0:
+        return None
+    
+    gols_a, gols_b, vitorias_a, empates, vitorias_b = entrada['tallies'][confrontos - 1].tolist()
+    if team_a != entrada['teams'][0]:
+        gols_a, gols_b, vitorias_a, vitorias_b = gols_b, gols_a, vitorias_b, vitorias_a
+    
+    return {
+        'confrontos': confrontos,
+        'vitorias_a': vitorias_a,
+        'empates': empates,
+        'vitorias_b': vitorias_b,
+        'gols_a': gols_a,
+        'gols_b': gols_b,
+        'rows': entrada['rows'][:confrontos],
+    }
+
 
 class HeuristicasModel:
     """Sistema de heurísticas para análise de futebol"""
     
     def __init__(self):
         """Inicializa o modelo de heurísticas"""
+        # Incrementada quando os dados ou a calibração mudam (df, update,
+        # calibrate): quem guarda predições do modelo percebe a mudança
+        self.version = 0
         self.df = None
         self.teams = None
+        self._index = None
+        self._index_source = None
+        self._feature_tables = {}
+        self._fit_state = None
+        self.calibration = None
+    
+    @property
+    def df(self):
+        """Partidas normalizadas (time/adversario), incluindo as recebidas por update()"""
+        if self._pending_frames:
+            sincronizado = self._index_source is self._df
+            # Uma normalização para todos os lotes, reordenada para o layout de
+            # cada lote (mandantes e depois visitantes), usado nas posições do índice
+            partidas = pd.concat(self._pending_frames, ignore_index=True)
+            tamanhos = [len(lote) for lote in self._pending_frames]
+            offsets = np.r_[0, np.cumsum(tamanhos)[:-1]]
+            ordem = np.concatenate([np.r_[o:o + m, len(partidas) + o:len(partidas) + o + m]
+                                    for o, m in zip(offsets, tamanhos)])
+            novas = self._normalize_data(partidas).iloc[ordem]
+            self._df = self._categorize(pd.concat([self._df, novas], ignore_index=True))
+            self._pending_frames = []
+            # O índice já contém as linhas pendentes (jogos anexados por update)
+            if sincronizado:
+                self._index_source = self._df
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._pending_frames = []
+        self.version += 1
+    
+    def _build_index(self):
+        """
+        Monta o índice por time a partir de self.df
+        
+        As linhas são ordenadas uma única vez por (time, data decrescente) em
+        arrays NumPy contíguos; cada time ocupa uma fatia [início, fim), então
+        os últimos N jogos de um time são arrays[início:início + N]. Para
+        casa/fora guarda as posições (já ordenadas) dos jogos de cada local.
+        
+        Jogos recebidos depois por update() ficam em index['appended'] (lista
+        por time, do mais antigo para o mais recente) até a próxima reconstrução.
+        """
+        df = self.df
+        datas = pd.to_datetime(df['data']).values.astype('datetime64[ns]')
+        times = df['time'].astype(str).values
+        
+        # Ordena por time e, dentro do time, do jogo mais recente para o mais antigo
+        ordem = np.lexsort((-datas.view(np.int64), times))
+        times = times[ordem]
+        
+        resultado = np.asarray(df['resultado'].map(RESULT_CODES), dtype=np.int8)
+        local = np.asarray(df['local'].map(VENUE_CODES), dtype=np.int8)
+        
+        index = {
+            'time': times,
+            'data': datas[ordem],
+            'adversario': df['adversario'].astype(str).values[ordem],
+            'gols_marcados': df['gols_marcados'].values[ordem],
+            'gols_sofridos': df['gols_sofridos'].values[ordem],
+            'local': local[ordem],
+            'resultado': resultado[ordem],
+        }
+        
+        # Fatias contíguas de cada time
+        nomes, inicios, contagens = np.unique(times, return_index=True, return_counts=True)
+        index['slices'] = {
+            nome: (int(inicio), int(inicio + contagem))
+            for nome, inicio, contagem in zip(nomes, inicios, contagens)
+        }
+        
+        # Posições dos jogos em casa/fora dentro de cada fatia
+        index['venue_positions'] = {}
+        for nome, (inicio, fim) in index['slices'].items():
+            posicoes = np.arange(inicio, fim)
+            locais = index['local'][inicio:fim]
+            for local_nome, codigo in VENUE_CODES.items():
+                index['venue_positions'][(nome, local_nome)] = posicoes[locais == codigo]
+        
+        # Confrontos diretos: cada partida aparece uma vez, na linha do mandante
+        # (rows são posições em self.df, como as que update() anexa)
+        mandantes = np.flatnonzero(local == VENUE_CODES['Casa'])
+        index['pairs'] = build_pair_index(
+            df['time'].astype(str).values[mandantes],
+            df['adversario'].astype(str).values[mandantes],
+            df['gols_marcados'].values[mandantes],
+            df['gols_sofridos'].values[mandantes],
+            datas[mandantes],
+            positions=mandantes
+        )
+        
+        index['appended'] = {}
+        index['n_rows'] = len(df)
+        
+        self._index = index
+        self._index_source = df
+        self._feature_tables = {}
+    
+    def _ensure_index(self):
+        """Reconstrói o índice se self.df foi trocado desde a última construção"""
+        if self._index is None or self._index_source is not self._df:
+            self._build_index()
+        return self._index
+    
+    def _team_games(self, team, n_jogos=None, local=None):
+        """
+        Jogos mais recentes de um time lidos do índice (sem varrer self.df)
+        
+        Args:
+            team: Nome do time
+            n_jogos: Número de jogos (None = todos)
+            local: 'Casa', 'Fora' ou None (ambos)
+            
+        Returns:
+            Tupla (gols_marcados, gols_sofridos, resultado) de arrays do mais
+            recente para o mais antigo; arrays vazios se o time não existir
+        """
+        index = self._ensure_index()
+        
+        # Jogos anexados por update() vêm antes dos jogos do índice
+        # (percorridos do fim, parando ao completar n_jogos)
+        novos = []
+        for jogo in reversed(index['appended'].get(team, [])):
+            if n_jogos is not None and len(novos) >= n_jogos:
+                break
+            if local is None or jogo[3] == VENUE_CODES[local]:
+                novos.append(jogo)
+        if n_jogos is not None:
+            n_jogos -= len(novos)
+        
+        if local is None:
+            inicio, fim = index['slices'].get(team, (0, 0))
+            if n_jogos is not None:
+                fim = min(fim, inicio + n_jogos)
+            selecao = slice(inicio, fim)
+        else:
+            selecao = index['venue_positions'].get((team, local), np.empty(0, dtype=int))
+            if n_jogos is not None:
+                selecao = selecao[:n_jogos]
+        
+        jogos = (index['gols_marcados'][selecao],
+                 index['gols_sofridos'][selecao],
+                 index['resultado'][selecao])
+        if not novos:
+            return jogos
+        
+        _, gols_marcados, gols_sofridos, _, resultado = zip(*novos)
+        return tuple(np.concatenate([np.asarray(recentes, dtype=base.dtype), base])
+                     for recentes, base in zip((gols_marcados, gols_sofridos, resultado), jogos))
         
     def _load_data_from_api(self, league_code):
         """Carrega dados diretamente da API"""
@@ -32,6 +426,7 @@ class HeuristicasModel:
         try:
             client = FootballDataClient()
             matches_data = client.get_competition_matches(league_code, status='FINISHED', limit=100)
+            count_parse('api')
             
             matches_list = []
             for match in matches_data.get('matches', []):
@@ -62,68 +457,126 @@ class HeuristicasModel:
         """
         Normaliza dados de time_casa/time_visitante para formato time/adversario
         
+        Monta as duas perspectivas de cada partida concatenando arrays (sem
+        apply por linha) e usa categorias para time, adversario, local e
+        resultado. As linhas não são reordenadas: a ordenação por data fica
+        a cargo do índice por time.
+        
         Args:
             df: DataFrame com colunas time_casa, time_visitante, gols_casa, gols_visitante
             
         Returns:
             DataFrame normalizado com colunas time, adversario, gols_marcados, gols_sofridos, resultado, local
         """
-        # Cria duas linhas para cada partida (uma do ponto de vista de cada time)
-        
-        # Jogos do time da casa
-        jogos_casa = df[['data', 'time_casa', 'time_visitante', 'gols_casa', 'gols_visitante']].copy()
-        if 'competicao' in df.columns:
-            jogos_casa['competicao'] = df['competicao']
-        
-        jogos_casa = jogos_casa.rename(columns={
-            'time_casa': 'time',
-            'time_visitante': 'adversario',
-            'gols_casa': 'gols_marcados',
-            'gols_visitante': 'gols_sofridos'
-        })
-        jogos_casa['local'] = 'Casa'
-        
-        # Jogos do time visitante
-        jogos_fora = df[['data', 'time_casa', 'time_visitante', 'gols_casa', 'gols_visitante']].copy()
+        casa = df['time_casa'].values
+        fora = df['time_visitante'].values
+        gols_casa = df['gols_casa'].values
+        gols_fora = df['gols_visitante'].values
+        
+        # Uma linha do ponto de vista de cada time: primeiro os mandantes, depois os visitantes
+        colunas = {
+            'data': np.concatenate([df['data'].values, df['data'].values]),
+            'time': np.concatenate([casa, fora]),
+            'adversario': np.concatenate([fora, casa]),
+            'gols_marcados': np.concatenate([gols_casa, gols_fora]),
+            'gols_sofridos': np.concatenate([gols_fora, gols_casa]),
+        }
         if 'competicao' in df.columns:
-            jogos_fora['competicao'] = df['competicao']
-        
-        jogos_fora = jogos_fora.rename(columns={
-            'time_visitante': 'time',
-            'time_casa': 'adversario',
-            'gols_visitante': 'gols_marcados',
-            'gols_casa': 'gols_sofridos'
-        })
-        jogos_fora['local'] = 'Fora'
-        
-        # Combina
-        df_normalized = pd.concat([jogos_casa, jogos_fora], ignore_index=True)
+            colunas['competicao'] = np.concatenate([df['competicao'].values, df['competicao'].values])
+        colunas['local'] = np.repeat(['Casa', 'Fora'], len(df))
+        colunas['resultado'] = np.select(
+            [colunas['gols_marcados'] > colunas['gols_sofridos'],
+             colunas['gols_marcados'] < colunas['gols_sofridos']],
+            ['Vitoria', 'Derrota'],
+            default='Empate'
+        )
+        
+        return self._categorize(pd.DataFrame(colunas))
+    
+    @staticmethod
+    def _categorize(df):
+        """
+        Converte time, adversario, local e resultado para categorias
         
-        # Adiciona coluna de resultado
-        def calcular_resultado(row):
-            if row['gols_marcados'] > row['gols_sofridos']:
-                return 'Vitoria'
-            elif row['gols_marcados'] < row['gols_sofridos']:
-                return 'Derrota'
-            else:
-                return 'Empate'
+        Args:
+            df: DataFrame normalizado (formato time/adversario)
+            
+        Returns:
+            O mesmo DataFrame com as colunas categóricas
+        """
+        times = pd.CategoricalDtype(sorted(set(df['time'].astype(str)) | set(df['adversario'].astype(str))))
+        df['time'] = df['time'].astype(str).astype(times)
+        df['adversario'] = df['adversario'].astype(str).astype(times)
+        df['local'] = pd.Categorical(df['local'], categories=list(VENUE_CODES))
+        df['resultado'] = pd.Categorical(df['resultado'], categories=list(RESULT_CODES))
+        return df
+    
+    @staticmethod
+    def _normalized_cache_path(csv_file, league_code):
+        """
+        Caminho do cache da tabela normalizada, ao lado do CSV de origem
         
-        df_normalized['resultado'] = df_normalized.apply(calcular_resultado, axis=1)
+        Args:
+            csv_file: CSV de partidas
+            league_code: Código da liga (o mesmo CSV pode ser filtrado por liga)
+            
+        Returns:
+            Caminho do arquivo .pkl
+        """
+        base, _ = os.path.splitext(csv_file)
+        return f"{base}.heuristicas_{league_code}.pkl"
+    
+    @staticmethod
+    def _load_normalized_cache(csv_file, cache_file):
+        """
+        Lê a tabela normalizada do cache se ele for mais novo que o CSV
         
-        return df_normalized.sort_values('data', ascending=False)
+        Returns:
+            DataFrame ou None se o cache não existir, estiver velho ou corrompido
+        """
+        try:
+            if os.path.getmtime(cache_file) < os.path.getmtime(csv_file):
+                return None
+            return pd.read_pickle(cache_file)
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _save_normalized_cache(df, cache_file):
+        """Grava a tabela normalizada (escrita atômica; falhas só geram aviso)"""
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            df.to_pickle(tmp_file)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Nao foi possivel salvar o cache de heuristicas: {e}")
     
-    def load_data(self, league_code=None):
+    def load_data(self, league_code=None, df=None):
         """
         Carrega dados de partidas
         
         Args:
             league_code: Código da liga (ex: 'PL', 'BSA'). Se None, carrega Premier League
+            df: Partidas já carregadas (ex: por data_loader.load_match_data), no
+                formato time_casa/time_visitante ou já normalizado. Se informado,
+                nenhum arquivo ou API é lido.
         
         Returns:
             self (para encadeamento de métodos)
         """
         from config import LEAGUES, PREMIER_LEAGUE_CODE
         
+        if df is not None:
+            normalized_cols = ['time', 'adversario', 'local', 'gols_marcados', 'gols_sofridos', 'resultado']
+            if all(col in df.columns for col in normalized_cols):
+                self.df = self._categorize(df.reset_index(drop=True))
+            else:
+                self.df = self._normalize_data(df)
+            self.teams = sorted(set(self.df['time'].astype(str)))
+            self._build_index()
+            logger.info(f"Dados recebidos: {len(df)} partidas, {len(self.df)} linhas processadas, {len(self.teams)} times")
+            return self
+        
         if league_code is None:
             league_code = PREMIER_LEAGUE_CODE
         
@@ -141,42 +594,310 @@ class HeuristicasModel:
         
         if not csv_files:
             # Sem arquivos locais, tenta buscar da API
-            print(f"Nenhum arquivo local encontrado. Buscando dados da API...")
+            logger.info("Nenhum arquivo local encontrado. Buscando dados da API...")
             df_raw = self._load_data_from_api(league_code)
             self.df = self._normalize_data(df_raw)
-            self.teams = sorted(set(self.df['time'].unique()))
-            print(f"Dados carregados: {len(df_raw)} partidas originais, {len(self.df)} linhas processadas, {len(self.teams)} times")
+            self.teams = sorted(set(self.df['time'].astype(str)))
+            self._build_index()
+            logger.info(f"Dados carregados: {len(df_raw)} partidas originais, {len(self.df)} linhas processadas, {len(self.teams)} times")
             return self
         
         csv_file = max(csv_files, key=os.path.getctime)
-        print(f"Carregando dados de: {csv_file}")
-        
-        df_raw = pd.read_csv(csv_file)
-        df_raw['data'] = pd.to_datetime(df_raw['data'])
-        
-        # Filtra pela liga específica
-        league_full_name = [info['name'] for name, info in LEAGUES.items() if info['code'] == league_code][0]
-        if 'competicao' in df_raw.columns:
-            # Tenta filtrar pelo nome completo da liga
-            df_raw = df_raw[df_raw['competicao'].str.contains(league_full_name.split()[0], na=False, case=False)]
-        
-        # Verifica se os dados já estão normalizados
-        required_normalized_cols = ['time', 'adversario', 'local', 'gols_marcados', 'gols_sofridos', 'resultado']
-        if all(col in df_raw.columns for col in required_normalized_cols):
-            # Dados já estão normalizados
-            print("Dados já normalizados (formato time/adversario/local)")
-            self.df = df_raw.sort_values('data', ascending=False)
+        cache_file = self._normalized_cache_path(csv_file, league_code)
+        
+        self.df = self._load_normalized_cache(csv_file, cache_file)
+        if self.df is not None:
+            count_parse('heuristicas_cache')
+            logger.info(f"Carregando dados normalizados do cache: {cache_file}")
         else:
-            # Precisa normalizar
-            print("Normalizando dados (formato time_casa/time_visitante)")
-            self.df = self._normalize_data(df_raw)
+            logger.info(f"Carregando dados de: {csv_file}")
+            
+            df_raw = pd.read_csv(csv_file)
+            count_parse('csv')
+            df_raw['data'] = pd.to_datetime(df_raw['data'])
+            
+            # Filtra pela liga específica
+            league_full_name = [info['name'] for name, info in LEAGUES.items() if info['code'] == league_code][0]
+            if 'competicao' in df_raw.columns:
+                # Tenta filtrar pelo nome completo da liga
+                df_raw = df_raw[df_raw['competicao'].str.contains(league_full_name.split()[0], na=False, case=False)]
+            
+            # Verifica se os dados já estão normalizados
+            required_normalized_cols = ['time', 'adversario', 'local', 'gols_marcados', 'gols_sofridos', 'resultado']
+            if all(col in df_raw.columns for col in required_normalized_cols):
+                # Dados já estão normalizados
+                logger.info("Dados já normalizados (formato time/adversario/local)")
+                self.df = self._categorize(df_raw.reset_index(drop=True))
+            else:
+                # Precisa normalizar
+                logger.info("Normalizando dados (formato time_casa/time_visitante)")
+                self.df = self._normalize_data(df_raw)
+            
+            self._save_normalized_cache(self.df, cache_file)
         
-        self.teams = sorted(set(self.df['time'].unique()))
+        self.teams = sorted(set(self.df['time'].astype(str)))
+        self._build_index()
         
-        print(f"Dados carregados: {len(self.df)} linhas processadas, {len(self.teams)} times")
+        logger.info(f"Dados carregados: {len(self.df)} linhas processadas, {len(self.teams)} times")
         
         return self
     
+    def update(self, new_matches):
+        """
+        Acrescenta partidas recém-terminadas sem recarregar o CSV
+        
+        Cada partida é anexada aos jogos dos dois times, aos acumulados do
+        confronto direto e às linhas dos dois times nas tabelas de features
+        já calculadas: as janelas de forma e casa/fora são relidas só para
+        esses times e as sequências avançam a partir dos contadores da
+        tabela, então o custo por partida não depende do tamanho do
+        histórico. As linhas novas entram em self.df quando ele for lido.
+        
+        Partidas mais antigas que o último jogo conhecido de um dos times não
+        podem ir para o início das janelas; nesse caso o índice é reconstruído.
+        
+        Args:
+            new_matches: DataFrame (ou lista de dicts) com time_casa,
+                         time_visitante, gols_casa, gols_visitante e data
+        
+        Returns:
+            self (para encadeamento de métodos)
+        """
+        novas = pd.DataFrame(new_matches)
+        if novas.empty:
+            return self
+        self.version += 1
+        novas['data'] = pd.to_datetime(novas['data'])
+        novas = novas.sort_values('data', kind='stable').reset_index(drop=True)
+        
+        if self._df is None:
+            self.df = self._normalize_data(novas)
+            self.teams = sorted(set(self.df['time'].astype(str)))
+            self._build_index()
+            return self
+        
+        index = self._ensure_index()
+        casa = novas['time_casa'].astype(str).values
+        fora = novas['time_visitante'].astype(str).values
+        gols_casa = novas['gols_casa'].values
+        gols_fora = novas['gols_visitante'].values
+        datas = novas['data'].values.astype('datetime64[ns]')
+        
+        # Normalizadas só quando self.df for lido (mesma ordem de linhas de _normalize_data)
+        self._pending_frames.append(novas)
+        self.teams = sorted(set(self.teams or []) | set(casa) | set(fora))
+        
+        # Partida mais antiga que o último jogo conhecido: reconstrói o índice
+        for team in set(casa) | set(fora):
+            if index['appended'].get(team):
+                ultima = index['appended'][team][-1][0]
+            else:
+                inicio, fim = index['slices'].get(team, (0, 0))
+                ultima = index['data'][inicio] if fim > inicio else None
+            if ultima is not None and datas[(casa == team) | (fora == team)].min() < ultima:
+                self._build_index()
+                return self
+        
+        n_partidas = len(novas)
+        jogos_novos = {}
+        for i in range(n_partidas):
+            codigo = int(np.sign(gols_casa[i] - gols_fora[i]))
+            for team, marcados, sofridos, local, resultado in (
+                    (casa[i], gols_casa[i], gols_fora[i], VENUE_CODES['Casa'], codigo),
+                    (fora[i], gols_fora[i], gols_casa[i], VENUE_CODES['Fora'], -codigo)):
+                index['appended'].setdefault(team, []).append((datas[i], marcados, sofridos, local, resultado))
+                jogos_novos.setdefault(team, []).append(resultado)
+            # _normalize_data põe as linhas dos mandantes primeiro
+            append_to_pair_index(index['pairs'], casa[i], fora[i], gols_casa[i], gols_fora[i],
+                                 index['n_rows'] + i)
+        index['n_rows'] += 2 * n_partidas
+        
+        for (n_jogos_forma, n_jogos_local), tabela in self._feature_tables.items():
+            for team, resultados in jogos_novos.items():
+                self._update_feature_row(tabela, team, resultados, n_jogos_forma, n_jogos_local)
+        
+        return self
+    
+    def _update_feature_row(self, tabela, team, novos_resultados, n_jogos_forma, n_jogos_local):
+        """
+        Atualiza no lugar a linha de um time na tabela de features
+        
+        Args:
+            tabela: Tabela de build_feature_table
+            team: Nome do time
+            novos_resultados: Códigos de resultado dos jogos novos, do mais antigo ao mais recente
+            n_jogos_forma: Jogos recentes para forma e tendência de gols
+            n_jogos_local: Jogos recentes em casa/fora
+        """
+        valores = {'casa_jogos': 0, 'fora_jogos': 0}
+        blocos = (('forma_', self.forma_recente(team, n_jogos_forma)),
+                  ('gols_', self.tendencia_gols(team, n_jogos_forma)),
+                  ('casa_', self.performance_casa_fora(team, 'Casa', n_jogos_local)),
+                  ('fora_', self.performance_casa_fora(team, 'Fora', n_jogos_local)))
+        for prefixo, bloco in blocos:
+            if bloco is not None:
+                valores.update({prefixo + chave: valor for chave, valor in bloco.items()
+                                if prefixo + chave in tabela.columns})
+        
+        # Sequências: avança os contadores da tabela jogo a jogo
+        tipo, tamanho, max_vitorias, sem_vencer = None, 0, 0, 0
+        if team in tabela.index:
+            tipo = RESULT_CODES[tabela.at[team, 'seq_sequencia_tipo']]
+            tamanho = int(tabela.at[team, 'seq_sequencia_tamanho'])
+            max_vitorias = int(tabela.at[team, 'seq_max_vitorias_consecutivas'])
+            sem_vencer = int(tabela.at[team, 'seq_jogos_sem_vencer'])
+        for codigo in novos_resultados:
+            tamanho = tamanho + 1 if codigo == tipo else 1
+            tipo = codigo
+            sem_vencer = 0 if codigo == 1 else sem_vencer + 1
+            if codigo == 1:
+                max_vitorias = max(max_vitorias, tamanho)
+        
+        tipo_seq = RESULT_NAMES[tipo]
+        valores.update({
+            'seq_sequencia_tipo': tipo_seq,
+            'seq_sequencia_tamanho': tamanho,
+            'seq_max_vitorias_consecutivas': max_vitorias,
+            'seq_jogos_sem_vencer': sem_vencer,
+            'seq_sequencia_desc': f"{tamanho} {tipo_seq}(s) consecutiva(s)",
+            'seq_invicto': sem_vencer == 0 or tipo_seq != 'Derrota',
+        })
+        
+        if team in tabela.index:
+            for coluna, valor in valores.items():
+                tabela.at[team, coluna] = valor
+        else:
+            tabela.loc[team] = pd.Series(valores)
+            tabela.sort_index(inplace=True)
+    
+    def fit(self, df, time_decay=False, warm_start=False):
+        """
+        Monta o estado das heurísticas a partir de um histórico de partidas
+        
+        Mesma interface dos modelos de Poisson, para uso no ModelValidator.
+        
+        Args:
+            df: DataFrame com time_casa, time_visitante, gols_casa, gols_visitante e data
+            time_decay: Ignorado (as heurísticas usam janelas de jogos, sem decaimento)
+            warm_start: Se True e df for o histórico do fit anterior acrescido de
+                        partidas posteriores (janelas crescentes da validação),
+                        só as partidas novas são aplicadas com update()
+        
+        Returns:
+            self
+        """
+        anterior = self._fit_state
+        if (warm_start and anterior is not None and self._df is not None and len(df) >= anterior[0]
+                and pd.Timestamp(df['data'].iloc[anterior[0] - 1]) == anterior[1]):
+            self.update(df.iloc[anterior[0]:])
+        else:
+            self.load_data(df=df)
+        
+        self._fit_state = (len(df), pd.Timestamp(df['data'].iloc[-1])) if len(df) else None
+        return self
+    
+    def replay(self, matches, n_jogos_forma=5):
+        """
+        Repete partidas em ordem cronológica, prevendo cada uma antes de aplicá-la
+        
+        Partidas do mesmo dia são previstas juntas (predict_many) com o estado
+        anterior a todas elas e depois entram no estado com update(). O estado
+        parte do histórico já carregado (ou de nenhum), então um backtest
+        walk-forward das heurísticas é uma única passada pelas partidas.
+        
+        Args:
+            matches: DataFrame com time_casa, time_visitante, gols_casa,
+                     gols_visitante e data (posteriores ao histórico carregado)
+            n_jogos_forma: Número de jogos para forma recente
+        
+        Returns:
+            Dict de arrays de predict_many, na ordem das linhas de matches
+        """
+        matches = pd.DataFrame(matches)
+        if self._df is None:
+            self.load_data(df=matches.iloc[:0])
+        
+        datas = pd.to_datetime(matches['data']).values
+        ordem = np.argsort(datas, kind='stable')
+        datas = datas[ordem]
+        limites = np.flatnonzero(np.r_[True, datas[1:] != datas[:-1], True])
+        
+        lotes = []
+        for inicio, fim in zip(limites[:-1], limites[1:]):
+            lote = matches.iloc[ordem[inicio:fim]]
+            lotes.append(self.predict_many(lote, n_jogos_forma))
+            self.update(lote)
+        
+        predicoes = {}
+        for chave in (lotes[0] if lotes else self.predict_many([], n_jogos_forma)):
+            valores = np.concatenate([lote[chave] for lote in lotes]) if lotes else np.empty(0)
+            predicoes[chave] = np.empty_like(valores)
+            predicoes[chave][ordem] = valores
+        
+        return predicoes
+    
+    def calibrate(self, matches, n_matches=None, n_jogos_forma=5):
+        """
+        Ajusta o mapeamento das features heurísticas para probabilidades
+        
+        As últimas n_matches partidas de matches são repetidas com replay() num
+        modelo separado (cada uma prevista só com os jogos anteriores) e, sobre
+        essas features sem vazamento, são ajustadas regressões logísticas:
+        multinomial no 1X2 (diferença de pontos e gols esperados), binárias no
+        Over 2.5 (gols esperados) e no BTTS (frequência média de BTTS). Os
+        coeficientes ficam em self.calibration e passam a ser usados por
+        predict_many no lugar das escalas fixas.
+        
+        Args:
+            matches: DataFrame com time_casa, time_visitante, gols_casa,
+                     gols_visitante e data (histórico completo)
+            n_matches: Partidas usadas no ajuste (None = as CALIBRATION_MATCHES
+                       mais recentes, no máximo metade do histórico)
+            n_jogos_forma: Número de jogos para forma recente
+        
+        Returns:
+            self (sem alteração se houver menos de CALIBRATION_MIN_MATCHES partidas)
+        """
+        matches = pd.DataFrame(matches).sort_values('data', kind='stable').reset_index(drop=True)
+        if n_matches is None:
+            n_matches = min(CALIBRATION_MATCHES, len(matches) // 2)
+        n_matches = min(n_matches, len(matches))
+        if n_matches < CALIBRATION_MIN_MATCHES:
+            log_event(logger, 'heuristicas.calibrate.skipped', n_matches=n_matches)
+            return self
+        
+        alvo = matches.iloc[len(matches) - n_matches:]
+        features = HeuristicasModel().fit(matches.iloc[:len(matches) - n_matches]).replay(alvo, n_jogos_forma)
+        
+        gols_casa = alvo['gols_casa'].to_numpy()
+        gols_fora = alvo['gols_visitante'].to_numpy()
+        resultados = {
+            # Classes: 1X2 (0 casa, 1 empate, 2 fora); binários (0 sim, 1 não)
+            '1x2': np.where(gols_casa > gols_fora, 0, np.where(gols_casa == gols_fora, 1, 2)),
+            'over_2_5': np.where(gols_casa + gols_fora > 2.5, 0, 1),
+            'btts': np.where((gols_casa > 0) & (gols_fora > 0), 0, 1),
+        }
+        
+        means = {nome: float(np.nanmean(features[nome])) if np.isfinite(features[nome]).any() else 0.0
+                 for nomes in CALIBRATION_FEATURES.values() for nome in nomes}
+        calibration = {'n_matches': int(n_matches), 'feature_means': means, 'coefs': {}}
+        for mercado, nomes in CALIBRATION_FEATURES.items():
+            X = self._calibration_design(features, nomes, means)
+            n_classes = 3 if mercado == '1x2' else 2
+            calibration['coefs'][mercado] = fit_multinomial_logit(X, resultados[mercado], n_classes)
+        
+        self.calibration = calibration
+        self.version += 1
+        log_event(logger, 'heuristicas.calibrate', n_matches=n_matches)
+        return self
+    
+    @staticmethod
+    def _calibration_design(features, nomes, means):
+        """Matriz [1, features...] da calibração; NaN (time sem jogos) vira a média do ajuste"""
+        colunas = [np.where(np.isnan(np.asarray(features[nome], dtype=float)), means[nome],
+                            np.asarray(features[nome], dtype=float)) for nome in nomes]
+        return np.column_stack([np.ones(len(colunas[0]))] + colunas)
+    
     def forma_recente(self, team, n_jogos=5):
         """
         Calcula a forma recente de um time
@@ -188,37 +909,31 @@ class HeuristicasModel:
         Returns:
             Dict com estatísticas da forma recente
         """
-        jogos = self.df[self.df['time'] == team].sort_values('data', ascending=False).head(n_jogos)
+        gols_marcados, gols_sofridos, resultado = self._team_games(team, n_jogos)
+        jogos = len(resultado)
         
-        if len(jogos) == 0:
+        if jogos == 0:
             return None
         
-        vitorias = len(jogos[jogos['resultado'] == 'Vitoria'])
-        empates = len(jogos[jogos['resultado'] == 'Empate'])
-        derrotas = len(jogos[jogos['resultado'] == 'Derrota'])
+        vitorias = int(np.count_nonzero(resultado == 1))
+        empates = int(np.count_nonzero(resultado == 0))
+        derrotas = int(np.count_nonzero(resultado == -1))
         
         pontos = vitorias * 3 + empates
-        pontos_max = len(jogos) * 3
+        pontos_max = jogos * 3
         aproveitamento = (pontos / pontos_max * 100) if pontos_max > 0 else 0
         
-        gols_marcados = jogos['gols_marcados'].sum()
-        gols_sofridos = jogos['gols_sofridos'].sum()
-        media_gols_marcados = jogos['gols_marcados'].mean()
-        media_gols_sofridos = jogos['gols_sofridos'].mean()
+        media_gols_marcados = gols_marcados.mean()
+        media_gols_sofridos = gols_sofridos.mean()
+        gols_marcados = gols_marcados.sum()
+        gols_sofridos = gols_sofridos.sum()
         
         # Sequência atual
-        sequencia = []
-        for _, jogo in jogos.iterrows():
-            if jogo['resultado'] == 'Vitoria':
-                sequencia.append('V')
-            elif jogo['resultado'] == 'Empate':
-                sequencia.append('E')
-            else:
-                sequencia.append('D')
+        sequencia = [RESULT_LETTERS[codigo] for codigo in resultado.tolist()]
         
         return {
             'time': team,
-            'jogos': len(jogos),
+            'jogos': jogos,
             'vitorias': vitorias,
             'empates': empates,
             'derrotas': derrotas,
@@ -233,6 +948,18 @@ class HeuristicasModel:
             'invicto': 'D' not in sequencia
         }
     
+    def pair_index(self):
+        """
+        Índice de confrontos diretos das partidas do modelo (ver build_pair_index)
+        
+        Montado junto com o índice por time e reaproveitado entre chamadas; as
+        posições em rows são linhas de self.df (a do mandante de cada partida).
+        
+        Returns:
+            Dict no formato de build_pair_index
+        """
+        return self._ensure_index()['pairs']
+    
     def confronto_direto(self, team_a, team_b, n_jogos=5):
         """
         Analisa o histórico de confrontos diretos entre dois times
@@ -245,51 +972,26 @@ class HeuristicasModel:
         Returns:
             Dict com estatísticas do confronto direto
         """
-        # Jogos onde team_a enfrentou team_b
-        confrontos = self.df[
-            ((self.df['time'] == team_a) & (self.df['adversario'] == team_b)) |
-            ((self.df['time'] == team_b) & (self.df['adversario'] == team_a))
-        ].sort_values('data', ascending=False).head(n_jogos)
+        confronto = head_to_head(self.pair_index(), team_a, team_b, n_jogos)
         
-        if len(confrontos) == 0:
+        if confronto is None:
             return None
         
-        # Resultados do ponto de vista do team_a
-        vitorias_a = 0
-        empates = 0
-        vitorias_b = 0
-        gols_a = 0
-        gols_b = 0
-        
-        for _, jogo in confrontos.iterrows():
-            if jogo['time'] == team_a:
-                gols_a += jogo['gols_marcados']
-                gols_b += jogo['gols_sofridos']
-                if jogo['resultado'] == 'Vitoria':
-                    vitorias_a += 1
-                elif jogo['resultado'] == 'Empate':
-                    empates += 1
-                else:
-                    vitorias_b += 1
-            else:  # time == team_b
-                gols_b += jogo['gols_marcados']
-                gols_a += jogo['gols_sofridos']
-                if jogo['resultado'] == 'Vitoria':
-                    vitorias_b += 1
-                elif jogo['resultado'] == 'Empate':
-                    empates += 1
-                else:
-                    vitorias_a += 1
+        confrontos = confronto['confrontos']
+        vitorias_a = confronto['vitorias_a']
+        vitorias_b = confronto['vitorias_b']
+        gols_a = confronto['gols_a']
+        gols_b = confronto['gols_b']
         
         return {
-            'confrontos': len(confrontos),
+            'confrontos': confrontos,
             'vitorias_a': vitorias_a,
-            'empates': empates,
+            'empates': confronto['empates'],
             'vitorias_b': vitorias_b,
             'gols_a': gols_a,
             'gols_b': gols_b,
-            'media_gols_a': gols_a / len(confrontos),
-            'media_gols_b': gols_b / len(confrontos),
+            'media_gols_a': gols_a / confrontos,
+            'media_gols_b': gols_b / confrontos,
             'favorito': team_a if vitorias_a > vitorias_b else (team_b if vitorias_b > vitorias_a else 'Equilibrado')
         }
     
@@ -305,30 +1007,29 @@ class HeuristicasModel:
         Returns:
             Dict com estatísticas de performance
         """
-        jogos = self.df[
-            (self.df['time'] == team) & (self.df['local'] == local)
-        ].sort_values('data', ascending=False).head(n_jogos)
+        gols_marcados, gols_sofridos, resultado = self._team_games(team, n_jogos, local=local)
+        jogos = len(resultado)
         
-        if len(jogos) == 0:
+        if jogos == 0:
             return None
         
-        vitorias = len(jogos[jogos['resultado'] == 'Vitoria'])
-        empates = len(jogos[jogos['resultado'] == 'Empate'])
-        derrotas = len(jogos[jogos['resultado'] == 'Derrota'])
+        vitorias = int(np.count_nonzero(resultado == 1))
+        empates = int(np.count_nonzero(resultado == 0))
+        derrotas = int(np.count_nonzero(resultado == -1))
         
         pontos = vitorias * 3 + empates
-        aproveitamento = (pontos / (len(jogos) * 3) * 100)
+        aproveitamento = (pontos / (jogos * 3) * 100)
         
         return {
             'time': team,
             'local': local,
-            'jogos': len(jogos),
+            'jogos': jogos,
             'vitorias': vitorias,
             'empates': empates,
             'derrotas': derrotas,
             'aproveitamento': aproveitamento,
-            'media_gols_marcados': jogos['gols_marcados'].mean(),
-            'media_gols_sofridos': jogos['gols_sofridos'].mean()
+            'media_gols_marcados': gols_marcados.mean(),
+            'media_gols_sofridos': gols_sofridos.mean()
         }
     
     def tendencia_gols(self, team, n_jogos=5):
@@ -342,24 +1043,25 @@ class HeuristicasModel:
         Returns:
             Dict com tendências de gols
         """
-        jogos = self.df[self.df['time'] == team].sort_values('data', ascending=False).head(n_jogos)
+        gols_marcados, gols_sofridos, _ = self._team_games(team, n_jogos)
+        jogos = len(gols_marcados)
         
-        if len(jogos) == 0:
+        if jogos == 0:
             return None
         
-        total_gols = jogos['gols_marcados'] + jogos['gols_sofridos']
+        total_gols = gols_marcados + gols_sofridos
         
-        over_2_5 = len(total_gols[total_gols > 2.5])
-        over_1_5 = len(total_gols[total_gols > 1.5])
-        btts = len(jogos[(jogos['gols_marcados'] > 0) & (jogos['gols_sofridos'] > 0)])
+        over_2_5 = int(np.count_nonzero(total_gols > 2.5))
+        over_1_5 = int(np.count_nonzero(total_gols > 1.5))
+        btts = int(np.count_nonzero((gols_marcados > 0) & (gols_sofridos > 0)))
         
         return {
             'time': team,
-            'jogos': len(jogos),
+            'jogos': jogos,
             'media_total_gols': total_gols.mean(),
-            'over_2.5_freq': over_2_5 / len(jogos) * 100,
-            'over_1.5_freq': over_1_5 / len(jogos) * 100,
-            'btts_freq': btts / len(jogos) * 100,
+            'over_2.5_freq': over_2_5 / jogos * 100,
+            'over_1.5_freq': over_1_5 / jogos * 100,
+            'btts_freq': btts / jogos * 100,
             'maior_gols': int(total_gols.max()),
             'menor_gols': int(total_gols.min())
         }
@@ -374,55 +1076,314 @@ class HeuristicasModel:
         Returns:
             Dict com informações sobre sequências
         """
-        jogos = self.df[self.df['time'] == team].sort_values('data', ascending=False)
+        _, _, resultado = self._team_games(team)
         
-        if len(jogos) == 0:
+        if len(resultado) == 0:
             return None
         
-        # Sequência atual
-        sequencia_atual = []
-        tipo_seq = None
-        
-        for _, jogo in jogos.iterrows():
-            resultado = jogo['resultado']
-            
-            if tipo_seq is None:
-                tipo_seq = resultado
-                sequencia_atual.append(resultado)
-            elif resultado == tipo_seq:
-                sequencia_atual.append(resultado)
-            else:
-                break
-        
-        # Maior sequência de vitórias
-        max_vitorias = 0
-        atual_vitorias = 0
-        
-        for _, jogo in jogos.iterrows():
-            if jogo['resultado'] == 'Vitoria':
-                atual_vitorias += 1
-                max_vitorias = max(max_vitorias, atual_vitorias)
-            else:
-                atual_vitorias = 0
-        
-        # Jogos sem vencer
-        jogos_sem_vencer = 0
-        for _, jogo in jogos.iterrows():
-            if jogo['resultado'] != 'Vitoria':
-                jogos_sem_vencer += 1
-            else:
-                break
+        tipo_seq = RESULT_NAMES[int(resultado[0])]
+        tamanho_atual, max_vitorias, jogos_sem_vencer = (
+            int(valor[0]) for valor in streak_stats(resultado, [0], [len(resultado)]))
         
         return {
             'time': team,
             'sequencia_tipo': tipo_seq,
-            'sequencia_tamanho': len(sequencia_atual),
-            'sequencia_desc': f"{len(sequencia_atual)} {tipo_seq}(s) consecutiva(s)",
+            'sequencia_tamanho': tamanho_atual,
+            'sequencia_desc': f"{tamanho_atual} {tipo_seq}(s) consecutiva(s)",
             'max_vitorias_consecutivas': max_vitorias,
             'jogos_sem_vencer': jogos_sem_vencer,
             'invicto': jogos_sem_vencer == 0 or tipo_seq != 'Derrota'
         }
     
+    def build_feature_table(self, n_jogos_forma=5, n_jogos_local=10):
+        """
+        Calcula forma, sequências, casa/fora e tendência de gols de todos os times
+        
+        Uma única passada agrupada sobre o índice por time (cumcount, cumsum e
+        agregações por grupo) substitui as chamadas de forma_recente,
+        performance_casa_fora, tendencia_gols e sequencias time a time.
+        
+        Args:
+            n_jogos_forma: Jogos recentes para forma e tendência de gols
+            n_jogos_local: Jogos recentes em casa/fora para a performance por local
+            
+        Returns:
+            DataFrame indexado por time com colunas prefixadas por bloco:
+            forma_*, gols_*, seq_*, casa_* e fora_* (mesmas chaves dos métodos
+            individuais, ex: forma_aproveitamento, gols_btts_freq, casa_jogos)
+        """
+        chave = (n_jogos_forma, n_jogos_local)
+        if chave in self._feature_tables and self._index_source is self._df:
+            return self._feature_tables[chave]
+        
+        index = self._ensure_index()
+        if index['appended']:
+            # Incorpora ao índice os jogos anexados por update()
+            self._build_index()
+            index = self._index
+        jogos = pd.DataFrame({
+            'time': index['time'],
+            'gols_marcados': index['gols_marcados'],
+            'gols_sofridos': index['gols_sofridos'],
+            'local': index['local'],
+            'resultado': index['resultado'],
+        })
+        jogos['total_gols'] = jogos['gols_marcados'] + jogos['gols_sofridos']
+        jogos['vitoria'] = jogos['resultado'] == 1
+        jogos['empate'] = jogos['resultado'] == 0
+        jogos['derrota'] = jogos['resultado'] == -1
+        jogos['btts'] = (jogos['gols_marcados'] > 0) & (jogos['gols_sofridos'] > 0)
+        jogos['over_2_5'] = jogos['total_gols'] > 2.5
+        jogos['over_1_5'] = jogos['total_gols'] > 1.5
+        
+        # Índice já está do jogo mais recente para o mais antigo dentro de cada time
+        por_time = jogos.groupby('time', sort=False)
+        ordem = por_time.cumcount()
+        ordem_local = jogos.groupby(['time', 'local'], sort=False).cumcount()
+        
+        # Forma recente e tendência de gols (últimos n_jogos_forma)
+        recentes = jogos[ordem < n_jogos_forma]
+        forma = recentes.groupby('time', sort=False).agg(
+            forma_jogos=('resultado', 'size'),
+            forma_vitorias=('vitoria', 'sum'),
+            forma_empates=('empate', 'sum'),
+            forma_derrotas=('derrota', 'sum'),
+            forma_gols_marcados=('gols_marcados', 'sum'),
+            forma_gols_sofridos=('gols_sofridos', 'sum'),
+            forma_media_gols_marcados=('gols_marcados', 'mean'),
+            forma_media_gols_sofridos=('gols_sofridos', 'mean'),
+            gols_media_total_gols=('total_gols', 'mean'),
+            gols_over_2_5=('over_2_5', 'sum'),
+            gols_over_1_5=('over_1_5', 'sum'),
+            gols_btts=('btts', 'sum'),
+            gols_maior_gols=('total_gols', 'max'),
+            gols_menor_gols=('total_gols', 'min'),
+        )
+        forma['forma_pontos'] = forma['forma_vitorias'] * 3 + forma['forma_empates']
+        forma['forma_aproveitamento'] = forma['forma_pontos'] / (forma['forma_jogos'] * 3) * 100
+        forma['forma_saldo'] = forma['forma_gols_marcados'] - forma['forma_gols_sofridos']
+        forma['forma_sequencia'] = (recentes['resultado'].map(RESULT_LETTERS)
+                                    .groupby(recentes['time'], sort=False).agg(' '.join))
+        forma['forma_invicto'] = forma['forma_derrotas'] == 0
+        forma['gols_jogos'] = forma['forma_jogos']
+        for coluna, nome in (('gols_over_2_5', 'gols_over_2.5_freq'), ('gols_over_1_5', 'gols_over_1.5_freq'),
+                             ('gols_btts', 'gols_btts_freq')):
+            forma[nome] = forma.pop(coluna) / forma['gols_jogos'] * 100
+        
+        # Sequências: varredura de cada fatia do índice (streak_kernels)
+        nomes = list(index['slices'])
+        inicios, fins = np.array(list(index['slices'].values()), dtype=np.int64).reshape(-1, 2).T
+        tamanho, max_vitorias, sem_vencer = streak_stats(index['resultado'], inicios, fins)
+        seq = pd.DataFrame({
+            'seq_sequencia_tipo': pd.Series(index['resultado'][inicios], index=nomes).map(RESULT_NAMES),
+            'seq_sequencia_tamanho': tamanho,
+            'seq_max_vitorias_consecutivas': max_vitorias,
+            'seq_jogos_sem_vencer': sem_vencer,
+        }, index=nomes)
+        seq['seq_sequencia_desc'] = (seq['seq_sequencia_tamanho'].astype(str) + ' ' +
+                                     seq['seq_sequencia_tipo'] + '(s) consecutiva(s)')
+        seq['seq_invicto'] = (seq['seq_jogos_sem_vencer'] == 0) | (seq['seq_sequencia_tipo'] != 'Derrota')
+        
+        # Performance em casa e fora (últimos n_jogos_local de cada local)
+        por_local = jogos[ordem_local < n_jogos_local].groupby(['time', 'local'], sort=False).agg(
+            jogos=('resultado', 'size'),
+            vitorias=('vitoria', 'sum'),
+            empates=('empate', 'sum'),
+            derrotas=('derrota', 'sum'),
+            media_gols_marcados=('gols_marcados', 'mean'),
+            media_gols_sofridos=('gols_sofridos', 'mean'),
+        )
+        por_local['aproveitamento'] = ((por_local['vitorias'] * 3 + por_local['empates']) /
+                                       (por_local['jogos'] * 3) * 100)
+        blocos_local = []
+        for local_nome, codigo in VENUE_CODES.items():
+            bloco = por_local.xs(codigo, level='local') if len(por_local) else por_local.droplevel('local')
+            blocos_local.append(bloco.add_prefix(f"{local_nome.lower()}_"))
+        
+        tabela = pd.concat([forma, seq] + blocos_local, axis=1).sort_index()
+        for local_nome in VENUE_CODES:
+            coluna = f"{local_nome.lower()}_jogos"
+            tabela[coluna] = tabela[coluna].fillna(0).astype(int)
+        tabela.index.name = 'time'
+        
+        self._feature_tables[chave] = tabela
+        return tabela
+    
+    def team_features(self, team, n_jogos_forma=5, n_jogos_local=10):
+        """
+        Lê as estatísticas de um time da tabela de features
+        
+        Args:
+            team: Nome do time
+            n_jogos_forma: Jogos recentes para forma e tendência de gols
+            n_jogos_local: Jogos recentes em casa/fora
+            
+        Returns:
+            Dict com 'forma', 'tendencia_gols', 'sequencias', 'casa' e 'fora'
+            no mesmo formato dos métodos individuais (None onde não há jogos)
+        """
+        tabela = self.build_feature_table(n_jogos_forma, n_jogos_local)
+        if team not in tabela.index:
+            return {'forma': None, 'tendencia_gols': None, 'sequencias': None, 'casa': None, 'fora': None}
+        
+        linha = tabela.loc[team]
+        
+        def bloco(prefixo, **extra):
+            valores = {coluna[len(prefixo):]: linha[coluna] for coluna in tabela.columns
+                       if coluna.startswith(prefixo)}
+            valores = {chave: valor.item() if isinstance(valor, np.generic) else valor
+                       for chave, valor in valores.items()}
+            return {'time': team, **extra, **valores}
+        
+        features = {
+            'forma': bloco('forma_'),
+            'tendencia_gols': bloco('gols_'),
+            'sequencias': bloco('seq_'),
+        }
+        for local_nome in VENUE_CODES:
+            prefixo = f"{local_nome.lower()}_"
+            features[local_nome.lower()] = bloco(prefixo, local=local_nome) if linha[f"{prefixo}jogos"] > 0 else None
+        
+        return features
+    
+    def predict_many(self, fixtures, n_jogos_forma=5):
+        """
+        Probabilidades heurísticas (1X2, Over 2.5, BTTS) para várias partidas
+        
+        Aplica as mesmas regras de pontuação de predict_match, mas sobre
+        colunas da tabela de features (build_feature_table) e do índice de
+        confrontos diretos, sem ramificações por partida. Com o modelo
+        calibrado (calibrate), as probabilidades vêm das regressões logísticas
+        ajustadas sobre diferença de pontos, gols esperados e frequência de
+        BTTS; sem calibração, o veredito e a confiança são convertidos pelas
+        escalas fixas (*_CONFIDENCE_SCALE).
+        
+        Args:
+            fixtures: Lista de tuplas (time_casa, time_visitante) ou DataFrame
+                      com colunas time_casa e time_visitante
+            n_jogos_forma: Número de jogos para forma recente
+            
+        Returns:
+            Dict de arrays (uma posição por partida): home_team, away_team,
+            pontos_casa, pontos_fora, diferenca_pontos, confianca,
+            gols_esperados, btts_medio, prob_home_win, prob_draw, prob_away_win, prob_over_2_5,
+            prob_under_2_5, prob_btts_yes, prob_btts_no
+        """
+        home_teams, away_teams = parse_fixtures(fixtures)
+        tabela = self.build_feature_table(n_jogos_forma)
+        casa = tabela.reindex(home_teams)
+        fora = tabela.reindex(away_teams)
+        
+        def coluna(linhas, nome):
+            return linhas[nome].to_numpy(dtype=float, na_value=np.nan)
+        
+        n = len(home_teams)
+        pontos_casa = np.zeros(n, dtype=int)
+        pontos_fora = np.zeros(n, dtype=int)
+        
+        # Fator 1: Forma recente (0-3 pontos); NaN (time sem jogos) nunca pontua
+        forma_c = coluna(casa, 'forma_aproveitamento')
+        forma_f = coluna(fora, 'forma_aproveitamento')
+        pontos_casa += np.select([forma_c > forma_f + 15, forma_c > forma_f], [3, 1], 0)
+        pontos_fora += np.select([forma_f > forma_c + 15, forma_f > forma_c], [3, 1], 0)
+        
+        # Fator 2: Performance casa/fora (0-2 pontos)
+        local_c = coluna(casa, 'casa_aproveitamento')
+        local_f = coluna(fora, 'fora_aproveitamento')
+        pontos_casa += np.where(local_c > local_f + 20, 2, 0)
+        pontos_fora += np.where(local_f > local_c, 1, 0)
+        
+        # Fator 3: Confronto direto (0-2 pontos), últimos 5 confrontos
+        pares = self._ensure_index()['pairs']
+        resumos = [head_to_head(pares, home, away, 5) for home, away in zip(home_teams, away_teams)]
+        confrontos = np.array([r['confrontos'] if r else 0 for r in resumos])
+        saldo = np.array([r['vitorias_a'] - r['vitorias_b'] if r else 0 for r in resumos])
+        relevante = confrontos >= 3
+        pontos_casa += np.where(relevante & (saldo > 0), 2, 0)
+        pontos_fora += np.where(relevante & (saldo < 0), 2, 0)
+        
+        # Fator 4: Sequências (0-2 pontos)
+        tipo_c = casa['seq_sequencia_tipo'].map(RESULT_CODES).to_numpy(dtype=float, na_value=np.nan)
+        tipo_f = fora['seq_sequencia_tipo'].map(RESULT_CODES).to_numpy(dtype=float, na_value=np.nan)
+        ambos = ~np.isnan(tipo_c) & ~np.isnan(tipo_f)
+        longa_c = ambos & (coluna(casa, 'seq_sequencia_tamanho') >= 3)
+        longa_f = ambos & (coluna(fora, 'seq_sequencia_tamanho') >= 3)
+        pontos_casa += 2 * (longa_c & (tipo_c == 1)) + (longa_f & (tipo_f == -1))
+        pontos_fora += 2 * (longa_f & (tipo_f == 1)) + (longa_c & (tipo_c == -1))
+        
+        # Fator 5: Média de gols
+        gols_esperados = (coluna(casa, 'forma_media_gols_marcados') + coluna(fora, 'forma_media_gols_sofridos') +
+                          coluna(fora, 'forma_media_gols_marcados') + coluna(casa, 'forma_media_gols_sofridos')) / 2
+        gols_esperados = np.nan_to_num(gols_esperados, nan=0.0)
+        btts_medio = (coluna(casa, 'gols_btts_freq') + coluna(fora, 'gols_btts_freq')) / 2
+        
+        # Veredito (1 = casa, 0 = empate, -1 = fora) e confiança
+        diferenca = pontos_casa - pontos_fora
+        condicoes = [pontos_casa + pontos_fora == 0, diferenca > 2, diferenca < -2, diferenca > 0, diferenca < 0]
+        veredito = np.select(condicoes, [0, 1, -1, 1, -1], 0)
+        confianca = np.select(condicoes, [30, np.minimum(70 + diferenca * 5, 90),
+                                          np.minimum(70 - diferenca * 5, 90), 55, 55], 45)
+        
+        if self.calibration is not None:
+            features = {'diferenca_pontos': diferenca.astype(float), 'gols_esperados': gols_esperados,
+                        'btts_medio': btts_medio}
+            probs = {}
+            for mercado, nomes in CALIBRATION_FEATURES.items():
+                X = self._calibration_design(features, nomes, self.calibration['feature_means'])
+                probs[mercado] = _softmax_last_reference(X @ self.calibration['coefs'][mercado].T)
+            prob_home_win, prob_draw, prob_away_win = probs['1x2'].T
+            prob_over_2_5 = probs['over_2_5'][:, 0]
+            prob_btts_yes = probs['btts'][:, 0]
+        else:
+            (prob_home_win, prob_draw, prob_away_win,
+             prob_over_2_5, prob_btts_yes) = self._uncalibrated_probabilities(
+                veredito, confianca, gols_esperados, btts_medio)
+        
+        return {
+            'home_team': np.array(home_teams, dtype=object),
+            'away_team': np.array(away_teams, dtype=object),
+            'pontos_casa': pontos_casa,
+            'pontos_fora': pontos_fora,
+            'diferenca_pontos': diferenca,
+            'confianca': confianca,
+            'gols_esperados': gols_esperados,
+            'btts_medio': btts_medio,
+            'prob_home_win': prob_home_win,
+            'prob_draw': prob_draw,
+            'prob_away_win': prob_away_win,
+            'prob_over_2_5': prob_over_2_5,
+            'prob_under_2_5': 1 - prob_over_2_5,
+            'prob_btts_yes': prob_btts_yes,
+            'prob_btts_no': 1 - prob_btts_yes,
+        }
+    
+    @staticmethod
+    def _uncalibrated_probabilities(veredito, confianca, gols_esperados, btts_medio):
+        """
+        Probabilidades pelas escalas fixas, usadas enquanto o modelo não foi calibrado
+        
+        Returns:
+            Tupla (prob_home_win, prob_draw, prob_away_win, prob_over_2_5, prob_btts_yes)
+        """
+        c = confianca / 100.0
+        prob_favorito = 0.5 + (c - 0.5) * RESULT_CONFIDENCE_SCALE
+        prob_azarao = (1 - prob_favorito) * 0.4
+        prob_empate_previsto = 0.3 + (c - 0.3) * DRAW_CONFIDENCE_SCALE
+        prob_casa_empate = (1 - prob_empate_previsto) * 0.55
+        
+        prob_home_win = np.select([veredito == 1, veredito == -1], [prob_favorito, prob_azarao], prob_casa_empate)
+        prob_away_win = np.select([veredito == 1, veredito == -1], [prob_azarao, prob_favorito],
+                                  1 - prob_casa_empate - prob_empate_previsto)
+        prob_draw = 1 - prob_home_win - prob_away_win
+        
+        # Over/Under 2.5 (confiança 65%) e BTTS (65% sim, 60% não)
+        prob_over_2_5 = np.select([gols_esperados > 2.7, gols_esperados < 2.2],
+                                  [0.5 + 0.15 * MARKET_CONFIDENCE_SCALE, 0.5 - 0.15 * MARKET_CONFIDENCE_SCALE], 0.5)
+        prob_btts_yes = np.select([btts_medio > 60, btts_medio < 40],
+                                  [0.5 + 0.15 * MARKET_CONFIDENCE_SCALE, 0.5 - 0.10 * MARKET_CONFIDENCE_SCALE], 0.5)
+        
+        return prob_home_win, prob_draw, prob_away_win, prob_over_2_5, prob_btts_yes
+    
     def predict_match(self, home_team, away_team, n_jogos_forma=5):
         """
         Faz predição baseada em heurísticas
@@ -435,28 +1396,24 @@ class HeuristicasModel:
         Returns:
             Dict com análise heurística completa
         """
-        print(f"\nAnalisando: {home_team} vs {away_team}")
-        print("=" * 70)
+        log_event(logger, 'heuristicas.predict_match', home=home_team, away=away_team)
         
-        # 1. Forma recente
-        forma_casa = self.forma_recente(home_team, n_jogos_forma)
-        forma_fora = self.forma_recente(away_team, n_jogos_forma)
+        # 1, 2, 4 e 5: forma, casa/fora, tendência de gols e sequências (tabela de features)
+        features_casa = self.team_features(home_team, n_jogos_forma)
+        features_fora = self.team_features(away_team, n_jogos_forma)
         
-        # 2. Performance específica (casa/fora)
-        perf_casa_casa = self.performance_casa_fora(home_team, 'Casa')
-        perf_fora_fora = self.performance_casa_fora(away_team, 'Fora')
+        forma_casa = features_casa['forma']
+        forma_fora = features_fora['forma']
+        perf_casa_casa = features_casa['casa']
+        perf_fora_fora = features_fora['fora']
+        tend_gols_casa = features_casa['tendencia_gols']
+        tend_gols_fora = features_fora['tendencia_gols']
+        seq_casa = features_casa['sequencias']
+        seq_fora = features_fora['sequencias']
         
         # 3. Confronto direto
         confronto = self.confronto_direto(home_team, away_team)
         
-        # 4. Tendência de gols
-        tend_gols_casa = self.tendencia_gols(home_team, n_jogos_forma)
-        tend_gols_fora = self.tendencia_gols(away_team, n_jogos_forma)
-        
-        # 5. Sequências
-        seq_casa = self.sequencias(home_team)
-        seq_fora = self.sequencias(away_team)
-        
         # Análise heurística (pontuação)
         pontos_casa = 0
         pontos_fora = 0
@@ -0,0 +1,270 @@
+"""
+Ajuste conjunto do Dixon-Coles para várias ligas
+
+Junta as partidas de todas as ligas (data/persistent/*.csv) num único problema:
+cada liga tem sua própria vantagem de casa e seu próprio rho, mas as forças de
+ataque e defesa de cada time são compartilhadas. Times que jogam liga nacional e
+competição europeia (CL) passam a ter uma única estimativa usando todos os jogos.
+
+Parâmetros: [home_adv por liga..., rho por liga..., ataque..., defesa...]
+
+A verossimilhança reaproveita o núcleo vetorizado do DixonColesModel; os
+gradientes são acumulados com np.bincount (cada partida só toca 2 times e 1
+liga), então o custo por avaliação é linear no número de partidas mesmo com
+150+ times.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from dixon_coles import DixonColesModel
+
+
+class JointDixonColesModel(DixonColesModel):
+    """Dixon-Coles com forças compartilhadas e home advantage/rho por liga"""
+
+    def __init__(self, xi=0.0):
+        """
+        Inicializa o modelo conjunto
+
+        Args:
+            xi: Fator de decaimento temporal (0 = sem decaimento)
+        """
+        super().__init__(xi=xi)
+        self.leagues = None
+        self.home_advantages = None
+        self.rhos = None
+
+    def joint_log_likelihood(self, params, home_teams, away_teams, leagues, home_goals, away_goals,
+                             weights=None, terms=None, return_gradient=False):
+        """
+        Log-verossimilhança negativa conjunta (e gradiente analítico)
+
+        Args:
+            params: [home_adv por liga..., rho por liga..., ataque..., defesa...]
+            home_teams: Índices dos times da casa
+            away_teams: Índices dos times visitantes
+            leagues: Índice da liga de cada partida
+            home_goals: Gols marcados pelo time da casa
+            away_goals: Gols marcados pelo time visitante
+            weights: Pesos temporais (opcional)
+            terms: Termos pré-calculados por _precompute_terms (opcional)
+            return_gradient: Se True, retorna também o gradiente
+
+        Returns:
+            Log-verossimilhança negativa (e gradiente, se return_gradient=True)
+        """
+        n_teams = len(self.teams)
+        n_leagues = len(self.leagues)
+
+        home_advantage = params[:n_leagues]
+        rho = params[n_leagues:2 * n_leagues]
+        attack_params = params[2 * n_leagues:2 * n_leagues + n_teams]
+        defense_params = params[2 * n_leagues + n_teams:]
+
+        # Normalização: média de ataque = média de defesa = 0
+        attack_params = attack_params - np.mean(attack_params)
+        defense_params = defense_params - np.mean(defense_params)
+
+        if terms is None:
+            terms = self._precompute_terms(home_goals, away_goals)
+
+        log_lambda_home = home_advantage[leagues] + attack_params[home_teams] - defense_params[away_teams]
+        log_lambda_away = attack_params[away_teams] - defense_params[home_teams]
+
+        if not return_gradient:
+            log_lik = self._match_log_likelihood(log_lambda_home, log_lambda_away, rho[leagues],
+                                                 home_goals, away_goals, terms)
+            if weights is not None:
+                log_lik = weights * log_lik
+            return -log_lik.sum()
+
+        log_lik, d_home, d_away, d_rho = self._match_log_likelihood(
+            log_lambda_home, log_lambda_away, rho[leagues], home_goals, away_goals, terms,
+            return_derivatives=True)
+        if weights is not None:
+            log_lik = weights * log_lik
+            d_home = weights * d_home
+            d_away = weights * d_away
+            d_rho = weights * d_rho
+
+        grad_home_advantage = np.bincount(leagues, weights=d_home, minlength=n_leagues)
+        grad_rho = np.bincount(leagues, weights=d_rho, minlength=n_leagues)
+        grad_attack = (np.bincount(home_teams, weights=d_home, minlength=n_teams) +
+                       np.bincount(away_teams, weights=d_away, minlength=n_teams))
+        grad_defense = -(np.bincount(away_teams, weights=d_home, minlength=n_teams) +
+                         np.bincount(home_teams, weights=d_away, minlength=n_teams))
+
+        # Regra da cadeia pela normalização (x - média(x))
+        grad_attack = grad_attack - grad_attack.mean()
+        grad_defense = grad_defense - grad_defense.mean()
+
+        grad = np.concatenate([grad_home_advantage, grad_rho, grad_attack, grad_defense])
+
+        return -log_lik.sum(), -grad
+
+    def fit(self, df, time_decay=True, league_col='liga'):
+        """
+        Treina o modelo conjunto
+
+        Args:
+            df: DataFrame com ['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data', 'liga']
+                (ex: data_loader.load_all_leagues_data())
+            time_decay: Se True, aplica decaimento temporal
+            league_col: Coluna com o código da liga de cada partida
+
+        Returns:
+            self
+        """
+        df = df.copy()
+        df['data'] = pd.to_datetime(df['data'])
+        df = df.sort_values('data')
+
+        self.teams = sorted(list(set(df['time_casa'].unique()) | set(df['time_visitante'].unique())))
+        self.leagues = sorted(df[league_col].unique())
+        team_to_idx = {team: idx for idx, team in enumerate(self.teams)}
+        league_to_idx = {league: idx for idx, league in enumerate(self.leagues)}
+
+        home_teams = df['time_casa'].map(team_to_idx).values
+        away_teams = df['time_visitante'].map(team_to_idx).values
+        leagues = df[league_col].map(league_to_idx).values
+        home_goals = df['gols_casa'].values.astype(float)
+        away_goals = df['gols_visitante'].values.astype(float)
+
+        weights = None
+        if time_decay and self.xi > 0:
+            max_date = df['data'].max()
+            days_diff = (max_date - df['data']).dt.days
+            weights = np.exp(-self.xi * days_diff / 365.25).values
+
+        n_teams = len(self.teams)
+        n_leagues = len(self.leagues)
+        init_params = np.concatenate([
+            np.full(n_leagues, 0.3),             # home advantage por liga
+            np.zeros(n_leagues),                 # rho por liga
+            np.random.normal(0, 0.1, n_teams),   # attack
+            np.random.normal(0, 0.1, n_teams)    # defense
+        ])
+        bounds = ([(0, 1)] * n_leagues + [(-0.2, 0.2)] * n_leagues +
+                  [(None, None)] * (2 * n_teams))
+
+        print("Treinando modelo Dixon-Coles conjunto...")
+        print(f"- Ligas: {', '.join(self.leagues)}")
+        print(f"- Times: {n_teams}")
+        print(f"- Partidas: {len(df)}")
+        print(f"- Decaimento temporal: {time_decay} (xi={self.xi})")
+
+        result = minimize(
+            self.joint_log_likelihood,
+            init_params,
+            args=(home_teams, away_teams, leagues, home_goals, away_goals,
+                  weights, self._precompute_terms(home_goals, away_goals), True),
+            jac=True,
+            method='L-BFGS-B',
+            bounds=bounds,
+            options={'maxiter': 500}
+        )
+
+        if result.success:
+            print("Otimizacao concluida com sucesso!")
+        else:
+            print(f"AVISO: Otimizacao nao convergiu completamente: {result.message}")
+
+        self.params = result.x
+        self.n_iter = result.nit
+        self.home_advantages = dict(zip(self.leagues, result.x[:n_leagues]))
+        self.rhos = dict(zip(self.leagues, result.x[n_leagues:2 * n_leagues]))
+
+        attack_params = result.x[2 * n_leagues:2 * n_leagues + n_teams]
+        defense_params = result.x[2 * n_leagues + n_teams:]
+        attack_params = attack_params - np.mean(attack_params)
+        defense_params = defense_params - np.mean(defense_params)
+
+        self.attack = {team: attack_params[idx] for team, idx in team_to_idx.items()}
+        self.defense = {team: defense_params[idx] for team, idx in team_to_idx.items()}
+
+        # Padrão para predict_match: primeira liga (use for_league para escolher)
+        self.home_advantage = self.home_advantages[self.leagues[0]]
+        self.rho = self.rhos[self.leagues[0]]
+
+        for league in self.leagues:
+            print(f"- {league}: home advantage {self.home_advantages[league]:.3f} | "
+                  f"rho {self.rhos[league]:.3f}")
+
+        self.version += 1
+        self._fitted = True
+
+        return self
+
+    def for_league(self, league_code):
+        """
+        Retorna um DixonColesModel com as forças compartilhadas e os parâmetros de uma liga
+
+        O modelo retornado funciona em qualquer lugar que espera um
+        DixonColesModel (predict_match, predict_many, EnsembleModel...).
+
+        Args:
+            league_code: Código da liga (ex: 'PL', 'CL')
+
+        Returns:
+            DixonColesModel treinado
+        """
+        if not self._fitted:
+            raise ValueError("Modelo nao treinado! Execute fit() primeiro.")
+        if league_code not in self.home_advantages:
+            raise ValueError(f"Liga nao encontrada no modelo conjunto: {league_code}")
+
+        model = DixonColesModel(xi=self.xi)
+        model.teams = self.teams
+        model.attack = self.attack
+        model.defense = self.defense
+        model.home_advantage = self.home_advantages[league_code]
+        model.rho = self.rhos[league_code]
+        model.params = np.concatenate([
+            [model.home_advantage, model.rho],
+            [self.attack[team] for team in self.teams],
+            [self.defense[team] for team in self.teams]
+        ])
+        model.n_iter = self.n_iter
+        model._fitted = True
+
+        return model
+
+    def _single_league_only(self, method_name):
+        """Erro para métodos herdados que assumem o layout de parâmetros de uma liga só"""
+        return TypeError(
+            f"{method_name} usa o layout de parametros de uma liga so "
+            f"([home_adv, rho, ataque..., defesa...]) e nao vale para o modelo conjunto. "
+            f"Use for_league(liga).{method_name}(...) com as partidas da liga."
+        )
+
+    def fit_uncertainty(self, *args, **kwargs):
+        raise self._single_league_only('fit_uncertainty')
+
+    def predict_intervals(self, *args, **kwargs):
+        raise self._single_league_only('predict_intervals')
+
+    def _training_arrays(self, *args, **kwargs):
+        raise self._single_league_only('_training_arrays')
+
+    def _laplace_draws(self, *args, **kwargs):
+        raise self._single_league_only('_laplace_draws')
+
+    def _bootstrap_draws(self, *args, **kwargs):
+        raise self._single_league_only('_bootstrap_draws')
+
+
+if __name__ == "__main__":
+    from data_loader import load_all_leagues_data
+
+    print("=" * 80)
+    print("DIXON-COLES CONJUNTO - TODAS AS LIGAS")
+    print("=" * 80)
+
+    df = load_all_leagues_data()
+    model = JointDixonColesModel(xi=0.003)
+    model.fit(df, time_decay=True)
+
+    print("\nTop 10 times (forcas compartilhadas):")
+    print(model.get_team_strengths().head(10).to_string(index=False))
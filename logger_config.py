@@ -2,12 +2,19 @@
 Configuração centralizada de logging para o projeto
 
 Uso:
-    from logger_config import setup_logger
+    # Pontos de entrada (app, scripts): configura os handlers uma vez
+    from logger_config import setup_project_logging
+    setup_project_logging()
     
-    logger = setup_logger(__name__)
+    # Módulos de biblioteca: só o logger, sem handlers (importar não cria logs/)
+    import logging
+    from logger_config import log_event
+    
+    logger = logging.getLogger(__name__)
     logger.info("Mensagem informativa")
     logger.warning("Aviso")
     logger.error("Erro")
+    log_event(logger, 'ensemble.predict', home='Arsenal FC', away='Chelsea FC')  # DEBUG
 """
 
 import logging
@@ -76,6 +83,49 @@ def setup_logger(name='analises_esportivas', level=logging.INFO, log_to_console=
     return logger
 
 
+def log_event(logger, event, level=logging.DEBUG, **fields):
+    """
+    Registra um evento estruturado (nome + campos chave=valor)
+    
+    O nível é verificado antes de montar a mensagem: com o nível desligado
+    (ou o logger desabilitado) a chamada não formata nada e não escreve em
+    nenhum handler, então pode ficar em loops de predição.
+    
+    Args:
+        logger: Logger configurado
+        event: Nome do evento (ex: 'ensemble.predict')
+        level: Nível do evento (padrão DEBUG)
+        **fields: Campos do evento; vão na mensagem e em record.fields
+        
+    Returns:
+        True se o evento foi emitido, False se foi descartado pelo nível
+        
+    Exemplo:
+        >>> log_event(logger, 'ensemble.predict', home='Arsenal FC', away='Chelsea FC')
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    
+    campos = ' '.join(f"{chave}={valor}" for chave, valor in fields.items())
+    logger.log(level, f"{event} {campos}".rstrip(), extra={'event': event, 'fields': fields}, stacklevel=2)
+    return True
+
+
+def set_event_logging(enabled, names=('ensemble', 'heuristicas')):
+    """
+    Liga ou desliga por completo os loggers do caminho de predição
+    
+    Desligado, até avisos e erros desses loggers são descartados; use em
+    jobs em lote onde nenhuma saída é desejada.
+    
+    Args:
+        enabled: True para ligar, False para desligar
+        names: Nomes dos loggers afetados
+    """
+    for name in names:
+        logging.getLogger(name).disabled = not enabled
+
+
 def log_function_call(logger):
     """
     Decorator para logar chamadas de função automaticamente
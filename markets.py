@@ -0,0 +1,203 @@
+"""
+Derivação de mercados a partir de matrizes de placares
+
+Recebe uma matriz (G+1, G+1) ou um tensor (n, G+1, G+1) indexado por
+[partida, gols_casa, gols_fora] e calcula, numa passada vetorizada, os mercados
+mais comuns:
+
+- 1X2, dupla chance e empate anula (draw no bet)
+- Over/Under de 0.5 a 5.5 gols (e outras linhas)
+- Handicap asiático (linhas inteiras, meias e quartos)
+- Placar exato
+- Total de gols de cada time
+- Vitória sem sofrer gols (win to nil) e BTTS
+
+Os totais e saldos de gols saem de máscaras das anti-diagonais (i + j = t) e
+diagonais (i - j = d) da matriz, pré-calculadas por tamanho, e as linhas
+são lidas de somas acumuladas dessas distribuições.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+GOAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+TEAM_GOAL_LINES = (0.5, 1.5, 2.5, 3.5)
+HANDICAP_LINES = (-2.5, -2.0, -1.75, -1.5, -1.25, -1.0, -0.75, -0.5, -0.25,
+                  0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5)
+
+
+def line_key(line):
+    """
+    Formata uma linha de gols como sufixo de chave (2.5 -> '2_5', -1.5 -> '-1_5')
+
+    Args:
+        line: Linha de gols/handicap
+
+    Returns:
+        String usada nas chaves do dicionário de mercados
+    """
+    return f"{line:g}".replace('.', '_')
+
+
+@lru_cache(maxsize=8)
+def _diagonal_masks(size):
+    """
+    Máscaras one-hot das anti-diagonais (total de gols) e diagonais (saldo)
+
+    Args:
+        size: Lado da matriz (max_goals + 1)
+
+    Returns:
+        (total_mask, diff_mask): matrizes (size*size, 2*size-1); a coluna t de
+        total_mask marca i + j = t e a coluna d de diff_mask marca i - j = d - (size-1)
+    """
+    home_goals, away_goals = np.indices((size, size))
+    total = (home_goals + away_goals).ravel()
+    diff = (home_goals - away_goals).ravel() + size - 1
+
+    total_mask = np.zeros((size * size, 2 * size - 1))
+    total_mask[np.arange(size * size), total] = 1.0
+    diff_mask = np.zeros((size * size, 2 * size - 1))
+    diff_mask[np.arange(size * size), diff] = 1.0
+
+    return total_mask, diff_mask
+
+
+def _over_under(cdf, lines):
+    """
+    Probabilidades de over/under a partir da CDF de gols (linhas .5)
+
+    Args:
+        cdf: Array (n, k) com P(gols <= k)
+        lines: Linhas de gols (x.5)
+
+    Returns:
+        Dict {linha: (prob_over, prob_under)}
+    """
+    result = {}
+    for line in lines:
+        idx = min(int(np.floor(line)), cdf.shape[1] - 1)
+        under = cdf[:, idx]
+        result[line] = (1 - under, under)
+    return result
+
+
+def _asian_handicap(diff_dist, offset, line):
+    """
+    Handicap asiático do time da casa para uma linha
+
+    Linhas de quarto (ex.: -0.75) dividem a aposta em duas metades nas linhas
+    vizinhas (-0.5 e -1.0); cada resultado é a fração esperada da aposta.
+
+    Args:
+        diff_dist: Array (n, 2G+1) com P(gols_casa - gols_fora = d)
+        offset: Índice da coluna com saldo zero
+        line: Handicap aplicado ao time da casa
+
+    Returns:
+        (win, push, loss) como arrays (n,)
+    """
+    if (line * 4) % 2 == 1:
+        halves = [_asian_handicap(diff_dist, offset, line - 0.25),
+                  _asian_handicap(diff_dist, offset, line + 0.25)]
+        return tuple((a + b) / 2 for a, b in zip(*halves))
+
+    diffs = np.arange(diff_dist.shape[1]) - offset
+    adjusted = diffs + line
+    win = diff_dist[:, adjusted > 0].sum(axis=1)
+    push = diff_dist[:, adjusted == 0].sum(axis=1)
+    loss = diff_dist[:, adjusted < 0].sum(axis=1)
+
+    return win, push, loss
+
+
+def derive_markets(score_matrix, goal_lines=GOAL_LINES, team_goal_lines=TEAM_GOAL_LINES,
+                   handicap_lines=HANDICAP_LINES):
+    """
+    Calcula todos os mercados de uma ou várias matrizes de placares
+
+    Args:
+        score_matrix: Matriz (G+1, G+1) ou tensor (n, G+1, G+1)
+        goal_lines: Linhas de over/under do total de gols
+        team_goal_lines: Linhas de over/under de gols de cada time
+        handicap_lines: Linhas de handicap asiático (perspectiva do time da casa)
+
+    Returns:
+        Dicionário de mercados. As chaves seguem o padrão de predict_match
+        (prob_over_2_5, prob_home_over_1_5, prob_dc_1x, ...); 'asian_handicap'
+        mapeia cada linha para {'win', 'push', 'loss'} e 'correct_score' é a
+        própria matriz. Com uma única matriz os valores são floats; com um
+        tensor, arrays com uma posição por partida.
+    """
+    tensor = np.asarray(score_matrix, dtype=float)
+    single = tensor.ndim == 2
+    if single:
+        tensor = tensor[None]
+
+    n, size, _ = tensor.shape
+    flat = tensor.reshape(n, -1)
+    total_mask, diff_mask = _diagonal_masks(size)
+    offset = size - 1
+
+    # Distribuições do total de gols, do saldo e dos gols de cada time
+    total_dist = flat @ total_mask
+    diff_dist = flat @ diff_mask
+    home_dist = tensor.sum(axis=2)
+    away_dist = tensor.sum(axis=1)
+
+    total_cdf = np.cumsum(total_dist, axis=1)
+    home_cdf = np.cumsum(home_dist, axis=1)
+    away_cdf = np.cumsum(away_dist, axis=1)
+    diff_cdf = np.cumsum(diff_dist, axis=1)
+
+    # 1X2 pelas somas acumuladas do saldo
+    prob_away_win = diff_cdf[:, offset - 1]
+    prob_draw = diff_dist[:, offset]
+    prob_home_win = 1 - diff_cdf[:, offset]
+    decisive = prob_home_win + prob_away_win
+
+    prob_btts_yes = tensor[:, 1:, 1:].sum(axis=(1, 2))
+
+    markets = {
+        'prob_home_win': prob_home_win,
+        'prob_draw': prob_draw,
+        'prob_away_win': prob_away_win,
+        'prob_dc_1x': prob_home_win + prob_draw,
+        'prob_dc_12': decisive,
+        'prob_dc_x2': prob_draw + prob_away_win,
+        'prob_dnb_home': np.divide(prob_home_win, decisive, out=np.full(n, 0.5), where=decisive > 0),
+        'prob_dnb_away': np.divide(prob_away_win, decisive, out=np.full(n, 0.5), where=decisive > 0),
+        'prob_btts_yes': prob_btts_yes,
+        'prob_btts_no': 1 - prob_btts_yes,
+        'prob_home_win_to_nil': tensor[:, 1:, 0].sum(axis=1),
+        'prob_away_win_to_nil': tensor[:, 0, 1:].sum(axis=1),
+        'prob_home_clean_sheet': away_dist[:, 0],
+        'prob_away_clean_sheet': home_dist[:, 0],
+    }
+
+    for line, (over, under) in _over_under(total_cdf, goal_lines).items():
+        markets[f'prob_over_{line_key(line)}'] = over
+        markets[f'prob_under_{line_key(line)}'] = under
+
+    for side, cdf in (('home', home_cdf), ('away', away_cdf)):
+        for line, (over, under) in _over_under(cdf, team_goal_lines).items():
+            markets[f'prob_{side}_over_{line_key(line)}'] = over
+            markets[f'prob_{side}_under_{line_key(line)}'] = under
+
+    asian_handicap = {}
+    for line in handicap_lines:
+        win, push, loss = _asian_handicap(diff_dist, offset, line)
+        asian_handicap[line] = {'win': win, 'push': push, 'loss': loss}
+
+    if single:
+        markets = {key: float(value[0]) for key, value in markets.items()}
+        asian_handicap = {line: {key: float(value[0]) for key, value in outcome.items()}
+                          for line, outcome in asian_handicap.items()}
+        tensor = tensor[0]
+
+    markets['asian_handicap'] = asian_handicap
+    markets['correct_score'] = tensor
+
+    return markets
@@ -0,0 +1,246 @@
+"""
+Armazenamento de modelos treinados em disco
+
+Salva os parâmetros ajustados de DixonColesModel e OffensiveDefensiveModel em
+um .npz compacto (params, ataque, defesa, times e impressão digital)
+acompanhado de um .json com os metadados (times, rho, xi, home advantage e a
+impressão digital dos dados de treino). Um modelo só é recarregado quando a
+impressão digital dos dados atuais bate com a salva nos dois arquivos, então o
+cache nunca serve parâmetros de dados antigos nem mistura um .npz novo com um
+.json antigo.
+
+Estrutura:
+    data/models/{liga}_{modelo}.npz
+    data/models/{liga}_{modelo}.json
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dixon_coles import DixonColesModel
+from offensive_defensive import OffensiveDefensiveModel
+
+
+MODELS_DIR = 'data/models'
+ARTIFACT_VERSION = 2
+
+MODEL_CLASSES = {
+    'dixon_coles': DixonColesModel,
+    'offensive_defensive': OffensiveDefensiveModel,
+}
+
+FINGERPRINT_COLUMNS = ['data', 'time_casa', 'time_visitante', 'gols_casa', 'gols_visitante']
+
+
+def data_fingerprint(df):
+    """
+    Calcula a impressão digital (hash do conteúdo) dos dados de treino
+
+    Independe da ordem das linhas: os dados são ordenados antes do hash.
+
+    Args:
+        df: DataFrame com colunas data, time_casa, time_visitante, gols_casa, gols_visitante
+
+    Returns:
+        String hexadecimal (SHA-256 truncado em 16 caracteres)
+    """
+    canonical = df[FINGERPRINT_COLUMNS].sort_values(FINGERPRINT_COLUMNS).reset_index(drop=True)
+    row_hashes = pd.util.hash_pandas_object(canonical, index=False).values
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def artifact_paths(league_code, model_name, store_dir=MODELS_DIR):
+    """
+    Retorna os caminhos (.npz, .json) do artefato de um modelo
+
+    Args:
+        league_code: Código da liga (ex: 'PL')
+        model_name: 'dixon_coles' ou 'offensive_defensive'
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Tupla (caminho_npz, caminho_json)
+    """
+    base = os.path.join(store_dir, f"{league_code}_{model_name}")
+    return f"{base}.npz", f"{base}.json"
+
+
+def save_model(model, model_name, league_code, fingerprint, time_decay=True, store_dir=MODELS_DIR):
+    """
+    Salva um modelo treinado como .npz + .json
+
+    Cada arquivo é escrito num temporário e movido no final, então um leitor
+    nunca enxerga um arquivo pela metade. Os dois arquivos são trocados um
+    depois do outro (não atomicamente como par); por isso o .npz também guarda
+    times e impressão digital, e load_model recusa um par que não bate.
+
+    Args:
+        model: DixonColesModel ou OffensiveDefensiveModel treinado
+        model_name: 'dixon_coles' ou 'offensive_defensive'
+        league_code: Código da liga
+        fingerprint: Impressão digital dos dados de treino (data_fingerprint)
+        time_decay: Se o modelo foi treinado com decaimento temporal
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Caminho do arquivo .json salvo
+    """
+    if not model._fitted:
+        raise ValueError("Modelo nao treinado! Execute fit() primeiro.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    npz_path, json_path = artifact_paths(league_code, model_name, store_dir)
+
+    rho = getattr(model, 'rho', None)
+    metadata = {
+        'version': ARTIFACT_VERSION,
+        'model_name': model_name,
+        'league_code': league_code,
+        'fingerprint': fingerprint,
+        'time_decay': bool(time_decay),
+        'xi': float(model.xi),
+        'home_advantage': float(model.home_advantage),
+        'rho': float(rho) if rho is not None else None,
+        'teams': list(model.teams),
+        'n_iter': int(model.n_iter) if model.n_iter is not None else None,
+        'saved_at': datetime.now().isoformat(),
+    }
+
+    # np.savez acrescenta .npz ao nome se faltar, por isso o temporário termina em .npz
+    tmp_npz = f"{npz_path[:-4]}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmp_npz,
+        params=np.asarray(model.params, dtype=float),
+        attack=np.array([model.attack[team] for team in model.teams]),
+        defense=np.array([model.defense[team] for team in model.teams]),
+        teams=np.array(list(model.teams), dtype=str),
+        fingerprint=np.array(fingerprint if fingerprint is not None else '', dtype=str)
+    )
+    os.replace(tmp_npz, npz_path)
+
+    tmp_json = f"{json_path}.{os.getpid()}.tmp"
+    with open(tmp_json, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_json, json_path)
+
+    return json_path
+
+
+def load_metadata(league_code, model_name, store_dir=MODELS_DIR):
+    """
+    Lê os metadados de um artefato salvo
+
+    Returns:
+        Dicionário de metadados ou None se não existir / estiver corrompido
+    """
+    _, json_path = artifact_paths(league_code, model_name, store_dir)
+    if not os.path.exists(json_path):
+        return None
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_model(model_name, league_code, fingerprint=None, xi=None, time_decay=True, store_dir=MODELS_DIR):
+    """
+    Recarrega um modelo salvo se ele corresponder aos dados atuais
+
+    Args:
+        model_name: 'dixon_coles' ou 'offensive_defensive'
+        league_code: Código da liga
+        fingerprint: Impressão digital esperada (None = aceita qualquer uma)
+        xi: Fator de decaimento esperado (None = aceita qualquer um)
+        time_decay: Se o modelo esperado usa decaimento temporal
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Modelo pronto para predição ou None se não houver artefato compatível
+    """
+    metadata = load_metadata(league_code, model_name, store_dir)
+    if metadata is None or metadata.get('version') != ARTIFACT_VERSION:
+        return None
+
+    if fingerprint is not None and metadata['fingerprint'] != fingerprint:
+        return None
+    if xi is not None and not np.isclose(metadata['xi'], xi):
+        return None
+    if metadata['time_decay'] != bool(time_decay):
+        return None
+
+    npz_path, _ = artifact_paths(league_code, model_name, store_dir)
+    try:
+        with np.load(npz_path) as arrays:
+            params = arrays['params']
+            attack = arrays['attack']
+            defense = arrays['defense']
+            npz_teams = arrays['teams'].tolist()
+            npz_fingerprint = str(arrays['fingerprint'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+    # .npz e .json de gravações diferentes (troca concorrente): descarta
+    if npz_fingerprint != (metadata['fingerprint'] or '') or npz_teams != metadata['teams']:
+        return None
+    if not (len(attack) == len(defense) == len(metadata['teams'])):
+        return None
+
+    teams = metadata['teams']
+    model = MODEL_CLASSES[model_name](xi=metadata['xi'])
+    model.params = params
+    model.teams = teams
+    model.home_advantage = metadata['home_advantage']
+    if metadata['rho'] is not None:
+        model.rho = metadata['rho']
+    model.attack = dict(zip(teams, attack.tolist()))
+    model.defense = dict(zip(teams, defense.tolist()))
+    model.n_iter = metadata['n_iter']
+    model._fitted = True
+
+    return model
+
+
+def fit_or_load(model_name, df, league_code, fingerprint=None, xi=0.003, time_decay=True,
+                use_cache=True, store_dir=MODELS_DIR):
+    """
+    Recarrega o modelo do cache se os dados não mudaram; senão treina e salva
+
+    Args:
+        model_name: 'dixon_coles' ou 'offensive_defensive'
+        df: DataFrame de treino
+        league_code: Código da liga
+        fingerprint: Impressão digital de df (calculada se None)
+        xi: Fator de decaimento temporal
+        time_decay: Se aplica decaimento temporal
+        use_cache: Se False, sempre treina e não salva
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Tupla (modelo, origem) com origem 'cache' ou 'fit'
+    """
+    if fingerprint is None:
+        fingerprint = data_fingerprint(df)
+
+    if use_cache:
+        cached = load_model(model_name, league_code, fingerprint, xi=xi,
+                            time_decay=time_decay, store_dir=store_dir)
+        if cached is not None:
+            return cached, 'cache'
+
+    model = MODEL_CLASSES[model_name](xi=xi)
+    model.fit(df, time_decay=time_decay)
+
+    if use_cache:
+        try:
+            save_model(model, model_name, league_code, fingerprint, time_decay, store_dir)
+        except OSError as e:
+            print(f"AVISO - Nao foi possivel salvar {model_name} no cache: {e}")
+
+    return model, 'fit'
@@ -11,9 +11,14 @@ O modelo Offensive-Defensive (Maher, 1982) é uma abordagem baseada em Poisson q
 
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+from scipy import sparse
+from scipy.optimize import minimize, OptimizeResult
+from scipy.sparse.linalg import spsolve
+from scipy.special import gammaln
 from scipy.stats import poisson
 from datetime import datetime
+from score_matrix import (build_score_tensor, summarize_score_tensor,
+                          top_scores_from_tensor, parse_fixtures)
 from glob import glob
 import os
 
@@ -34,11 +39,23 @@ class OffensiveDefensiveModel:
         self.home_advantage = None
         self.attack = None
         self.defense = None
-        
-    def negative_log_likelihood(self, params, home_teams, away_teams, home_goals, away_goals, weights=None):
+        self.n_iter = None
+        self.warm_start_info = None
+        self._cold_start_iterations = None
+        self._hess_inv = None
+        # Incrementada a cada fit: quem guarda predições do modelo (ex: cache
+        # do EnsembleModel) percebe um refit no mesmo objeto
+        self.version = 0
+        self._fitted = False
+        
+    def negative_log_likelihood(self, params, home_teams, away_teams, home_goals, away_goals, weights=None,
+                                return_gradient=False):
         """
         Calcula a log-verossimilhança negativa para otimização
         
+        Com return_gradient=True também devolve o gradiente analítico, já
+        projetado pela normalização de média zero de ataque e defesa.
+        
         Args:
             params: Parâmetros [home_adv, attack_params..., defense_params...]
             home_teams: Índices dos times da casa
@@ -46,9 +63,10 @@ class OffensiveDefensiveModel:
             home_goals: Gols do time da casa
             away_goals: Gols do time visitante
             weights: Pesos temporais (opcional)
+            return_gradient: Se True, retorna também o gradiente
             
         Returns:
-            Log-verossimilhança negativa
+            Log-verossimilhança negativa (e gradiente, se return_gradient=True)
         """
         n_teams = len(self.teams)
         home_advantage = params[0]
@@ -76,19 +94,210 @@ class OffensiveDefensiveModel:
         # Soma ponderada
         log_lik = weights * (log_lik_home + log_lik_away)
         
-        return -log_lik.sum()
+        if not return_gradient:
+            return -log_lik.sum()
+        
+        # Derivadas da log-verossimilhança em relação aos preditores lineares
+        d_home = weights * (home_goals - lambda_home)
+        d_away = weights * (away_goals - lambda_away)
+        
+        grad_attack = (np.bincount(home_teams, weights=d_home, minlength=n_teams) +
+                       np.bincount(away_teams, weights=d_away, minlength=n_teams))
+        grad_defense = -(np.bincount(away_teams, weights=d_home, minlength=n_teams) +
+                         np.bincount(home_teams, weights=d_away, minlength=n_teams))
+        
+        # Regra da cadeia pela normalização (x - média(x))
+        grad_attack = grad_attack - grad_attack.mean()
+        grad_defense = grad_defense - grad_defense.mean()
+        
+        grad = np.concatenate([[d_home.sum()], grad_attack, grad_defense])
+        
+        return -log_lik.sum(), -grad
     
-    def fit(self, df, time_decay=True):
+    def _warm_start_params(self, previous_fit):
+        """
+        Monta o chute inicial a partir de um fit anterior
+        
+        Times são mapeados pelo nome; times novos (ex: promovidos) começam em zero.
+        
+        Args:
+            previous_fit: Tupla (home_advantage, attack, defense, teams, hess_inv) do fit anterior
+            
+        Returns:
+            (init_params, lista de times novos, inversa da Hessiana inicial ou None)
+        """
+        home_advantage, attack, defense, previous_teams, previous_hess_inv = previous_fit
+        new_teams = [team for team in self.teams if team not in attack]
+        
+        init_params = np.concatenate([
+            [home_advantage],
+            [attack.get(team, 0.0) for team in self.teams],
+            [defense.get(team, 0.0) for team in self.teams]
+        ])
+        
+        # Reaproveita a inversa da Hessiana do BFGS (times novos ficam com a identidade)
+        hess_inv = None
+        if previous_hess_inv is not None:
+            n_teams, n_previous = len(self.teams), len(previous_teams)
+            previous_idx = {team: idx for idx, team in enumerate(previous_teams)}
+            old_pos = [0]
+            new_pos = [0]
+            for idx, team in enumerate(self.teams):
+                if team in previous_idx:
+                    old_pos += [1 + previous_idx[team], 1 + n_previous + previous_idx[team]]
+                    new_pos += [1 + idx, 1 + n_teams + idx]
+            hess_inv = np.eye(len(init_params))
+            hess_inv[np.ix_(new_pos, new_pos)] = previous_hess_inv[np.ix_(old_pos, old_pos)]
+            hess_inv = (hess_inv + hess_inv.T) / 2
+            
+            # BFGS exige matriz positiva definida; se não for, volta para a identidade
+            try:
+                np.linalg.cholesky(hess_inv)
+            except np.linalg.LinAlgError:
+                hess_inv = None
+        
+        return init_params, new_teams, hess_inv
+    
+    def design_matrix(self, home_teams, away_teams):
+        """
+        Monta a matriz de desenho esparsa do GLM de Poisson
+        
+        Cada partida gera duas linhas: a primeira para os gols da casa
+        (home_adv + ataque_casa - defesa_fora) e a segunda para os gols do
+        visitante (ataque_fora - defesa_casa).
+        
+        Args:
+            home_teams: Índices dos times da casa
+            away_teams: Índices dos times visitantes
+            
+        Returns:
+            Matriz CSR (2 * n_partidas, 1 + 2 * n_times) nas colunas [home_adv, ataque..., defesa...]
+        """
+        n_teams = len(self.teams)
+        n_matches = len(home_teams)
+        home_rows = 2 * np.arange(n_matches)
+        away_rows = home_rows + 1
+        
+        rows = np.concatenate([home_rows, home_rows, home_rows, away_rows, away_rows])
+        cols = np.concatenate([
+            np.zeros(n_matches, dtype=int),     # home advantage
+            1 + home_teams,                     # ataque da casa
+            1 + n_teams + away_teams,           # defesa do visitante
+            1 + away_teams,                     # ataque do visitante
+            1 + n_teams + home_teams            # defesa da casa
+        ])
+        values = np.concatenate([np.ones(n_matches), np.ones(n_matches), -np.ones(n_matches),
+                                 np.ones(n_matches), -np.ones(n_matches)])
+        
+        return sparse.csr_matrix((values, (rows, cols)), shape=(2 * n_matches, 1 + 2 * n_teams))
+    
+    def _fit_newton(self, init_params, home_teams, away_teams, home_goals, away_goals, weights=None,
+                    tol=1e-10, maxiter=50):
+        """
+        Ajusta o modelo por Newton (IRLS) com a Hessiana esparsa do GLM de Poisson
+        
+        Resolve o mesmo problema da versão BFGS (ataque e defesa com média zero)
+        impondo as duas restrições de soma zero num sistema KKT esparso:
+        
+            [X'WX  C'] [passo]   [X'w(y - mu)]
+            [C     0 ] [  nu ] = [     0     ]
+        
+        Com ligação log canônica a Hessiana observada é X'WX, então a
+        convergência é quadrática. Usa busca com redução do passo pela metade
+        se a verossimilhança piorar. nit conta as Hessianas montadas.
+        
+        Args:
+            init_params: Chute inicial [home_adv, ataque..., defesa...]
+            home_teams: Índices dos times da casa
+            away_teams: Índices dos times visitantes
+            home_goals: Gols do time da casa
+            away_goals: Gols do time visitante
+            weights: Pesos temporais (opcional)
+            tol: Tolerância no decremento de Newton (queda esperada da NLL)
+            maxiter: Número máximo de iterações
+            
+        Returns:
+            OptimizeResult com x, fun (NLL), nit, success e message (como scipy.optimize.minimize)
+        """
+        n_teams = len(self.teams)
+        n_params = 1 + 2 * n_teams
+        
+        X = self.design_matrix(home_teams, away_teams)
+        y = np.column_stack([home_goals, away_goals]).ravel().astype(float)
+        w = np.ones(len(home_teams)) if weights is None else np.asarray(weights, dtype=float)
+        w = np.repeat(w, 2)
+        log_factorial = gammaln(y + 1)
+        
+        # Restrições: soma dos ataques = 0 e soma das defesas = 0
+        C = sparse.csr_matrix(np.vstack([
+            np.concatenate([[0], np.ones(n_teams), np.zeros(n_teams)]),
+            np.concatenate([[0], np.zeros(n_teams), np.ones(n_teams)])
+        ]))
+        
+        def nll(beta):
+            eta = X @ beta
+            return -np.sum(w * (y * eta - np.exp(eta) - log_factorial))
+        
+        # Parte de um ponto viável (a centralização não muda a verossimilhança)
+        beta = np.array(init_params, dtype=float)
+        beta[1:1+n_teams] -= beta[1:1+n_teams].mean()
+        beta[1+n_teams:] -= beta[1+n_teams:].mean()
+        current = nll(beta)
+        
+        success = False
+        message = f"Numero maximo de iteracoes ({maxiter}) atingido"
+        nit = 0
+        for nit in range(1, maxiter + 1):
+            mu = np.exp(X @ beta)
+            gradient = X.T @ (w * (y - mu))
+            # Amortecimento mínimo: mantém o sistema invertível se houver grupos de
+            # times que nunca se enfrentaram (direções sem efeito na verossimilhança)
+            hessian = X.T @ sparse.diags(w * mu) @ X + 1e-8 * sparse.identity(n_params)
+            
+            kkt = sparse.bmat([[hessian, C.T], [C, None]], format='csc')
+            step = spsolve(kkt, np.concatenate([gradient, np.zeros(2)]))[:n_params]
+            
+            # Redução do passo pela metade até a verossimilhança melhorar
+            t = 1.0
+            candidate = nll(beta + step)
+            while candidate > current and t > 1e-8:
+                t /= 2
+                candidate = nll(beta + t * step)
+            
+            beta = beta + t * step
+            current = candidate
+            
+            # Decremento de Newton: quanto a NLL ainda podia cair antes deste passo
+            if gradient @ step / 2 < tol:
+                success = True
+                message = "Convergiu (decremento de Newton abaixo da tolerancia)"
+                break
+        
+        return OptimizeResult(x=beta, fun=current, nit=nit, success=success, message=message)
+    
+    def fit(self, df, time_decay=True, warm_start=False, solver='bfgs'):
         """
         Treina o modelo Offensive-Defensive
         
         Args:
             df: DataFrame com ['time_casa', 'time_visitante', 'gols_casa', 'gols_visitante', 'data']
             time_decay: Se True, aplica decaimento temporal
+            warm_start: Se True e o modelo já foi treinado, parte dos parâmetros do
+                        último fit (refit incremental) em vez de um chute aleatório
+            solver: 'bfgs' (scipy.optimize.minimize com gradiente analítico) ou
+                    'newton' (Newton/IRLS com Hessiana esparsa, converge em poucas iterações)
             
         Returns:
             self
         """
+        if solver not in ('bfgs', 'newton'):
+            raise ValueError(f"Solver desconhecido: {solver} (use 'bfgs' ou 'newton')")
+        
+        # Estado do fit anterior (antes de sobrescrever self.teams)
+        previous_fit = None
+        if warm_start and self._fitted:
+            previous_fit = (self.home_advantage, self.attack, self.defense, self.teams, self._hess_inv)
+        
         # Prepara dados
         df = df.copy()
         df['data'] = pd.to_datetime(df['data'])
@@ -109,35 +318,71 @@ class OffensiveDefensiveModel:
         if time_decay and self.xi > 0:
             max_date = df['data'].max()
             days_diff = (max_date - df['data']).dt.days
-            weights = np.exp(-self.xi * days_diff / 365.25)
+            weights = np.exp(-self.xi * days_diff / 365.25).values
         
         # Parâmetros iniciais
         n_teams = len(self.teams)
-        init_params = np.concatenate([
-            [0.3],  # home advantage
-            np.random.normal(0, 0.1, n_teams),  # attack
-            np.random.normal(0, 0.1, n_teams)   # defense
-        ])
+        options = {'maxiter': 100, 'disp': False}
+        if previous_fit is not None:
+            init_params, new_teams, hess_inv = self._warm_start_params(previous_fit)
+            if hess_inv is not None:
+                options['hess_inv0'] = hess_inv
+        elif solver == 'newton':
+            # Problema côncavo: Newton parte do zero sem chute aleatório
+            init_params = np.zeros(1 + 2 * n_teams)
+        else:
+            init_params = np.concatenate([
+                [0.3],  # home advantage
+                np.random.normal(0, 0.1, n_teams),  # attack
+                np.random.normal(0, 0.1, n_teams)   # defense
+            ])
         
         # Otimização
         print("Treinando modelo Offensive-Defensive...")
         print(f"- Times: {n_teams}")
         print(f"- Partidas: {len(df)}")
         print(f"- Decaimento temporal: {time_decay} (xi={self.xi})")
+        if previous_fit is not None:
+            print(f"- Warm start a partir do fit anterior ({len(new_teams)} times novos)")
         
-        result = minimize(
-            self.negative_log_likelihood,
-            init_params,
-            args=(home_teams, away_teams, home_goals, away_goals, weights),
-            method='BFGS',
-            options={'maxiter': 100, 'disp': False}
-        )
+        if solver == 'newton':
+            print("- Solver: Newton/IRLS (Hessiana esparsa)")
+            result = self._fit_newton(init_params, home_teams, away_teams, home_goals, away_goals, weights)
+        else:
+            # Função objetivo retorna (valor, gradiente analítico): evita diferenças finitas
+            result = minimize(
+                self.negative_log_likelihood,
+                init_params,
+                args=(home_teams, away_teams, home_goals, away_goals, weights, True),
+                jac=True,
+                method='BFGS',
+                options=options
+            )
         
         if result.success:
             print("Otimizacao concluida com sucesso!")
         else:
             print(f"AVISO: Otimizacao nao convergiu completamente: {result.message}")
         
+        # Iterações: fits do zero servem de referência para medir o ganho do warm start
+        self.n_iter = result.nit
+        self._hess_inv = result.get('hess_inv')
+        if previous_fit is not None:
+            saved = None
+            if self._cold_start_iterations is not None:
+                saved = self._cold_start_iterations - result.nit
+            self.warm_start_info = {
+                'iterations': result.nit,
+                'cold_start_iterations': self._cold_start_iterations,
+                'iterations_saved': saved,
+                'new_teams': new_teams
+            }
+            if saved is not None:
+                print(f"- Iteracoes: {result.nit} (warm start economizou {saved} vs ultimo fit do zero)")
+        else:
+            self._cold_start_iterations = result.nit
+            self.warm_start_info = None
+        
         # Extrai parâmetros
         self.params = result.x
         self.home_advantage = result.x[0]
@@ -154,6 +399,9 @@ class OffensiveDefensiveModel:
         
         print(f"- Home advantage: {self.home_advantage:.3f}")
         
+        self.version += 1
+        self._fitted = True
+        
         return self
     
     def predict_goals(self, home_team, away_team):
@@ -197,17 +445,7 @@ class OffensiveDefensiveModel:
         """
         lambda_home, lambda_away = self.predict_goals(home_team, away_team)
         
-        # Matriz de probabilidades (Poisson independente)
-        prob_matrix = np.zeros((max_goals + 1, max_goals + 1))
-        
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                prob_matrix[i, j] = poisson.pmf(i, lambda_home) * poisson.pmf(j, lambda_away)
-        
-        # Normaliza
-        prob_matrix = prob_matrix / prob_matrix.sum()
-        
-        return prob_matrix
+        return build_score_tensor([lambda_home], [lambda_away], max_goals, rho=None)[0]
     
     def predict_match(self, home_team, away_team, max_goals=10):
         """
@@ -224,30 +462,9 @@ class OffensiveDefensiveModel:
         lambda_home, lambda_away = self.predict_goals(home_team, away_team)
         prob_matrix = self.predict_score_probabilities(home_team, away_team, max_goals)
         
-        # Probabilidades 1X2
-        prob_home_win = np.tril(prob_matrix, -1).sum()
-        prob_draw = np.trace(prob_matrix)
-        prob_away_win = np.triu(prob_matrix, 1).sum()
-        
-        # Over/Under 2.5
-        prob_under_2_5 = sum([prob_matrix[i, j] 
-                              for i in range(max_goals + 1) 
-                              for j in range(max_goals + 1) 
-                              if i + j < 2.5])
-        prob_over_2_5 = 1 - prob_under_2_5
-        
-        # BTTS
-        prob_btts_yes = sum([prob_matrix[i, j] 
-                             for i in range(1, max_goals + 1) 
-                             for j in range(1, max_goals + 1)])
-        prob_btts_no = 1 - prob_btts_yes
-        
-        # Top placares
-        top_scores = []
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                top_scores.append(((i, j), prob_matrix[i, j]))
-        top_scores.sort(key=lambda x: x[1], reverse=True)
+        # 1X2, Over/Under 2.5 e BTTS com reduções sobre a matriz
+        summary = {key: value[0] for key, value in summarize_score_tensor(prob_matrix).items()}
+        top_scores = top_scores_from_tensor(prob_matrix[None], k=10)[0]
         
         return {
             'home_team': home_team,
@@ -256,14 +473,67 @@ class OffensiveDefensiveModel:
             'lambda_away': lambda_away,
             'expected_goals_home': lambda_home,
             'expected_goals_away': lambda_away,
-            'prob_home_win': prob_home_win,
-            'prob_draw': prob_draw,
-            'prob_away_win': prob_away_win,
-            'prob_over_2_5': prob_over_2_5,
-            'prob_under_2_5': prob_under_2_5,
-            'prob_btts_yes': prob_btts_yes,
-            'prob_btts_no': prob_btts_no,
-            'top_scores': top_scores[:10],
+            **summary,
+            'top_scores': top_scores,
+            'prob_matrix': prob_matrix
+        }
+    
+    def predict_goals_many(self, home_teams, away_teams):
+        """
+        Prediz lambdas esperados para várias partidas de uma vez
+        
+        Args:
+            home_teams: Lista de times da casa
+            away_teams: Lista de times visitantes
+            
+        Returns:
+            (array lambda_home, array lambda_away)
+        """
+        unknown = sorted((set(home_teams) | set(away_teams)) - set(self.teams))
+        if unknown:
+            raise ValueError(f"Time nao encontrado: {', '.join(unknown)}")
+        
+        attack_home = np.array([self.attack[team] for team in home_teams])
+        attack_away = np.array([self.attack[team] for team in away_teams])
+        defense_home = np.array([self.defense[team] for team in home_teams])
+        defense_away = np.array([self.defense[team] for team in away_teams])
+        
+        lambda_home = np.exp(self.home_advantage + attack_home - defense_away)
+        lambda_away = np.exp(attack_away - defense_home)
+        
+        return lambda_home, lambda_away
+    
+    def predict_many(self, fixtures, max_goals=10, top_k=10):
+        """
+        Gera predições para várias partidas de uma vez (formato colunar)
+        
+        As matrizes de placares são calculadas juntas como um tensor
+        (n_partidas, max_goals+1, max_goals+1) e os mercados saem de reduções de array.
+        
+        Args:
+            fixtures: Lista de tuplas (time_casa, time_visitante) ou DataFrame
+                      com colunas time_casa e time_visitante
+            max_goals: Número máximo de gols
+            top_k: Número de placares em top_scores (None = não calcula, ex:
+                   quando o chamador combina os tensores antes de escolher)
+            
+        Returns:
+            Dicionário com as mesmas chaves de predict_match, com um array
+            (ou lista) por chave e uma posição por partida
+        """
+        home_teams, away_teams = parse_fixtures(fixtures)
+        lambda_home, lambda_away = self.predict_goals_many(home_teams, away_teams)
+        prob_matrix = build_score_tensor(lambda_home, lambda_away, max_goals, rho=None)
+        
+        return {
+            'home_team': home_teams,
+            'away_team': away_teams,
+            'lambda_home': lambda_home,
+            'lambda_away': lambda_away,
+            'expected_goals_home': lambda_home,
+            'expected_goals_away': lambda_away,
+            **summarize_score_tensor(prob_matrix),
+            'top_scores': top_scores_from_tensor(prob_matrix, k=top_k) if top_k else None,
             'prob_matrix': prob_matrix
         }
     
@@ -2,8 +2,10 @@
 Busca próximas partidas da Premier League pela API e gera predições usando Dixon-Coles
 """
 from api_client import FootballDataClient
-from dixon_coles import DixonColesModel, load_match_data
+from dixon_coles import DixonColesModel
+from data_loader import load_match_data
 from config import PREMIER_LEAGUE_CODE
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
@@ -80,7 +82,7 @@ def gerar_predicoes_proximas_partidas(partidas, model):
     print("=" * 80)
     print()
     
-    predicoes = []
+    validas = []
     
     for i, partida in enumerate(partidas, 1):
         time_casa = partida['time_casa']
@@ -88,56 +90,60 @@ def gerar_predicoes_proximas_partidas(partidas, model):
         
         print(f"[{i}/{len(partidas)}] {time_casa} vs {time_visitante}")
         
-        try:
-            # Gera predição
-            pred = model.predict_match(time_casa, time_visitante)
-            
-            # Determina resultado mais provável
-            probs = {
-                'Casa': pred['prob_home_win'],
-                'Empate': pred['prob_draw'],
-                'Fora': pred['prob_away_win']
-            }
-            resultado_provavel = max(probs, key=probs.get)
-            
-            predicoes.append({
-                'Data': partida['data_formatada'],
-                'Hora': partida['hora'],
-                'Rodada': partida['rodada'],
-                'Time_Casa': time_casa,
-                'Time_Visitante': time_visitante,
-                'Estadio': partida['estadio'],
-                'Gols_Esp_Casa': round(pred['expected_goals_home'], 2),
-                'Gols_Esp_Fora': round(pred['expected_goals_away'], 2),
-                'Prob_Vit_Casa_%': round(pred['prob_home_win'] * 100, 1),
-                'Prob_Empate_%': round(pred['prob_draw'] * 100, 1),
-                'Prob_Vit_Fora_%': round(pred['prob_away_win'] * 100, 1),
-                'Resultado_Provavel': resultado_provavel,
-                'Confianca_%': round(probs[resultado_provavel] * 100, 1),
-                'Prob_Over_2.5_%': round(pred['prob_over_2_5'] * 100, 1),
-                'Prob_Under_2.5_%': round(pred['prob_under_2_5'] * 100, 1),
-                'Prob_BTTS_Sim_%': round(pred['prob_btts_yes'] * 100, 1),
-                'Prob_BTTS_Nao_%': round(pred['prob_btts_no'] * 100, 1),
-                'Placar_Mais_Provavel': f"{pred['top_scores'][0][0][0]}-{pred['top_scores'][0][0][1]}",
-                'Prob_Placar_%': round(pred['top_scores'][0][1] * 100, 2),
-                'Top_3_Placares': ', '.join([
-                    f"{s[0][0]}-{s[0][1]} ({s[1]*100:.1f}%)" 
-                    for s in pred['top_scores'][:3]
-                ])
-            })
-            
-            print(f"  -> {resultado_provavel} ({probs[resultado_provavel]*100:.1f}%)")
-            
-        except ValueError as e:
-            print(f"  -> AVISO: {e}")
+        desconhecidos = [time for time in (time_casa, time_visitante) if time not in model.teams]
+        if desconhecidos:
             # Time não está no modelo, pula
+            print(f"  -> AVISO: Time nao encontrado no modelo: {', '.join(desconhecidos)}")
             continue
-        except Exception as e:
-            print(f"  -> ERRO: {e}")
-            continue
+        
+        validas.append(partida)
+    
+    if not validas:
+        print()
+        return pd.DataFrame()
+    
+    # Gera todas as predições de uma vez
+    pred = model.predict_many([(p['time_casa'], p['time_visitante']) for p in validas])
+    
+    # Determina resultado mais provável
+    probs_1x2 = np.column_stack([pred['prob_home_win'], pred['prob_draw'], pred['prob_away_win']])
+    rotulos = np.array(['Casa', 'Empate', 'Fora'])
+    resultado_provavel = rotulos[probs_1x2.argmax(axis=1)]
+    confianca = probs_1x2.max(axis=1)
+    placar_top = [scores[0] for scores in pred['top_scores']]
+    
+    predicoes = pd.DataFrame({
+        'Data': [p['data_formatada'] for p in validas],
+        'Hora': [p['hora'] for p in validas],
+        'Rodada': [p['rodada'] for p in validas],
+        'Time_Casa': pred['home_team'],
+        'Time_Visitante': pred['away_team'],
+        'Estadio': [p['estadio'] for p in validas],
+        'Gols_Esp_Casa': np.round(pred['expected_goals_home'], 2),
+        'Gols_Esp_Fora': np.round(pred['expected_goals_away'], 2),
+        'Prob_Vit_Casa_%': np.round(pred['prob_home_win'] * 100, 1),
+        'Prob_Empate_%': np.round(pred['prob_draw'] * 100, 1),
+        'Prob_Vit_Fora_%': np.round(pred['prob_away_win'] * 100, 1),
+        'Resultado_Provavel': resultado_provavel,
+        'Confianca_%': np.round(confianca * 100, 1),
+        'Prob_Over_2.5_%': np.round(pred['prob_over_2_5'] * 100, 1),
+        'Prob_Under_2.5_%': np.round(pred['prob_under_2_5'] * 100, 1),
+        'Prob_BTTS_Sim_%': np.round(pred['prob_btts_yes'] * 100, 1),
+        'Prob_BTTS_Nao_%': np.round(pred['prob_btts_no'] * 100, 1),
+        'Placar_Mais_Provavel': [f"{gols[0]}-{gols[1]}" for gols, _ in placar_top],
+        'Prob_Placar_%': [round(prob * 100, 2) for _, prob in placar_top],
+        'Top_3_Placares': [
+            ', '.join([f"{s[0][0]}-{s[0][1]} ({s[1]*100:.1f}%)" for s in scores[:3]])
+            for scores in pred['top_scores']
+        ]
+    })
+    
+    for _, jogo in predicoes.iterrows():
+        print(f"  {jogo['Time_Casa']} vs {jogo['Time_Visitante']} -> "
+              f"{jogo['Resultado_Provavel']} ({jogo['Confianca_%']:.1f}%)")
     
     print()
-    return pd.DataFrame(predicoes)
+    return predicoes
 
 
 def exibir_resumo_predicoes(df_pred):
@@ -0,0 +1,176 @@
+"""
+Matrizes de placares em lote para os modelos de Poisson
+
+Funções vetorizadas usadas por DixonColesModel e OffensiveDefensiveModel para
+calcular, de uma vez, as matrizes de probabilidade de placares de várias partidas
+(tensor com shape (n_partidas, max_goals+1, max_goals+1)) e os mercados derivados.
+"""
+
+import numpy as np
+from scipy.special import gammaln
+
+
+def poisson_pmf_matrix(lambdas, max_goals=10):
+    """
+    Calcula a PMF de Poisson de 0 a max_goals gols para vários lambdas
+
+    Args:
+        lambdas: Array com n lambdas
+        max_goals: Número máximo de gols
+
+    Returns:
+        Array (n, max_goals+1) com P(X = k) para cada lambda
+    """
+    lambdas = np.asarray(lambdas, dtype=float).reshape(-1, 1)
+    goals = np.arange(max_goals + 1)
+    return np.exp(goals * np.log(lambdas) - lambdas - gammaln(goals + 1))
+
+
+def build_score_tensor(lambda_home, lambda_away, max_goals=10, rho=None):
+    """
+    Monta as matrizes de placares de várias partidas com produto externo das PMFs
+
+    Args:
+        lambda_home: Array com lambdas do time da casa
+        lambda_away: Array com lambdas do time visitante
+        max_goals: Número máximo de gols
+        rho: Parâmetro de correlação do Dixon-Coles, escalar ou um por partida
+             (None = Poisson independente)
+
+    Returns:
+        Tensor (n, max_goals+1, max_goals+1) normalizado, indexado por [partida, gols_casa, gols_fora]
+    """
+    lambda_home = np.asarray(lambda_home, dtype=float).ravel()
+    lambda_away = np.asarray(lambda_away, dtype=float).ravel()
+
+    pmf_home = poisson_pmf_matrix(lambda_home, max_goals)
+    pmf_away = poisson_pmf_matrix(lambda_away, max_goals)
+    tensor = pmf_home[:, :, None] * pmf_away[:, None, :]
+
+    if rho is not None and np.any(rho != 0):
+        # Correção tau apenas nas células 0-0, 0-1, 1-0 e 1-1 (mesmo piso de rho_correction)
+        rho = np.broadcast_to(np.asarray(rho, dtype=float), lambda_home.shape)
+        tau = np.empty((len(lambda_home), 2, 2))
+        tau[:, 0, 0] = 1 - lambda_home * lambda_away * rho
+        tau[:, 0, 1] = 1 + lambda_home * rho
+        tau[:, 1, 0] = 1 + lambda_away * rho
+        tau[:, 1, 1] = 1 - rho
+        tensor[:, :2, :2] *= np.maximum(tau, 1e-10)
+
+    # Normaliza cada matriz
+    tensor /= tensor.sum(axis=(1, 2), keepdims=True)
+
+    return tensor
+
+
+def summarize_score_tensor(tensor):
+    """
+    Deriva 1X2, Over/Under 2.5 e BTTS de um tensor de placares com reduções de array
+
+    Args:
+        tensor: Array (n, G+1, G+1) ou matriz (G+1, G+1)
+
+    Returns:
+        Dict com arrays de probabilidades (mesmas chaves de predict_match)
+    """
+    tensor = np.asarray(tensor)
+    if tensor.ndim == 2:
+        tensor = tensor[None]
+
+    size = tensor.shape[1]
+    home_goals = np.arange(size)[:, None]
+    away_goals = np.arange(size)[None, :]
+
+    prob_home_win = (tensor * (home_goals > away_goals)).sum(axis=(1, 2))
+    prob_draw = np.trace(tensor, axis1=1, axis2=2)
+    prob_away_win = (tensor * (home_goals < away_goals)).sum(axis=(1, 2))
+    prob_under_2_5 = (tensor * (home_goals + away_goals < 2.5)).sum(axis=(1, 2))
+    prob_btts_yes = tensor[:, 1:, 1:].sum(axis=(1, 2))
+
+    return {
+        'prob_home_win': prob_home_win,
+        'prob_draw': prob_draw,
+        'prob_away_win': prob_away_win,
+        'prob_over_2_5': 1 - prob_under_2_5,
+        'prob_under_2_5': prob_under_2_5,
+        'prob_btts_yes': prob_btts_yes,
+        'prob_btts_no': 1 - prob_btts_yes
+    }
+
+
+def top_k_indices(values, k):
+    """
+    Índices dos k maiores valores de cada linha, do maior para o menor
+
+    Seleciona os candidatos com np.partition (linear por linha) e ordena
+    só os k escolhidos; empates ficam com o menor índice primeiro, como num
+    argsort estável.
+
+    Args:
+        values: Array (n, m)
+        k: Número de posições (limitado a m)
+
+    Returns:
+        Array (n, min(k, m)) de índices
+    """
+    values = np.asarray(values)
+    n, m = values.shape
+    k = min(k, m)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.intp)
+
+    if k < m:
+        # k-ésimo maior valor de cada linha; entre os empatados com ele
+        # entram os de menor índice (argpartition sozinho escolhe qualquer um)
+        kth = np.partition(values, m - k, axis=1)[:, m - k, None]
+        above = values > kth
+        tied = values == kth
+        missing = k - above.sum(axis=1, keepdims=True)
+        keep = above | (tied & (np.cumsum(tied, axis=1) <= missing))
+        candidates = np.nonzero(keep)[1].reshape(n, k)
+    else:
+        candidates = np.broadcast_to(np.arange(m), (n, m))
+    chosen = np.take_along_axis(values, candidates, axis=1)
+    order = np.lexsort((candidates, -chosen), axis=1)
+
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def top_scores_from_tensor(tensor, k=10):
+    """
+    Retorna os k placares mais prováveis de cada matriz do tensor
+
+    Args:
+        tensor: Array (n, G+1, G+1)
+        k: Número de placares
+
+    Returns:
+        Lista (uma por partida) de listas [((gols_casa, gols_fora), prob), ...]
+    """
+    n, size, _ = tensor.shape
+    flat = tensor.reshape(n, -1)
+    order = top_k_indices(flat, k)
+    probs = np.take_along_axis(flat, order, axis=1)
+
+    return [
+        [((int(idx // size), int(idx % size)), prob) for idx, prob in zip(order[m], probs[m])]
+        for m in range(n)
+    ]
+
+
+def parse_fixtures(fixtures):
+    """
+    Normaliza a lista de partidas recebida por predict_many
+
+    Args:
+        fixtures: Lista de tuplas (time_casa, time_visitante) ou DataFrame
+                  com colunas time_casa e time_visitante
+
+    Returns:
+        (lista de times da casa, lista de times visitantes)
+    """
+    if hasattr(fixtures, 'columns'):
+        return list(fixtures['time_casa']), list(fixtures['time_visitante'])
+
+    fixtures = list(fixtures)
+    return [home for home, _ in fixtures], [away for _, away in fixtures]
@@ -0,0 +1,195 @@
+"""
+Pesos do ensemble aprendidos com predições fora da amostra (stacking)
+
+Recebe as probabilidades que cada modelo deu, fora da amostra (folds de
+ModelValidator.cross_validate ou walk_forward), para as mesmas partidas e
+encontra pesos não negativos que somam 1 e minimizam o log loss da mistura.
+A mistura segue a regra do EnsembleModel: um modelo sem predição para uma
+partida fica fora da média daquela partida e os pesos dos demais são
+renormalizados.
+
+Só a probabilidade do resultado que aconteceu entra no log loss, então cada
+mercado vira uma matriz (modelos, partidas) e objetivo e gradiente saem de
+dois produtos matriz-vetor por iteração.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+
+# Mercados suportados: chaves de predict_many/predict_match dos modelos.
+# Mercados com uma chave são binários (probabilidade do "sim").
+MARKET_KEYS = {
+    '1x2': ('prob_home_win', 'prob_draw', 'prob_away_win'),
+    'over_2_5': ('prob_over_2_5',),
+    'btts': ('prob_btts_yes',),
+}
+
+# Piso das probabilidades dentro do log (evita log(0) com predições de 0%)
+PROB_FLOOR = 1e-12
+
+
+def market_outcomes(df, market):
+    """
+    Resultado observado de cada partida num mercado
+
+    Args:
+        df: DataFrame com gols_casa e gols_visitante
+        market: Chave de MARKET_KEYS
+
+    Returns:
+        Array int: classe do 1X2 (0 casa, 1 empate, 2 fora) ou 1/0 nos binários
+    """
+    gols_casa = df['gols_casa'].to_numpy()
+    gols_fora = df['gols_visitante'].to_numpy()
+
+    if market == '1x2':
+        return np.where(gols_casa > gols_fora, 0, np.where(gols_casa == gols_fora, 1, 2))
+    if market == 'over_2_5':
+        return (gols_casa + gols_fora > 2.5).astype(int)
+    if market == 'btts':
+        return ((gols_casa > 0) & (gols_fora > 0)).astype(int)
+    raise ValueError(f"Mercado desconhecido: {market}")
+
+
+def predictions_frame(predictions):
+    """
+    Converte {índice: predição} num DataFrame (uma coluna por chave de probabilidade)
+
+    Args:
+        predictions: Dict {índice: predição}
+
+    Returns:
+        DataFrame indexado pelos índices das partidas
+    """
+    return pd.DataFrame(list(predictions.values()), index=list(predictions.keys()))
+
+
+def observed_probabilities(df, predictions, market):
+    """
+    Probabilidade que um modelo deu ao resultado observado de cada partida
+
+    Args:
+        df: DataFrame das partidas (o índice identifica cada partida)
+        predictions: Dict {índice: predição} (formato de ModelValidator.oos_predictions)
+                     ou DataFrame com uma linha por índice (ver predictions_frame)
+        market: Chave de MARKET_KEYS
+
+    Returns:
+        Array (n,) alinhado com df; NaN onde o modelo não previu a partida
+    """
+    keys = list(MARKET_KEYS[market])
+    outcomes = market_outcomes(df, market)
+
+    if not isinstance(predictions, pd.DataFrame):
+        predictions = predictions_frame(predictions)
+    probs = predictions.reindex(index=df.index, columns=keys).to_numpy(dtype=float)
+
+    if len(keys) == 1:
+        return np.where(outcomes == 1, probs[:, 0], 1 - probs[:, 0])
+    return np.take_along_axis(probs, outcomes[:, None], axis=1)[:, 0]
+
+
+def mixture_log_loss(weights, observed, valid):
+    """
+    Log loss da mistura ponderada e seu gradiente em relação aos pesos
+
+    Args:
+        weights: Array (modelos,)
+        observed: Array (modelos, partidas) com a probabilidade do resultado
+                  observado (zero onde o modelo não previu)
+        valid: Array (modelos, partidas) de 0/1, 1 onde o modelo previu
+
+    Returns:
+        Tupla (log loss médio, gradiente (modelos,))
+    """
+    numerator = weights @ observed
+    # Partidas em que todos os modelos que previram têm peso 0 (ex: pesos num
+    # vértice do simplex) teriam 0/0: o piso mantém loss e gradiente finitos
+    denominator = np.maximum(weights @ valid, PROB_FLOOR)
+    numerator = np.maximum(numerator, PROB_FLOOR * denominator)
+
+    loss = -np.mean(np.log(numerator) - np.log(denominator))
+    grad = -(observed @ (1 / numerator) - valid @ (1 / denominator)) / observed.shape[1]
+
+    return loss, grad
+
+
+def fit_stacking_weights(observed):
+    """
+    Pesos no simplex que minimizam o log loss da mistura
+
+    O log loss é convexo nos pesos, então o SLSQP (com gradiente analítico,
+    pesos em [0, 1] e soma 1) chega ao ótimo global em poucas iterações.
+
+    Args:
+        observed: Array (modelos, partidas) com a probabilidade do resultado
+                  observado; NaN onde o modelo não previu a partida
+
+    Returns:
+        Array (modelos,) de pesos. Partidas sem nenhum modelo são ignoradas;
+        sem nenhuma partida, devolve pesos iguais
+    """
+    observed = np.asarray(observed, dtype=float)
+    n_models = observed.shape[0]
+    valid = ~np.isnan(observed)
+    keep = valid.any(axis=0)
+    uniform = np.full(n_models, 1 / n_models)
+    if not keep.any():
+        return uniform
+
+    valid = valid[:, keep].astype(float)
+    observed = np.clip(np.nan_to_num(observed[:, keep]), PROB_FLOOR, 1) * valid
+
+    result = minimize(mixture_log_loss, uniform, args=(observed, valid), jac=True,
+                      method='SLSQP', bounds=[(0, 1)] * n_models,
+                      constraints=({'type': 'eq', 'fun': lambda w: w.sum() - 1,
+                                    'jac': lambda w: np.ones_like(w)},),
+                      options={'ftol': 1e-10, 'maxiter': 200})
+
+    weights = np.clip(result.x, 0, None)
+    return weights / weights.sum()
+
+
+def learn_ensemble_weights(df, predictions_by_model, markets=None, league_col=None, min_matches=100):
+    """
+    Aprende os pesos do ensemble por mercado (e, opcionalmente, por liga)
+
+    Args:
+        df: DataFrame das partidas previstas fora da amostra (com gols)
+        predictions_by_model: Dict {modelo: {índice: predição}}, ex:
+                              {'dixon_coles': validator.oos_predictions, ...}
+        markets: Mercados de MARKET_KEYS (None = todos)
+        league_col: Coluna de df com a liga. Se informada, cada liga com pelo
+                    menos min_matches partidas ganha seus próprios pesos
+        min_matches: Mínimo de partidas para ajustar os pesos de uma liga
+                     (ligas menores ficam com os pesos gerais)
+
+    Returns:
+        Dict {mercado: {modelo: peso}}; com league_col, {liga: {mercado:
+        {modelo: peso}}}, incluindo a chave None com os pesos gerais. Os dois
+        formatos vão direto para EnsembleModel(weights=...), que usa os pesos
+        da liga do fit (ver EnsembleModel.market_weights)
+    """
+    names = list(predictions_by_model)
+    markets = list(MARKET_KEYS) if markets is None else markets
+
+    frames = [predictions_frame(predictions_by_model[name]) for name in names]
+    observed = {market: np.vstack([observed_probabilities(df, frame, market) for frame in frames])
+                for market in markets}
+
+    def fit_group(mask):
+        return {market: dict(zip(names, fit_stacking_weights(observed[market][:, mask]).tolist()))
+                for market in markets}
+
+    overall = fit_group(np.ones(len(df), dtype=bool))
+    if league_col is None:
+        return overall
+
+    by_league = {None: overall}
+    leagues = df[league_col].to_numpy()
+    for league in df[league_col].unique():
+        mask = leagues == league
+        by_league[league] = fit_group(mask) if mask.sum() >= min_matches else overall
+    return by_league
@@ -0,0 +1,145 @@
+"""
+Kernels de sequências de resultados para as heurísticas
+
+Calculam, para vários times de uma vez, a sequência atual, a maior sequência
+de vitórias e os jogos sem vencer a partir dos códigos de resultado
+(1 = vitória, 0 = empate, -1 = derrota) guardados em fatias contíguas, do
+jogo mais recente para o mais antigo (mesmo layout do índice por time de
+HeuristicasModel).
+
+Usa Numba quando estiver instalado; sem ele, uma versão vetorizada em NumPy
+dá o mesmo resultado.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _streak_scan(resultado, inicios, fins):
+    """
+    Varredura sequencial de cada fatia (compilada com Numba quando disponível)
+
+    Args:
+        resultado: Códigos de resultado (int8) de todos os times
+        inicios: Início da fatia de cada time
+        fins: Fim (exclusivo) da fatia de cada time
+
+    Returns:
+        Tupla (tamanho_atual, max_vitorias, sem_vencer) de arrays int64
+    """
+    n_times = len(inicios)
+    tamanho_atual = np.zeros(n_times, dtype=np.int64)
+    max_vitorias = np.zeros(n_times, dtype=np.int64)
+    sem_vencer = np.zeros(n_times, dtype=np.int64)
+
+    for t in range(n_times):
+        inicio, fim = inicios[t], fins[t]
+        if fim <= inicio:
+            continue
+
+        # Sequência atual: jogos iniciais iguais ao mais recente
+        atual = fim - inicio
+        for i in range(inicio + 1, fim):
+            if resultado[i] != resultado[inicio]:
+                atual = i - inicio
+                break
+        tamanho_atual[t] = atual
+
+        # Jogos sem vencer: posição da vitória mais recente
+        sem = fim - inicio
+        for i in range(inicio, fim):
+            if resultado[i] == 1:
+                sem = i - inicio
+                break
+        sem_vencer[t] = sem
+
+        # Maior bloco de vitórias
+        corrente = 0
+        maior = 0
+        for i in range(inicio, fim):
+            if resultado[i] == 1:
+                corrente += 1
+                if corrente > maior:
+                    maior = corrente
+            else:
+                corrente = 0
+        max_vitorias[t] = maior
+
+    return tamanho_atual, max_vitorias, sem_vencer
+
+
+if NUMBA_AVAILABLE:
+    _streak_scan_numba = njit(cache=True)(_streak_scan)
+
+
+def _streak_numpy(resultado, inicios, fins):
+    """
+    Mesmo cálculo de _streak_scan com operações por segmento (reduceat)
+
+    Fatias vazias são tratadas fora: reduceat exige segmentos não vazios.
+    """
+    n_times = len(inicios)
+    tamanho_atual = np.zeros(n_times, dtype=np.int64)
+    max_vitorias = np.zeros(n_times, dtype=np.int64)
+    sem_vencer = np.zeros(n_times, dtype=np.int64)
+
+    validos = fins > inicios
+    if not validos.any():
+        return tamanho_atual, max_vitorias, sem_vencer
+    inicios, fins = inicios[validos], fins[validos]
+
+    # Reúne as fatias num só array (no índice elas já são contíguas)
+    contagens = fins - inicios
+    offsets = np.r_[0, np.cumsum(contagens)[:-1]]
+    posicoes = np.arange(contagens.sum())
+    local = posicoes - np.repeat(offsets, contagens)
+    codigos = np.asarray(resultado)[np.repeat(inicios - offsets, contagens) + posicoes]
+    tamanhos = np.repeat(contagens, contagens)
+
+    # Primeira posição que quebra cada padrão (tamanho da fatia se não houver)
+    quebra = codigos != np.repeat(codigos[offsets], contagens)
+    tamanho_atual[validos] = np.minimum.reduceat(np.where(quebra, local, tamanhos), offsets)
+    vitoria = codigos == 1
+    sem_vencer[validos] = np.minimum.reduceat(np.where(vitoria, local, tamanhos), offsets)
+
+    # Sequência de vitórias terminando em cada posição: distância até o último
+    # jogo sem vitória (ou até antes do início da fatia)
+    marcas = np.where(~vitoria, posicoes, -1)
+    marcas[offsets] = np.where(vitoria[offsets], offsets - 1, offsets)
+    corrente = np.where(vitoria, posicoes - np.maximum.accumulate(marcas), 0)
+    max_vitorias[validos] = np.maximum.reduceat(corrente, offsets)
+
+    return tamanho_atual, max_vitorias, sem_vencer
+
+
+def streak_stats(resultado, inicios, fins, backend=None):
+    """
+    Sequências de resultados de todos os times de uma vez
+
+    Args:
+        resultado: Códigos de resultado (1, 0, -1), jogo mais recente primeiro em cada fatia
+        inicios: Início da fatia de cada time
+        fins: Fim (exclusivo) da fatia de cada time
+        backend: 'numba', 'numpy' ou None (Numba se estiver instalado)
+
+    Returns:
+        Tupla (tamanho_atual, max_vitorias, sem_vencer) de arrays int64, um
+        valor por time (zeros para fatias vazias)
+    """
+    if backend is None:
+        backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("Numba não está instalado")
+
+    resultado = np.asarray(resultado, dtype=np.int8)
+    inicios = np.asarray(inicios, dtype=np.int64)
+    fins = np.asarray(fins, dtype=np.int64)
+
+    if backend == 'numba':
+        return _streak_scan_numba(resultado, inicios, fins)
+    return _streak_numpy(resultado, inicios, fins)
@@ -88,3 +88,19 @@ def trained_heuristicas(sample_match_data):
     
     return model
 
+
+
+@pytest.fixture
+def fitted_ensemble(trained_dixon_coles, trained_offensive_defensive, trained_heuristicas):
+    """Ensemble montado com os modelos treinados com dados de exemplo"""
+    from ensemble import EnsembleModel
+    
+    ensemble = EnsembleModel()
+    ensemble.models = {
+        'dixon_coles': trained_dixon_coles,
+        'offensive_defensive': trained_offensive_defensive,
+        'heuristicas': trained_heuristicas
+    }
+    ensemble._fitted = True
+    
+    return ensemble
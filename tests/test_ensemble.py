@@ -1,8 +1,12 @@
 """
 Testes para o sistema de Ensemble
 """
+import logging
+
 import pytest
+from data_loader import parse_counts, reset_parse_counts
 from ensemble import EnsembleModel
+from logger_config import set_event_logging
 
 
 class TestEnsemble:
@@ -106,6 +110,380 @@ class TestEnsemble:
         assert abs(pred['ensemble']['prob_casa'] - expected_prob_casa) < 0.05
 
 
+class TestEnsembleLogging:
+    """Testes do canal de eventos no caminho de predição"""
+
+    def test_predict_match_writes_nothing_by_default(self, fitted_ensemble, capsys, caplog):
+        """Testa se a predição não escreve no console nem emite registros no nível padrão"""
+        capsys.readouterr()
+        with caplog.at_level(logging.INFO):
+            fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        captured = capsys.readouterr()
+        assert captured.out == ''
+        assert captured.err == ''
+        assert [r for r in caplog.records if r.name in ('ensemble', 'heuristicas')] == []
+
+    def test_debug_level_emits_structured_events(self, fitted_ensemble, caplog):
+        """Testa se os eventos aparecem, com campos estruturados, quando DEBUG está ligado"""
+        with caplog.at_level(logging.DEBUG, logger='ensemble'):
+            fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        events = {r.event: r.fields for r in caplog.records if hasattr(r, 'event')}
+        assert events['ensemble.combine_matrices'] == {'n_matrices': 2}
+        assert 'ensemble.predict.member' in events
+
+    def test_event_logging_can_be_disabled(self, fitted_ensemble, caplog):
+        """Testa se set_event_logging(False) descarta até os eventos de DEBUG"""
+        set_event_logging(False)
+        try:
+            with caplog.at_level(logging.DEBUG, logger='ensemble'):
+                fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        finally:
+            set_event_logging(True)
+
+        assert [r for r in caplog.records if r.name == 'ensemble'] == []
+
+
+class TestEnsembleDataLoading:
+    """Testes da leitura única dos dados no treino"""
+
+    def test_fit_parses_league_data_once(self, sample_match_data, tmp_path, monkeypatch):
+        """Testa se um treino completo lê os dados uma única vez e as heurísticas usam o mesmo DataFrame"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'data' / 'persistent').mkdir(parents=True)
+        sample_match_data.to_csv(tmp_path / 'data' / 'persistent' / 'premier_league_latest.csv', index=False)
+        # Arquivo que as heurísticas leriam por conta própria
+        sample_match_data.to_csv(tmp_path / 'data' / 'premier_league_matches_teste.csv', index=False)
+
+        reset_parse_counts()
+        ensemble = EnsembleModel().fit(league_code='PL', use_cache=False)
+
+        assert parse_counts() == {'persistent': 1}
+        # Frame guardado para quem precisa das partidas (ex: bootstrap do app) sem reler
+        assert ensemble.training_data is not None and len(ensemble.training_data) == len(sample_match_data)
+        assert all(model is not None for model in ensemble.models.values())
+        assert len(ensemble.models['heuristicas'].df) == 2 * len(sample_match_data)
+
+
+class TestEnsembleBatch:
+    """Testes da predição em lote do ensemble"""
+
+    def test_predict_batch_matches_predict_match(self, fitted_ensemble):
+        """Testa se predict_batch reproduz predict_match partida a partida"""
+        import numpy as np
+
+        fixtures = [('Arsenal FC', 'Liverpool FC'), ('Chelsea FC', 'Arsenal FC'),
+                    ('Aston Villa FC', 'West Ham United FC'), ('Arsenal FC', 'Time Desconhecido FC')]
+        batch = fitted_ensemble.predict_batch(fixtures)
+
+        for pos, (home, away) in enumerate(fixtures):
+            single = fitted_ensemble.predict_match(home, away)['ensemble']
+            for key in ('prob_casa', 'prob_empate', 'prob_fora', 'prob_over_2_5', 'prob_btts'):
+                assert batch[key][pos] == pytest.approx(single[key])
+
+            if single['score_matrix'] is None:
+                assert np.isnan(batch['score_matrix'][pos]).all()
+                assert batch['top_scores'][pos] == []
+            else:
+                np.testing.assert_allclose(batch['score_matrix'][pos], single['score_matrix'])
+                assert batch['markets']['prob_over_1_5'][pos] == pytest.approx(single['markets']['prob_over_1_5'])
+
+    def test_predict_batch_rows_sum_to_one(self, fitted_ensemble):
+        """Testa se o 1X2 combinado soma 1 em cada linha"""
+        import numpy as np
+
+        teams = fitted_ensemble.models['dixon_coles'].teams
+        fixtures = [(home, away) for home in teams for away in teams if home != away]
+        batch = fitted_ensemble.predict_batch(fixtures)
+
+        total = batch['prob_casa'] + batch['prob_empate'] + batch['prob_fora']
+        np.testing.assert_allclose(total, 1.0)
+        assert batch['score_matrix'].shape == (len(fixtures), 11, 11)
+
+
+class TestEnsemblePredictionCache:
+    """Testes do cache LRU de predict_match"""
+
+    def test_repeated_prediction_hits_cache(self, fitted_ensemble):
+        """Testa se a mesma partida é servida do cache e max_goals entra na chave"""
+        first = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        again = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        smaller = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC', max_goals=6)
+
+        assert again is not first
+        assert again['ensemble']['prob_casa'] == first['ensemble']['prob_casa']
+        assert smaller['ensemble']['score_matrix'].shape == (7, 7)
+        assert fitted_ensemble.cache_info() == {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 256}
+
+    def test_returned_prediction_is_a_copy(self, fitted_ensemble):
+        """Testa se alterar uma predição devolvida não contamina o cache"""
+        first = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        expected = first['ensemble']['prob_casa']
+        first['ensemble']['prob_casa'] = -1.0
+        first['ensemble']['score_matrix'][:] = 0
+
+        again = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        assert again['ensemble']['prob_casa'] == expected
+        assert again['ensemble']['score_matrix'].sum() > 0
+
+    def test_weight_or_member_change_misses_cache(self, fitted_ensemble):
+        """Testa se trocar pesos ou modelos não serve a predição antiga do cache"""
+        before = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        fitted_ensemble.weights = {'dixon_coles': 1.0, 'offensive_defensive': 0.0, 'heuristicas': 0.0}
+        only_dc = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        dc = fitted_ensemble.models['dixon_coles'].predict_match('Arsenal FC', 'Liverpool FC')
+        assert only_dc['ensemble']['prob_over_2_5'] == pytest.approx(dc['prob_over_2_5'])
+        assert only_dc['ensemble']['prob_over_2_5'] != pytest.approx(before['ensemble']['prob_over_2_5'])
+
+        fitted_ensemble.weights['dixon_coles'] = 0.0
+        fitted_ensemble.weights['offensive_defensive'] = 1.0
+        fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        fitted_ensemble.models['heuristicas'] = None
+        fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        assert fitted_ensemble.cache_info()['hits'] == 0
+        assert fitted_ensemble.cache_info()['misses'] == 4
+
+    def test_member_update_misses_cache(self, fitted_ensemble, sample_match_data):
+        """Testa se atualizar um modelo no lugar (update/fit no mesmo objeto) invalida o cache"""
+        import pandas as pd
+
+        before = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        heuristicas = fitted_ensemble.models['heuristicas']
+
+        ultima = pd.to_datetime(sample_match_data['data']).max()
+        heuristicas.update([{'time_casa': 'Arsenal FC', 'time_visitante': 'Chelsea FC', 'gols_casa': 5,
+                             'gols_visitante': 0, 'data': ultima + pd.Timedelta(days=7 * (i + 1))}
+                            for i in range(5)])
+        after = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        assert fitted_ensemble.cache_info()['hits'] == 0
+        assert after['individual']['heuristicas']['prob_casa'] != \
+            pytest.approx(before['individual']['heuristicas']['prob_casa'])
+        assert after['ensemble']['prob_casa'] != pytest.approx(before['ensemble']['prob_casa'])
+
+    def test_least_recently_used_is_evicted(self, fitted_ensemble):
+        """Testa se, cheio, o cache descarta a partida usada há mais tempo"""
+        fitted_ensemble.cache_size = 2
+        fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        fitted_ensemble.predict_match('Chelsea FC', 'Arsenal FC')
+        fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        fitted_ensemble.predict_match('Aston Villa FC', 'Chelsea FC')
+
+        fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        assert fitted_ensemble.cache_info()['hits'] == 2
+        fitted_ensemble.predict_match('Chelsea FC', 'Arsenal FC')
+        assert fitted_ensemble.cache_info() == {'hits': 2, 'misses': 4, 'size': 2, 'maxsize': 2}
+
+    def test_concurrent_predictions_share_cache(self, fitted_ensemble):
+        """Testa o cache com várias threads pedindo as mesmas partidas"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        fixtures = [('Arsenal FC', 'Liverpool FC'), ('Chelsea FC', 'Arsenal FC')] * 20
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda f: fitted_ensemble.predict_match(*f), fixtures))
+
+        info = fitted_ensemble.cache_info()
+        assert info['hits'] + info['misses'] == len(fixtures)
+        assert info['size'] == 2
+        assert all(r['ensemble']['prob_casa'] == pytest.approx(results[i % 2]['ensemble']['prob_casa'])
+                   for i, r in enumerate(results))
+
+    def test_fit_invalidates_cache(self, sample_match_data, tmp_path, monkeypatch):
+        """Testa se um novo treino esvazia o cache e troca a impressão digital da chave"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'data' / 'persistent').mkdir(parents=True)
+        csv_path = tmp_path / 'data' / 'persistent' / 'premier_league_latest.csv'
+        sample_match_data.to_csv(csv_path, index=False)
+
+        ensemble = EnsembleModel().fit(league_code='PL', use_cache=False)
+        before = ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+
+        sample_match_data.iloc[:-5].to_csv(csv_path, index=False)
+        ensemble.fit(league_code='PL', use_cache=False)
+
+        assert ensemble.cache_info()['size'] == 0
+        after = ensemble.predict_match('Arsenal FC', 'Liverpool FC')
+        assert after is not before
+        assert ensemble.cache_info() == {'hits': 0, 'misses': 1, 'size': 1, 'maxsize': 256}
+
+
+class TestEnsembleStacking:
+    """Testes dos pesos aprendidos com predições fora da amostra (stacking)"""
+
+    def test_gradient_matches_finite_differences(self):
+        """Testa o gradiente analítico do log loss da mistura, com partidas sem alguns modelos"""
+        import numpy as np
+        from scipy.optimize import approx_fprime
+        from stacking import mixture_log_loss
+
+        rng = np.random.default_rng(3)
+        observed = rng.uniform(0.05, 0.9, size=(3, 200))
+        valid = (rng.random((3, 200)) > 0.2).astype(float)
+        valid[0] = 1.0
+        observed *= valid
+        weights = np.array([0.5, 0.3, 0.2])
+
+        numeric = approx_fprime(weights, lambda w: mixture_log_loss(w, observed, valid)[0], 1e-7)
+        np.testing.assert_allclose(mixture_log_loss(weights, observed, valid)[1], numeric, rtol=1e-4, atol=1e-6)
+
+    def test_loss_finite_at_simplex_vertex(self):
+        """Testa loss e gradiente finitos quando só modelos com peso 0 previram uma partida"""
+        import numpy as np
+        from stacking import fit_stacking_weights, mixture_log_loss
+
+        observed = np.array([[0.6, 0.0, 0.3],
+                             [0.5, 0.4, 0.2]])
+        valid = np.array([[1.0, 0.0, 1.0],
+                          [1.0, 1.0, 1.0]])
+
+        loss, grad = mixture_log_loss(np.array([1.0, 0.0]), observed, valid)
+        assert np.isfinite(loss) and np.isfinite(grad).all()
+
+        weights = fit_stacking_weights(np.where(valid > 0, observed, np.nan))
+        assert np.isfinite(weights).all() and weights.sum() == pytest.approx(1.0)
+
+    def test_weights_favor_better_model(self):
+        """Testa se os pesos ficam no simplex e vão para o modelo mais preciso"""
+        import numpy as np
+        import pandas as pd
+        from stacking import learn_ensemble_weights
+
+        rng = np.random.default_rng(11)
+        n = 3000
+        true = rng.dirichlet([4, 3, 3], n)
+        outcome = (true.cumsum(axis=1) < rng.random((n, 1))).sum(axis=1)
+        df = pd.DataFrame({'gols_casa': np.where(outcome == 0, 2, np.where(outcome == 1, 1, 0)),
+                           'gols_visitante': np.where(outcome == 2, 2, np.where(outcome == 1, 1, 0)),
+                           'competicao': np.where(np.arange(n) < 2950, 'PL', 'BSA')})
+
+        def noisy(scale, skip=()):
+            probs = true * np.exp(rng.normal(0, scale, true.shape))
+            probs /= probs.sum(axis=1, keepdims=True)
+            return {i: {'prob_home_win': p[0], 'prob_draw': p[1], 'prob_away_win': p[2]}
+                    for i, p in enumerate(probs) if i not in skip}
+
+        predictions = {'dixon_coles': noisy(0.1), 'offensive_defensive': noisy(0.8),
+                       'heuristicas': noisy(1.5, skip=range(100))}
+        learned = learn_ensemble_weights(df, predictions, markets=['1x2'],
+                                         league_col='competicao', min_matches=100)
+
+        weights = learned[None]['1x2']
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert min(weights.values()) >= 0
+        assert weights['dixon_coles'] > 0.8
+        # Liga com poucas partidas fica com os pesos gerais
+        assert learned['BSA'] == learned[None]
+        assert learned['PL']['1x2']['dixon_coles'] > 0.8
+
+    def test_learns_from_validator_predictions(self, sample_match_data):
+        """Testa o fluxo com as predições fora da amostra guardadas pelo ModelValidator"""
+        from heuristicas import HeuristicasModel
+        from offensive_defensive import OffensiveDefensiveModel
+        from stacking import learn_ensemble_weights
+        from validation import ModelValidator
+
+        od = ModelValidator(OffensiveDefensiveModel(xi=0.003), sample_match_data, "Offensive-Defensive")
+        od.cross_validate(n_splits=3, save_results=False)
+        heur = ModelValidator(HeuristicasModel(), sample_match_data, "Heuristicas")
+        heur.walk_forward(initial_train_size=20)
+
+        learned = learn_ensemble_weights(od.df, {'offensive_defensive': od.oos_predictions,
+                                                 'heuristicas': heur.oos_predictions})
+
+        assert set(learned) == {'1x2', 'over_2_5', 'btts'}
+        for weights in learned.values():
+            assert sum(weights.values()) == pytest.approx(1.0)
+        assert EnsembleModel(weights=learned['1x2']).weights == pytest.approx(learned['1x2'])
+
+    def test_per_market_weights_are_used(self, fitted_ensemble):
+        """Testa se cada mercado é combinado com os seus próprios pesos, em predict_match e predict_batch"""
+        import numpy as np
+
+        dc = fitted_ensemble.models['dixon_coles'].predict_match('Arsenal FC', 'Liverpool FC')
+        od = fitted_ensemble.models['offensive_defensive'].predict_match('Arsenal FC', 'Liverpool FC')
+
+        fitted_ensemble.weights = {'1x2': {'dixon_coles': 1.0, 'offensive_defensive': 0.0, 'heuristicas': 0.0},
+                                   'over_2_5': {'dixon_coles': 0.0, 'offensive_defensive': 1.0, 'heuristicas': 0.0}}
+        single = fitted_ensemble.predict_match('Arsenal FC', 'Liverpool FC')['ensemble']
+        batch = fitted_ensemble.predict_batch([('Arsenal FC', 'Liverpool FC')])
+
+        for combined in (single, {key: batch[key][0] for key in ('prob_casa', 'prob_over_2_5')}):
+            assert combined['prob_casa'] == pytest.approx(dc['prob_home_win'])
+            assert combined['prob_over_2_5'] == pytest.approx(od['prob_over_2_5'])
+        np.testing.assert_allclose(single['score_matrix'], dc['prob_matrix'])
+        # btts sem pesos próprios: pesos padrão
+        assert batch['prob_btts'][0] == pytest.approx(single['prob_btts'])
+
+    def test_per_league_weights_follow_fitted_league(self, fitted_ensemble):
+        """Testa se pesos por liga usam a liga do treino e caem nos gerais (chave None) para outras ligas"""
+        only_dc = {'dixon_coles': 1.0, 'offensive_defensive': 0.0, 'heuristicas': 0.0}
+        only_od = {'dixon_coles': 0.0, 'offensive_defensive': 1.0, 'heuristicas': 0.0}
+        ensemble = EnsembleModel(weights={None: {'1x2': only_dc}, 'BSA': {'1x2': only_od}})
+        ensemble.models = fitted_ensemble.models
+        ensemble._fitted = True
+
+        ensemble.league_code = 'PL'
+        assert ensemble.market_weights()['prob_casa'] == only_dc
+        assert ensemble.market_weights()['prob_btts'] == pytest.approx(EnsembleModel().weights)
+
+        ensemble.league_code = 'BSA'
+        od = ensemble.models['offensive_defensive'].predict_match('Arsenal FC', 'Liverpool FC')
+        assert ensemble.predict_match('Arsenal FC', 'Liverpool FC')['ensemble']['prob_fora'] == \
+            pytest.approx(od['prob_away_win'])
+
+
+class TestEnsembleFitReport:
+    """Testes do relatório de treino por modelo e do modo paralelo"""
+
+    def test_fit_report_records_each_member(self, sample_match_data):
+        """Testa se o treino registra origem e tempo de cada modelo"""
+        ensemble = EnsembleModel().fit(league_code='PL', use_cache=False, df=sample_match_data)
+
+        assert set(ensemble.fit_report) == {'dixon_coles', 'offensive_defensive', 'heuristicas'}
+        assert {name: r['source'] for name, r in ensemble.fit_report.items()} == {
+            'dixon_coles': 'fit', 'offensive_defensive': 'fit', 'heuristicas': 'shared'}
+        assert all(r['error'] is None and r['elapsed'] >= 0 for r in ensemble.fit_report.values())
+
+    def test_member_failure_is_reported(self, sample_match_data, monkeypatch):
+        """Testa se a falha de um modelo fica no relatório sem derrubar os outros"""
+        import ensemble as ensemble_module
+
+        original = ensemble_module.fit_or_load
+
+        def falha_dixon_coles(model_name, *args, **kwargs):
+            if model_name == 'dixon_coles':
+                raise ValueError("otimizacao nao convergiu")
+            return original(model_name, *args, **kwargs)
+
+        monkeypatch.setattr(ensemble_module, 'fit_or_load', falha_dixon_coles)
+        ensemble = EnsembleModel().fit(league_code='PL', use_cache=False, df=sample_match_data)
+
+        assert ensemble.models['dixon_coles'] is None
+        assert 'nao convergiu' in ensemble.fit_report['dixon_coles']['error']
+        assert ensemble.models['offensive_defensive'] is not None
+        assert ensemble.predict_match('Arsenal FC', 'Liverpool FC')['ensemble']['prob_casa'] is not None
+
+    def test_parallel_fit_reloads_cache_without_processes(self, sample_match_data, tmp_path, monkeypatch):
+        """Testa se o modo paralelo recarrega artefatos válidos sem abrir o pool de processos"""
+        import ensemble as ensemble_module
+
+        monkeypatch.chdir(tmp_path)
+        first = EnsembleModel().fit(league_code='PL', df=sample_match_data)
+
+        def sem_pool(*args, **kwargs):
+            raise AssertionError("pool de processos aberto com o cache válido")
+
+        monkeypatch.setattr(ensemble_module, 'ProcessPoolExecutor', sem_pool)
+        second = EnsembleModel().fit(league_code='PL', parallel=True, df=sample_match_data)
+
+        assert {name: r['source'] for name, r in second.fit_report.items()} == {
+            'dixon_coles': 'cache', 'offensive_defensive': 'cache', 'heuristicas': 'shared'}
+        assert (second.predict_match('Arsenal FC', 'Liverpool FC')['ensemble']['prob_casa']
+                == pytest.approx(first.predict_match('Arsenal FC', 'Liverpool FC')['ensemble']['prob_casa']))
+
+
 if __name__ == "__main__":
     pytest.main([__file__, '-v'])
-
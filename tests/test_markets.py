@@ -0,0 +1,68 @@
+"""
+Testes para a derivação de mercados a partir de matrizes de placares
+"""
+import pytest
+import numpy as np
+from markets import derive_markets
+from score_matrix import build_score_tensor, summarize_score_tensor
+
+
+@pytest.fixture
+def score_tensor():
+    """Tensor de placares para três partidas"""
+    return build_score_tensor([1.6, 0.9, 2.3], [1.1, 1.4, 0.6], max_goals=10, rho=-0.08)
+
+
+class TestDeriveMarkets:
+    """Testes para derive_markets"""
+
+    def test_matches_basic_markets(self, score_tensor):
+        """Testa se 1X2, O/U 2.5 e BTTS coincidem com summarize_score_tensor"""
+        markets = derive_markets(score_tensor)
+        summary = summarize_score_tensor(score_tensor)
+
+        for key, value in summary.items():
+            assert np.allclose(markets[key], value)
+
+    def test_single_matrix_returns_floats(self, score_tensor):
+        """Testa se uma matriz isolada dá o mesmo resultado que a posição do lote"""
+        batch = derive_markets(score_tensor)
+        single = derive_markets(score_tensor[1])
+
+        assert isinstance(single['prob_over_3_5'], float)
+        assert single['prob_over_3_5'] == pytest.approx(batch['prob_over_3_5'][1])
+        assert single['asian_handicap'][-1.0]['push'] == pytest.approx(batch['asian_handicap'][-1.0]['push'][1])
+
+    def test_goal_lines_against_loop(self, score_tensor):
+        """Testa over/under e totais por time contra somas célula a célula"""
+        matrix = score_tensor[0]
+        markets = derive_markets(matrix)
+        size = matrix.shape[0]
+
+        for line in (0.5, 1.5, 4.5, 5.5):
+            expected = sum(matrix[i, j] for i in range(size) for j in range(size) if i + j > line)
+            assert markets[f"prob_over_{str(line).replace('.', '_')}"] == pytest.approx(expected)
+
+        assert markets['prob_home_over_1_5'] == pytest.approx(matrix[2:, :].sum())
+        assert markets['prob_away_under_0_5'] == pytest.approx(matrix[:, 0].sum())
+        assert markets['prob_home_win_to_nil'] == pytest.approx(matrix[1:, 0].sum())
+
+    def test_double_chance_and_dnb(self, score_tensor):
+        """Testa dupla chance e empate anula"""
+        markets = derive_markets(score_tensor)
+
+        assert np.allclose(markets['prob_dc_1x'] + markets['prob_away_win'], 1.0)
+        assert np.allclose(markets['prob_dnb_home'] + markets['prob_dnb_away'], 1.0)
+
+    def test_asian_handicap(self, score_tensor):
+        """Testa linhas de handicap asiático inteiras, meias e de quarto"""
+        markets = derive_markets(score_tensor)
+        ah = markets['asian_handicap']
+
+        assert np.allclose(ah[-0.5]['win'], markets['prob_home_win'])
+        assert np.allclose(ah[0.0]['push'], markets['prob_draw'])
+        assert np.allclose(ah[0.0]['win'], markets['prob_home_win'])
+        assert np.allclose(ah[-0.25]['win'], (ah[0.0]['win'] + ah[-0.5]['win']) / 2)
+
+        for outcome in ah.values():
+            assert np.allclose(outcome['win'] + outcome['push'] + outcome['loss'], 1.0)
@@ -0,0 +1,120 @@
+"""
+Testes para o armazenamento de modelos em disco
+"""
+import pytest
+import numpy as np
+from model_store import data_fingerprint, save_model, load_model, artifact_paths
+
+
+class TestModelStore:
+    """Testes para save_model/load_model"""
+
+    def test_fingerprint_ignores_row_order(self, sample_match_data):
+        """Testa se a impressão digital independe da ordem das linhas"""
+        shuffled = sample_match_data.sample(frac=1, random_state=0)
+
+        assert data_fingerprint(shuffled) == data_fingerprint(sample_match_data)
+
+        changed = sample_match_data.copy()
+        changed.loc[changed.index[0], 'gols_casa'] += 1
+        assert data_fingerprint(changed) != data_fingerprint(sample_match_data)
+
+    @pytest.mark.parametrize('model_fixture,model_name', [
+        ('trained_dixon_coles', 'dixon_coles'),
+        ('trained_offensive_defensive', 'offensive_defensive'),
+    ])
+    def test_roundtrip(self, request, tmp_path, sample_match_data, model_fixture, model_name):
+        """Testa se o modelo recarregado prediz igual ao original"""
+        model = request.getfixturevalue(model_fixture)
+        fingerprint = data_fingerprint(sample_match_data)
+        save_model(model, model_name, 'PL', fingerprint, time_decay=False, store_dir=tmp_path)
+
+        npz_path, json_path = artifact_paths('PL', model_name, tmp_path)
+        assert npz_path.endswith('.npz') and json_path.endswith('.json')
+
+        loaded = load_model(model_name, 'PL', fingerprint, xi=model.xi, time_decay=False, store_dir=tmp_path)
+        assert loaded is not None
+        assert loaded.teams == model.teams
+        assert np.allclose(loaded.params, model.params)
+
+        original = model.predict_match('Arsenal FC', 'Liverpool FC')
+        reloaded = loaded.predict_match('Arsenal FC', 'Liverpool FC')
+        assert np.allclose(original['prob_matrix'], reloaded['prob_matrix'])
+
+    def test_stale_artifact_not_loaded(self, tmp_path, trained_dixon_coles, sample_match_data):
+        """Testa se artefatos de outros dados ou outro xi não são recarregados"""
+        fingerprint = data_fingerprint(sample_match_data)
+        save_model(trained_dixon_coles, 'dixon_coles', 'PL', fingerprint, time_decay=False, store_dir=tmp_path)
+
+        assert load_model('dixon_coles', 'PL', 'outro-hash', time_decay=False, store_dir=tmp_path) is None
+        assert load_model('dixon_coles', 'PL', fingerprint, xi=0.5, time_decay=False, store_dir=tmp_path) is None
+        assert load_model('dixon_coles', 'BSA', fingerprint, time_decay=False, store_dir=tmp_path) is None
+
+    def test_mismatched_npz_and_json_not_loaded(self, tmp_path, trained_dixon_coles, sample_match_data):
+        """Testa se um .npz de uma gravação com o .json de outra (troca concorrente) é recusado"""
+        import shutil
+
+        old_data = sample_match_data.iloc[:-5]
+        old_fingerprint = data_fingerprint(old_data)
+        new_fingerprint = data_fingerprint(sample_match_data)
+        save_model(trained_dixon_coles, 'dixon_coles', 'PL', old_fingerprint, time_decay=False, store_dir=tmp_path)
+        _, json_path = artifact_paths('PL', 'dixon_coles', tmp_path)
+        shutil.copy(json_path, tmp_path / 'old.json')
+
+        # Novo .npz já trocado, .json ainda da gravação anterior
+        save_model(trained_dixon_coles, 'dixon_coles', 'PL', new_fingerprint, time_decay=False, store_dir=tmp_path)
+        shutil.copy(tmp_path / 'old.json', json_path)
+
+        assert load_model('dixon_coles', 'PL', old_fingerprint, time_decay=False, store_dir=tmp_path) is None
+        assert load_model('dixon_coles', 'PL', time_decay=False, store_dir=tmp_path) is None
+
+
+class TestTrainingService:
+    """Testes para o treino por liga do serviço paralelo"""
+
+    def test_train_league_reuses_cache(self, monkeypatch, tmp_path, sample_match_data):
+        """Testa se a segunda execução só recarrega os artefatos"""
+        import training_service
+
+        monkeypatch.setattr(training_service, 'load_match_data', lambda league_code: sample_match_data)
+
+        first = training_service.train_league('PL', store_dir=tmp_path)
+        second = training_service.train_league('PL', store_dir=tmp_path)
+
+        assert first['status'] == 'ok'
+        assert set(first['models'].values()) == {'fit'}
+        assert set(second['models'].values()) == {'cache'}
+
+    def test_train_league_reports_errors(self, monkeypatch, tmp_path):
+        """Testa se falha ao carregar dados vira status de erro, sem exceção"""
+        import training_service
+
+        def falha(league_code):
+            raise ValueError("sem dados")
+
+        monkeypatch.setattr(training_service, 'load_match_data', falha)
+        result = training_service.train_league('PL', store_dir=tmp_path)
+
+        assert result['status'] == 'erro'
+        assert 'sem dados' in result['error']
+
+    def test_retrain_only_for_new_data(self, monkeypatch, tmp_path):
+        """Testa se retrain resubmete a liga só quando os dados mudaram desde o último treino"""
+        from concurrent.futures import ThreadPoolExecutor
+        import training_service
+
+        monkeypatch.setattr(training_service, 'train_league',
+                            lambda league_code, store_dir: {'league_code': league_code, 'status': 'ok',
+                                                            'fingerprint': 'antiga'})
+        service = training_service.TrainingService(['PL'], store_dir=tmp_path)
+        assert not service.retrain('PL', 'nova')  # serviço não iniciado
+
+        service._executor = ThreadPoolExecutor(max_workers=1)
+        service.futures['PL'] = service._executor.submit(training_service.train_league, 'PL', tmp_path)
+        service.wait('PL')
+        try:
+            assert not service.retrain('PL', 'antiga')
+            assert service.retrain('PL', 'nova')
+            service.wait('PL')
+        finally:
+            service.shutdown()
@@ -6,9 +6,12 @@ Testes para os modelos preditivos:
 """
 import pytest
 import numpy as np
+import pandas as pd
 from dixon_coles import DixonColesModel
 from offensive_defensive import OffensiveDefensiveModel
-from heuristicas import HeuristicasModel
+from heuristicas import HeuristicasModel, RESULT_NAMES, append_to_pair_index, build_pair_index, head_to_head
+from joint_dixon_coles import JointDixonColesModel
+from streak_kernels import _streak_scan, streak_stats
 
 
 class TestDixonColes:
@@ -74,6 +77,208 @@ class TestDixonColes:
         with pytest.raises(ValueError):
             trained_dixon_coles.predict_match('Team Inexistente', 'Arsenal FC')
 
+    def test_vectorized_likelihood_matches_loop(self, trained_dixon_coles, sample_match_data):
+        """Testa se a verossimilhança vetorizada é igual à versão com loop"""
+        model = trained_dixon_coles
+        team_to_idx = {team: idx for idx, team in enumerate(model.teams)}
+        home_teams = sample_match_data['time_casa'].map(team_to_idx).values
+        away_teams = sample_match_data['time_visitante'].map(team_to_idx).values
+        home_goals = sample_match_data['gols_casa'].values.astype(float)
+        away_goals = sample_match_data['gols_visitante'].values.astype(float)
+        weights = np.linspace(0.5, 1.0, len(sample_match_data))
+
+        rng = np.random.default_rng(0)
+        for rho in [-0.15, 0.0, 0.15]:
+            params = np.concatenate([[0.3, rho], rng.normal(0, 0.3, 2 * len(model.teams))])
+            nll_loop = model.dc_log_likelihood(params, home_teams, away_teams, home_goals, away_goals, weights)
+            nll_vec = model.dc_log_likelihood_vectorized(params, home_teams, away_teams, home_goals, away_goals, weights)
+            assert nll_vec == pytest.approx(nll_loop, rel=1e-10)
+
+    def test_vectorized_fit_matches_loop(self, sample_match_data):
+        """Testa se os dois caminhos da verossimilhança ajustam os mesmos parâmetros"""
+        fitted = []
+        state = np.random.get_state()
+        for vectorized in (True, False):
+            np.random.seed(7)
+            model = DixonColesModel(xi=0.003, vectorized=vectorized)
+            model.fit(sample_match_data, time_decay=True)
+            fitted.append(model.params)
+        np.random.set_state(state)  # não fixa a semente dos testes seguintes
+
+        assert np.allclose(fitted[0], fitted[1], atol=1e-3)
+
+    def test_analytic_gradient(self, trained_dixon_coles, sample_match_data):
+        """Testa o gradiente analítico contra diferenças finitas"""
+        from scipy.optimize import approx_fprime
+
+        model = trained_dixon_coles
+        team_to_idx = {team: idx for idx, team in enumerate(model.teams)}
+        args = (
+            sample_match_data['time_casa'].map(team_to_idx).values,
+            sample_match_data['time_visitante'].map(team_to_idx).values,
+            sample_match_data['gols_casa'].values.astype(float),
+            sample_match_data['gols_visitante'].values.astype(float),
+            np.linspace(0.5, 1.0, len(sample_match_data))
+        )
+        params = np.concatenate([[0.3, 0.1], np.random.default_rng(1).normal(0, 0.3, 2 * len(model.teams))])
+
+        _, grad = model.dc_log_likelihood_vectorized(params, *args, None, True)
+        numeric = approx_fprime(params, lambda p: model.dc_log_likelihood_vectorized(p, *args), 1e-6)
+
+        assert np.allclose(grad, numeric, atol=1e-3)
+
+    def test_warm_start_refit(self, trained_dixon_coles, sample_match_data):
+        """Testa refit incremental com time novo partindo do fit anterior"""
+        new_match = pd.DataFrame([{
+            'data': sample_match_data['data'].max() + pd.Timedelta(days=7),
+            'time_casa': 'Time Promovido FC',
+            'time_visitante': 'Arsenal FC',
+            'gols_casa': 1,
+            'gols_visitante': 2
+        }])
+        df = pd.concat([sample_match_data, new_match], ignore_index=True)
+
+        model = trained_dixon_coles
+        model.fit(df, time_decay=False, warm_start=True)
+
+        info = model.warm_start_info
+        assert info['new_teams'] == ['Time Promovido FC']
+        assert info['iterations'] == model.n_iter
+        assert info['iterations_saved'] == info['cold_start_iterations'] - info['iterations']
+        assert 'Time Promovido FC' in model.teams
+
+    def test_predict_many_matches_predict_match(self, trained_dixon_coles):
+        """Testa se a predição em lote coincide com predict_match partida a partida"""
+        fixtures = [('Arsenal FC', 'Liverpool FC'), ('Chelsea FC', 'Arsenal FC'),
+                    ('Liverpool FC', 'Manchester City FC')]
+        batch = trained_dixon_coles.predict_many(fixtures)
+
+        assert batch['prob_matrix'].shape == (3, 11, 11)
+        for pos, (home, away) in enumerate(fixtures):
+            pred = trained_dixon_coles.predict_match(home, away)
+            assert np.allclose(batch['prob_matrix'][pos], pred['prob_matrix'])
+            for key in ('prob_home_win', 'prob_draw', 'prob_away_win', 'prob_over_2_5', 'prob_btts_yes'):
+                assert batch[key][pos] == pytest.approx(pred[key])
+            assert batch['top_scores'][pos][0][0] == pred['top_scores'][0][0]
+
+    def test_top_k_indices_matches_stable_sort(self):
+        """Testa a seleção top-k em lote contra uma ordenação estável (empates incluídos)"""
+        from score_matrix import top_k_indices
+
+        rng = np.random.default_rng(7)
+        values = rng.integers(0, 5, size=(20, 30)).astype(float)
+        esperado = np.argsort(-values, axis=1, kind='stable')
+
+        for k in (1, 5, 30, 40):
+            assert np.array_equal(top_k_indices(values, k), esperado[:, :min(k, 30)])
+        assert top_k_indices(values, 0).shape == (20, 0)
+
+    def test_score_matrix_matches_rho_correction(self, trained_dixon_coles):
+        """Testa a matriz vetorizada contra a correção tau célula a célula"""
+        from scipy.stats import poisson
+
+        model = trained_dixon_coles
+        lambda_home, lambda_away = model.predict_goals('Arsenal FC', 'Liverpool FC')
+        expected = np.array([[poisson.pmf(i, lambda_home) * poisson.pmf(j, lambda_away)
+                              * model.rho_correction(i, j, lambda_home, lambda_away, model.rho)
+                              for j in range(11)] for i in range(11)])
+        expected /= expected.sum()
+
+        assert np.allclose(model.predict_score_probabilities('Arsenal FC', 'Liverpool FC'), expected)
+
+    @pytest.mark.parametrize('method', ['laplace', 'bootstrap'])
+    def test_prediction_intervals(self, trained_dixon_coles, sample_match_data, method):
+        """Testa sorteios de parâmetros e intervalos de todos os mercados"""
+        model = trained_dixon_coles
+        draws = model.fit_uncertainty(sample_match_data, method=method, n_draws=20, time_decay=False,
+                                      n_jobs=1, seed=3)
+
+        assert draws.shape == (20, 2 + 2 * len(model.teams))
+        assert np.allclose(draws[:, 2:2 + len(model.teams)].mean(axis=1), 0)
+
+        intervals = model.predict_intervals('Arsenal FC', 'Liverpool FC', percentiles=(5, 95))
+        for key in ('prob_home_win', 'prob_over_2_5', 'prob_dc_1x', 'prob_over_3_5'):
+            assert 0 <= intervals[key]['low'] <= intervals[key]['mean'] <= intervals[key]['high'] <= 1
+
+
+class TestJointDixonColes:
+    """Testes para o Dixon-Coles conjunto de várias ligas"""
+
+    @pytest.fixture
+    def two_league_data(self, sample_match_data):
+        """Dados de exemplo divididos em duas ligas"""
+        df = sample_match_data.copy()
+        df['liga'] = np.where(np.arange(len(df)) % 2 == 0, 'PL', 'CL')
+        return df
+
+    def _args(self, model, df):
+        team_to_idx = {team: idx for idx, team in enumerate(model.teams)}
+        league_to_idx = {league: idx for idx, league in enumerate(model.leagues)}
+        return (df['time_casa'].map(team_to_idx).values, df['time_visitante'].map(team_to_idx).values,
+                df['liga'].map(league_to_idx).values, df['gols_casa'].values.astype(float),
+                df['gols_visitante'].values.astype(float))
+
+    def test_single_league_matches_dixon_coles(self, trained_dixon_coles, sample_match_data):
+        """Testa se com uma liga a verossimilhança conjunta é a do Dixon-Coles"""
+        df = sample_match_data.assign(liga='PL')
+        model = JointDixonColesModel()
+        model.teams = trained_dixon_coles.teams
+        model.leagues = ['PL']
+        home_teams, away_teams, leagues, home_goals, away_goals = self._args(model, df)
+
+        params = trained_dixon_coles.params
+        nll_joint = model.joint_log_likelihood(params, home_teams, away_teams, leagues, home_goals, away_goals)
+        nll_dc = trained_dixon_coles.dc_log_likelihood_vectorized(params, home_teams, away_teams,
+                                                                  home_goals, away_goals)
+        assert nll_joint == pytest.approx(nll_dc, rel=1e-12)
+
+    def test_analytic_gradient(self, two_league_data):
+        """Testa o gradiente conjunto contra diferenças finitas"""
+        from scipy.optimize import approx_fprime
+
+        model = JointDixonColesModel()
+        model.teams = sorted(set(two_league_data['time_casa']) | set(two_league_data['time_visitante']))
+        model.leagues = ['CL', 'PL']
+        args = self._args(model, two_league_data) + (np.linspace(0.5, 1.0, len(two_league_data)),)
+        params = np.concatenate([[0.3, 0.2, 0.1, -0.05],
+                                 np.random.default_rng(2).normal(0, 0.3, 2 * len(model.teams))])
+
+        _, grad = model.joint_log_likelihood(params, *args, None, True)
+        numeric = approx_fprime(params, lambda p: model.joint_log_likelihood(p, *args), 1e-6)
+
+        assert np.allclose(grad, numeric, atol=1e-3)
+
+    def test_for_league(self, two_league_data):
+        """Testa se for_league gera um DixonColesModel com os parâmetros da liga"""
+        model = JointDixonColesModel(xi=0.003)
+        model.fit(two_league_data, time_decay=False)
+
+        assert set(model.home_advantages) == {'CL', 'PL'}
+        league_model = model.for_league('CL')
+        assert league_model.home_advantage == model.home_advantages['CL']
+        assert league_model.rho == model.rhos['CL']
+
+        pred = league_model.predict_match('Arsenal FC', 'Liverpool FC')
+        assert pred['prob_home_win'] + pred['prob_draw'] + pred['prob_away_win'] == pytest.approx(1.0)
+
+        with pytest.raises(ValueError):
+            model.for_league('BSA')
+
+    def test_uncertainty_requires_for_league(self, two_league_data):
+        """Testa se a incerteza herdada (layout de uma liga) é recusada no modelo conjunto"""
+        model = JointDixonColesModel(xi=0.003)
+        model.fit(two_league_data, time_decay=False)
+
+        with pytest.raises(TypeError, match='for_league'):
+            model.fit_uncertainty(two_league_data, method='laplace')
+        with pytest.raises(TypeError, match='for_league'):
+            model.predict_intervals('Arsenal FC', 'Liverpool FC')
+
+        cl = two_league_data[two_league_data['liga'] == 'CL']
+        draws = model.for_league('CL').fit_uncertainty(cl, method='laplace', n_draws=20,
+                                                       time_decay=False, seed=1)
+        assert draws.shape == (20, 2 + 2 * len(model.teams))
+
 
 class TestOffensiveDefensive:
     """Testes para o modelo Offensive-Defensive"""
@@ -108,6 +313,62 @@ class TestOffensiveDefensive:
         assert 0 <= pred['prob_draw'] <= 1
         assert 0 <= pred['prob_away_win'] <= 1
 
+    def test_predict_many(self, trained_offensive_defensive):
+        """Testa predição em lote e erro com time inexistente"""
+        fixtures = pd.DataFrame({'time_casa': ['Chelsea FC', 'Arsenal FC'],
+                                 'time_visitante': ['Manchester United FC', 'Chelsea FC']})
+        batch = trained_offensive_defensive.predict_many(fixtures)
+        pred = trained_offensive_defensive.predict_match('Arsenal FC', 'Chelsea FC')
+
+        assert batch['prob_home_win'][1] == pytest.approx(pred['prob_home_win'])
+        assert np.allclose(batch['prob_home_win'] + batch['prob_draw'] + batch['prob_away_win'], 1.0)
+
+        with pytest.raises(ValueError):
+            trained_offensive_defensive.predict_many([('Team Inexistente', 'Arsenal FC')])
+
+    def test_newton_solver(self, trained_offensive_defensive, sample_match_data):
+        """Testa se o solver Newton/IRLS chega ao ótimo em poucas iterações"""
+        model = OffensiveDefensiveModel(xi=0.003)
+        model.fit(sample_match_data, time_decay=False, solver='newton')
+
+        team_to_idx = {team: idx for idx, team in enumerate(model.teams)}
+        args = (
+            sample_match_data['time_casa'].map(team_to_idx).values,
+            sample_match_data['time_visitante'].map(team_to_idx).values,
+            sample_match_data['gols_casa'].values,
+            sample_match_data['gols_visitante'].values
+        )
+        _, grad = model.negative_log_likelihood(model.params, *args, None, True)
+        nll_newton = model.negative_log_likelihood(model.params, *args)
+        nll_bfgs = model.negative_log_likelihood(trained_offensive_defensive.params, *args)
+
+        assert model.n_iter <= 15
+        assert np.abs(grad).max() < 1e-6
+        assert nll_newton <= nll_bfgs + 1e-6
+
+        with pytest.raises(ValueError):
+            model.fit(sample_match_data, solver='lbfgs')
+
+    def test_analytic_gradient(self, trained_offensive_defensive, sample_match_data):
+        """Testa o gradiente analítico contra diferenças finitas"""
+        from scipy.optimize import approx_fprime
+
+        model = trained_offensive_defensive
+        team_to_idx = {team: idx for idx, team in enumerate(model.teams)}
+        args = (
+            sample_match_data['time_casa'].map(team_to_idx).values,
+            sample_match_data['time_visitante'].map(team_to_idx).values,
+            sample_match_data['gols_casa'].values,
+            sample_match_data['gols_visitante'].values,
+            np.linspace(0.5, 1.0, len(sample_match_data))
+        )
+        params = np.concatenate([[0.3], np.random.default_rng(1).normal(0, 0.3, 2 * len(model.teams))])
+
+        _, grad = model.negative_log_likelihood(params, *args, True)
+        numeric = approx_fprime(params, lambda p: model.negative_log_likelihood(p, *args), 1e-6)
+
+        assert np.allclose(grad, numeric, atol=1e-3)
+
 
 class TestHeuristicas:
     """Testes para o modelo de Heurísticas"""
@@ -146,6 +407,303 @@ class TestHeuristicas:
         
         assert 0 <= pred['confianca'] <= 100
 
+    def test_team_index_matches_frame(self, trained_heuristicas):
+        """Testa se o índice por time devolve os mesmos jogos que filtrar o DataFrame"""
+        df = trained_heuristicas.df
+
+        for team in trained_heuristicas.teams:
+            jogos = df[df['time'] == team].sort_values('data', ascending=False, kind='mergesort')
+            gols_marcados, gols_sofridos, resultado = trained_heuristicas._team_games(team)
+
+            assert np.array_equal(gols_marcados, jogos['gols_marcados'].values)
+            assert np.array_equal(gols_sofridos, jogos['gols_sofridos'].values)
+            assert [RESULT_NAMES[codigo] for codigo in resultado] == jogos['resultado'].tolist()
+
+            fora = jogos[jogos['local'] == 'Fora'].head(3)
+            gols_marcados, _, _ = trained_heuristicas._team_games(team, 3, local='Fora')
+            assert np.array_equal(gols_marcados, fora['gols_marcados'].values)
+
+    def test_index_rebuilt_when_df_changes(self, trained_heuristicas, sample_match_data):
+        """Testa se trocar self.df invalida o índice"""
+        assert trained_heuristicas.forma_recente('Arsenal FC') is not None
+
+        sem_arsenal = sample_match_data[(sample_match_data['time_casa'] != 'Arsenal FC') &
+                                        (sample_match_data['time_visitante'] != 'Arsenal FC')]
+        trained_heuristicas.df = trained_heuristicas._normalize_data(sem_arsenal)
+
+        assert trained_heuristicas.forma_recente('Arsenal FC') is None
+        assert trained_heuristicas.sequencias('Arsenal FC') is None
+
+    def test_confronto_direto_counts_each_match_once(self, trained_heuristicas, sample_match_data):
+        """Testa o índice de pares contra o filtro direto das partidas"""
+        df = sample_match_data
+        pair_index = build_pair_index(df['time_casa'], df['time_visitante'],
+                                      df['gols_casa'], df['gols_visitante'], df['data'])
+
+        for team_a, team_b in [('Arsenal FC', 'Liverpool FC'), ('Liverpool FC', 'Arsenal FC')]:
+            jogos = df[((df['time_casa'] == team_a) & (df['time_visitante'] == team_b)) |
+                       ((df['time_casa'] == team_b) & (df['time_visitante'] == team_a))]
+            jogos = jogos.sort_values('data', ascending=False).head(3)
+            gols_a = np.where(jogos['time_casa'] == team_a, jogos['gols_casa'], jogos['gols_visitante'])
+            gols_b = np.where(jogos['time_casa'] == team_a, jogos['gols_visitante'], jogos['gols_casa'])
+
+            resumo = head_to_head(pair_index, team_a, team_b, 3)
+            assert resumo['confrontos'] == len(jogos)
+            assert list(resumo['rows']) == list(jogos.index)
+            assert (resumo['gols_a'], resumo['gols_b']) == (gols_a.sum(), gols_b.sum())
+            assert resumo['vitorias_a'] == (gols_a > gols_b).sum()
+            assert resumo['empates'] == (gols_a == gols_b).sum()
+
+            confronto = trained_heuristicas.confronto_direto(team_a, team_b, 3)
+            assert confronto['confrontos'] == resumo['confrontos']
+            assert confronto['gols_a'] == resumo['gols_a']
+
+        assert head_to_head(pair_index, 'Arsenal FC', 'Time Inexistente') is None
+
+    def test_predict_many_matches_predict_match(self, trained_heuristicas):
+        """Testa se a predição numérica em lote segue as mesmas regras de predict_match"""
+        model = trained_heuristicas
+        fixtures = [(home, away) for home in model.teams for away in model.teams if home != away]
+        fixtures.append(('Time Inexistente', 'Arsenal FC'))
+        batch = model.predict_many(fixtures)
+
+        total = batch['prob_home_win'] + batch['prob_draw'] + batch['prob_away_win']
+        assert np.allclose(total, 1.0)
+        for key in ('prob_home_win', 'prob_draw', 'prob_away_win', 'prob_over_2_5', 'prob_btts_yes'):
+            assert ((batch[key] > 0) & (batch[key] < 1)).all()
+
+        for pos, (home, away) in enumerate(fixtures):
+            pred = model.predict_match(home, away)
+            assert batch['pontos_casa'][pos] == pred['pontos_casa']
+            assert batch['pontos_fora'][pos] == pred['pontos_fora']
+            assert batch['confianca'][pos] == pred['confianca']
+            assert batch['gols_esperados'][pos] == pytest.approx(pred['gols_esperados'])
+
+            probs = [batch['prob_home_win'][pos], batch['prob_draw'][pos], batch['prob_away_win'][pos]]
+            if pred['resultado_previsto'] == f"Vitoria {home}":
+                assert np.argmax(probs) == 0
+            elif pred['resultado_previsto'] == f"Vitoria {away}":
+                assert np.argmax(probs) == 2
+
+    def test_normalize_data(self, sample_match_data):
+        """Testa a tabela normalizada (duas linhas por partida, categorias)"""
+        df = HeuristicasModel()._normalize_data(sample_match_data)
+
+        assert len(df) == 2 * len(sample_match_data)
+        for coluna in ('time', 'adversario', 'local', 'resultado'):
+            assert isinstance(df[coluna].dtype, pd.CategoricalDtype)
+
+        esperado = np.where(df['gols_marcados'] > df['gols_sofridos'], 'Vitoria',
+                            np.where(df['gols_marcados'] < df['gols_sofridos'], 'Derrota', 'Empate'))
+        assert (df['resultado'].astype(str).values == esperado).all()
+        assert (df['local'] == 'Casa').sum() == len(sample_match_data)
+
+    def test_load_data_uses_normalized_cache(self, sample_match_data, tmp_path, monkeypatch):
+        """Testa se load_data grava o cache ao lado do CSV e o descarta quando o CSV muda"""
+        import os
+
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('data')
+        csv_file = os.path.join('data', 'premier_league_matches_teste.csv')
+        sample_match_data.to_csv(csv_file, index=False)
+
+        primeiro = HeuristicasModel().load_data('PL')
+        cache_file = HeuristicasModel._normalized_cache_path(csv_file, 'PL')
+        assert os.path.exists(cache_file)
+
+        segundo = HeuristicasModel().load_data('PL')
+        pd.testing.assert_frame_equal(primeiro.df, segundo.df)
+        assert segundo.forma_recente('Arsenal FC') == primeiro.forma_recente('Arsenal FC')
+
+        # CSV mais novo que o cache: normaliza de novo
+        sample_match_data.iloc[:10].to_csv(csv_file, index=False)
+        os.utime(csv_file, (os.path.getmtime(cache_file) + 10,) * 2)
+        assert len(HeuristicasModel().load_data('PL').df) == 20
+
+    def test_feature_table_matches_methods(self, trained_heuristicas):
+        """Testa se a tabela de features coincide com os métodos time a time"""
+        model = trained_heuristicas
+        tabela = model.build_feature_table()
+
+        assert sorted(tabela.index) == model.teams
+        for team in model.teams:
+            features = model.team_features(team)
+            esperado = {
+                'forma': model.forma_recente(team, 5),
+                'tendencia_gols': model.tendencia_gols(team, 5),
+                'sequencias': model.sequencias(team),
+                'casa': model.performance_casa_fora(team, 'Casa'),
+                'fora': model.performance_casa_fora(team, 'Fora'),
+            }
+            for bloco, valores in esperado.items():
+                if valores is None:
+                    assert features[bloco] is None
+                    continue
+                assert set(features[bloco]) == set(valores)
+                for chave, valor in valores.items():
+                    if isinstance(valor, (float, np.floating)):
+                        assert features[bloco][chave] == pytest.approx(valor)
+                    else:
+                        assert features[bloco][chave] == valor
+
+
+    def test_update_matches_full_reload(self, sample_match_data):
+        """Testa se update() partida a partida chega ao mesmo estado de uma carga completa"""
+        antigas, novas = sample_match_data.iloc[:-10], sample_match_data.iloc[-10:]
+
+        incremental = HeuristicasModel()
+        incremental.df = incremental._normalize_data(antigas)
+        incremental.teams = sorted(set(incremental.df['time'].astype(str)))
+        incremental.build_feature_table()
+        for i in range(len(novas)):
+            incremental.update(novas.iloc[i:i + 1])
+
+        completo = HeuristicasModel()
+        completo.df = completo._normalize_data(sample_match_data)
+        completo.teams = sorted(set(completo.df['time'].astype(str)))
+
+        esperado = completo.build_feature_table()
+        obtido = incremental.build_feature_table()
+        pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_dtype=False)
+
+        for team_a in completo.teams:
+            assert incremental.sequencias(team_a) == completo.sequencias(team_a)
+            for team_b in completo.teams:
+                if team_a != team_b:
+                    assert incremental.confronto_direto(team_a, team_b) == completo.confronto_direto(team_a, team_b)
+
+        # rows são posições em self.df nos dois casos (linhas do mandante)
+        colunas = ['data', 'time', 'adversario', 'gols_marcados', 'gols_sofridos']
+        for team_a, team_b in [(novas['time_casa'].iloc[-1], novas['time_visitante'].iloc[-1]),
+                               ('Arsenal FC', 'Liverpool FC')]:
+            linhas = [head_to_head(model._ensure_index()['pairs'], team_a, team_b)['rows']
+                      for model in (incremental, completo)]
+            obtidas, esperadas = (model.df.iloc[rows][colunas].astype(str).values.tolist()
+                                  for model, rows in zip((incremental, completo), linhas))
+            assert obtidas == esperadas
+            assert (incremental.df.iloc[linhas[0]]['local'] == 'Casa').all()
+
+        assert len(incremental.df) == len(completo.df)
+        assert incremental.teams == completo.teams
+
+    def test_pair_append_is_deferred_until_read(self, sample_match_data):
+        """Testa se anexar um confronto não copia os arrays do par antes de ele ser lido"""
+        df = sample_match_data
+        pair_index = build_pair_index(df['time_casa'], df['time_visitante'],
+                                      df['gols_casa'], df['gols_visitante'], df['data'])
+        entrada = pair_index[frozenset(('Arsenal FC', 'Liverpool FC'))]
+        rows, tallies = entrada['rows'], entrada['tallies']
+
+        append_to_pair_index(pair_index, 'Liverpool FC', 'Arsenal FC', 2, 0, len(df))
+        append_to_pair_index(pair_index, 'Arsenal FC', 'Liverpool FC', 1, 1, len(df) + 1)
+        assert entrada['rows'] is rows and entrada['tallies'] is tallies
+
+        resumo = head_to_head(pair_index, 'Arsenal FC', 'Liverpool FC', 2)
+        assert list(resumo['rows']) == [len(df) + 1, len(df)]
+        assert (resumo['gols_a'], resumo['gols_b'], resumo['vitorias_b'], resumo['empates']) == (1, 3, 1, 1)
+        assert head_to_head(pair_index, 'Arsenal FC', 'Liverpool FC')['confrontos'] == len(rows) + 2
+
+    def test_update_rebuilds_index_for_older_matches(self, sample_match_data):
+        """Testa se uma partida mais antiga que o histórico força a reconstrução do índice"""
+        model = HeuristicasModel()
+        model.df = model._normalize_data(sample_match_data.iloc[1:])
+        model.teams = sorted(set(model.df['time'].astype(str)))
+        model.build_feature_table()
+
+        model.update(sample_match_data.iloc[:1])
+
+        assert model._index['appended'] == {}
+        assert len(model.df) == 2 * len(sample_match_data)
+
+
+    def test_streak_kernel_matches_sequential_scan(self):
+        """Testa se o kernel vetorizado de sequências coincide com a varredura jogo a jogo"""
+        rng = np.random.default_rng(0)
+        contagens = rng.integers(0, 12, 200)
+        resultado = rng.choice([-1, 0, 1], contagens.sum()).astype(np.int8)
+        fins = np.cumsum(contagens)
+        inicios = fins - contagens
+
+        esperado = _streak_scan(resultado, inicios, fins)
+        obtido = streak_stats(resultado, inicios, fins, backend='numpy')
+
+        for valores_esperados, valores_obtidos in zip(esperado, obtido):
+            np.testing.assert_array_equal(valores_obtidos, valores_esperados)
+
+
+    def test_replay_uses_only_previous_matches(self, sample_match_data):
+        """Testa se o replay prevê cada partida com o mesmo estado de um fit nas partidas anteriores"""
+        partidas = sample_match_data.sort_values('data').reset_index(drop=True)
+        predicoes = HeuristicasModel().replay(partidas)
+
+        assert len(predicoes['prob_home_win']) == len(partidas)
+        for i in (1, 10, 25, len(partidas) - 1):
+            anteriores = partidas[partidas['data'] < partidas['data'].iloc[i]]
+            esperado = HeuristicasModel().fit(anteriores).predict_many(partidas.iloc[[i]])
+            for chave in ('prob_home_win', 'prob_draw', 'prob_over_2_5', 'prob_btts_yes', 'confianca'):
+                assert predicoes[chave][i] == pytest.approx(esperado[chave][0])
+
+    def test_fit_warm_start_matches_full_fit(self, sample_match_data):
+        """Testa se o fit com warm_start (só partidas novas) equivale a um fit completo"""
+        partidas = sample_match_data.sort_values('data').reset_index(drop=True)
+        model = HeuristicasModel().fit(partidas.iloc[:30])
+        model.fit(partidas.iloc[:40], warm_start=True)
+
+        assert model._index['appended']
+        esperado = HeuristicasModel().fit(partidas.iloc[:40]).build_feature_table()
+        pd.testing.assert_frame_equal(model.build_feature_table()[esperado.columns], esperado, check_dtype=False)
+
+    def test_calibration_beats_fixed_scales(self):
+        """Testa se as probabilidades calibradas têm log loss menor que as escalas fixas, fora da amostra"""
+        from stacking import observed_probabilities
+
+        rng = np.random.default_rng(5)
+        times = [f"Time {i:02d}" for i in range(12)]
+        forca = rng.normal(0, 0.4, len(times))
+        partidas = []
+        for temporada in range(5):
+            inicio = pd.Timestamp('2019-08-01') + pd.DateOffset(years=temporada)
+            jogos = [(i, j) for i in range(len(times)) for j in range(len(times)) if i != j]
+            for k, (i, j) in enumerate(rng.permutation(jogos)):
+                partidas.append({'data': inicio + pd.Timedelta(days=int(k)),
+                                 'time_casa': times[i], 'time_visitante': times[j],
+                                 'gols_casa': rng.poisson(np.exp(0.3 + forca[i] - forca[j])),
+                                 'gols_visitante': rng.poisson(np.exp(forca[j] - forca[i]))})
+        df = pd.DataFrame(partidas)
+        treino, teste = df.iloc[:-132], df.iloc[-132:]
+
+        calibrado = HeuristicasModel().calibrate(treino)
+        assert calibrado.calibration['n_matches'] >= 100
+        assert calibrado.calibration['coefs']['1x2'].shape == (2, 3)
+
+        fixo = HeuristicasModel().fit(treino)
+        ajustado = HeuristicasModel().fit(treino)
+        ajustado.calibration = calibrado.calibration
+        log_loss = {}
+        for nome, modelo in (('fixo', fixo), ('calibrado', ajustado)):
+            pred = modelo.replay(teste)
+            predicoes = {idx: {chave: pred[chave][pos] for chave in pred if chave.startswith('prob_')}
+                         for pos, idx in enumerate(teste.index)}
+            log_loss[nome] = {mercado: -np.mean(np.log(observed_probabilities(teste, predicoes, mercado)))
+                              for mercado in ('1x2', 'over_2_5', 'btts')}
+            total = pred['prob_home_win'] + pred['prob_draw'] + pred['prob_away_win']
+            assert np.allclose(total, 1.0)
+
+        assert log_loss['calibrado']['1x2'] < log_loss['fixo']['1x2']
+        assert log_loss['calibrado']['over_2_5'] < log_loss['fixo']['over_2_5']
+        assert log_loss['calibrado']['btts'] < log_loss['fixo']['btts'] + 0.01
+
+    def test_walk_forward_backtest(self, sample_match_data):
+        """Testa o backtest walk-forward das heurísticas no ModelValidator"""
+        from validation import ModelValidator
+
+        validator = ModelValidator(HeuristicasModel(), sample_match_data, "Heuristicas")
+        metrics = validator.walk_forward(initial_train_size=20)
+
+        assert metrics['n_predictions'] == len(sample_match_data) - 20
+        assert 0 <= metrics['brier_score'] <= 1
+        assert np.isfinite(metrics['log_loss'])
+
 
 class TestModelComparison:
     """Testes comparando os modelos"""
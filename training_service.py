@@ -0,0 +1,221 @@
+"""
+Serviço de treino paralelo de todas as ligas
+
+Treina Dixon-Coles e Offensive-Defensive de cada liga de config.LEAGUES em
+processos separados e grava os resultados no cache de modelos (model_store).
+Depois disso, EnsembleModel.fit de qualquer liga só recarrega os artefatos,
+sem otimização.
+
+Uso:
+    python training_service.py              # Treina todas as ligas
+    python training_service.py PL BSA       # Treina apenas as ligas informadas
+
+No app, TrainingService().start() roda em segundo plano e o app consulta
+status()/is_ready() para saber quais ligas já estão prontas.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import LEAGUES
+from data_loader import load_match_data
+from ensemble import POISSON_MODELS, MODEL_XI
+from model_store import MODELS_DIR, data_fingerprint, fit_or_load
+
+
+def train_league(league_code, store_dir=MODELS_DIR):
+    """
+    Treina (ou recarrega do cache) os modelos de Poisson de uma liga
+
+    Executado dentro dos processos do pool; nunca levanta exceção para
+    não derrubar as outras ligas.
+
+    Args:
+        league_code: Código da liga
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Dict com league_code, status ('ok' ou 'erro'), origem de cada modelo
+        ('cache', 'fit' ou mensagem de erro), impressão digital dos dados
+        treinados e tempo em segundos
+    """
+    inicio = time.perf_counter()
+    result = {'league_code': league_code, 'status': 'ok', 'models': {}, 'error': None,
+              'fingerprint': None}
+
+    try:
+        df = load_match_data(league_code=league_code)
+        fingerprint = data_fingerprint(df)
+        result['fingerprint'] = fingerprint
+    except Exception as e:
+        result.update(status='erro', error=f"Erro ao carregar dados: {e}")
+        result['elapsed'] = time.perf_counter() - inicio
+        return result
+
+    for model_name, _ in POISSON_MODELS:
+        try:
+            _, source = fit_or_load(model_name, df, league_code, fingerprint,
+                                    xi=MODEL_XI, store_dir=store_dir)
+            result['models'][model_name] = source
+        except Exception as e:
+            result['models'][model_name] = f"erro: {e}"
+            result['status'] = 'erro'
+
+    result['elapsed'] = time.perf_counter() - inicio
+    return result
+
+
+class TrainingService:
+    """Treina várias ligas em paralelo (process pool) sem bloquear quem chamou"""
+
+    def __init__(self, league_codes=None, max_workers=None, store_dir=MODELS_DIR):
+        """
+        Args:
+            league_codes: Lista de códigos de liga (None = todas de config.LEAGUES)
+            max_workers: Número de processos (None = número de CPUs)
+            store_dir: Diretório dos artefatos
+        """
+        if league_codes is None:
+            league_codes = [info['code'] for info in LEAGUES.values()]
+
+        self.league_codes = list(league_codes)
+        self.max_workers = max_workers
+        self.store_dir = store_dir
+        self.futures = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Submete o treino de todas as ligas e retorna imediatamente
+
+        Usa o contexto 'spawn' porque o app chama isto de dentro de threads do
+        Streamlit, onde fork não é seguro.
+
+        Returns:
+            self
+        """
+        if self._executor is not None:
+            return self
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        for league_code in self.league_codes:
+            self.futures[league_code] = self._executor.submit(train_league, league_code, self.store_dir)
+
+        return self
+
+    def is_ready(self, league_code):
+        """Retorna True se o treino da liga terminou (ou se ela não é gerenciada pelo serviço)"""
+        future = self.futures.get(league_code)
+        return future is None or future.done()
+
+    def retrain(self, league_code, fingerprint=None):
+        """
+        Treina a liga de novo em segundo plano (ex: os dados mudaram depois do treino)
+
+        Não submete nada se o serviço não foi iniciado, se o treino da liga
+        ainda está rodando ou se o último treino já usou exatamente esses
+        dados (repetir daria o mesmo resultado).
+
+        Args:
+            league_code: Código da liga
+            fingerprint: Impressão digital dos dados atuais da liga
+
+        Returns:
+            True se um novo treino foi submetido
+        """
+        with self._lock:
+            if self._executor is None or not self.is_ready(league_code):
+                return False
+
+            future = self.futures.get(league_code)
+            if (future is not None and fingerprint is not None and future.exception() is None
+                    and future.result().get('fingerprint') == fingerprint):
+                return False
+
+            self.futures[league_code] = self._executor.submit(train_league, league_code, self.store_dir)
+            return True
+
+    def wait(self, league_code, timeout=None):
+        """
+        Aguarda o treino de uma liga
+
+        Args:
+            league_code: Código da liga
+            timeout: Tempo máximo em segundos (None = sem limite)
+
+        Returns:
+            Resultado de train_league ou None se a liga não é gerenciada pelo serviço
+        """
+        future = self.futures.get(league_code)
+        if future is None:
+            return None
+        return future.result(timeout=timeout)
+
+    def status(self):
+        """
+        Situação de cada liga
+
+        Returns:
+            Dict {league_code: 'pendente' | 'ok' | 'erro'}
+        """
+        status = {}
+        for league_code, future in self.futures.items():
+            if not future.done():
+                status[league_code] = 'pendente'
+            elif future.exception() is not None:
+                status[league_code] = 'erro'
+            else:
+                status[league_code] = future.result()['status']
+        return status
+
+    def shutdown(self, wait=True):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+def train_all_leagues(league_codes=None, max_workers=None, store_dir=MODELS_DIR):
+    """
+    Treina todas as ligas em paralelo e espera terminar
+
+    Args:
+        league_codes: Lista de códigos de liga (None = todas)
+        max_workers: Número de processos
+        store_dir: Diretório dos artefatos
+
+    Returns:
+        Lista de resultados de train_league, na ordem em que terminaram
+    """
+    service = TrainingService(league_codes, max_workers, store_dir).start()
+    inicio = time.perf_counter()
+    results = []
+
+    try:
+        for future in as_completed(service.futures.values()):
+            result = future.result()
+            results.append(result)
+            origem = ', '.join(f"{name}={source}" for name, source in result['models'].items())
+            print(f"[{len(results)}/{len(service.futures)}] {result['league_code']}: "
+                  f"{result['status']} ({result['elapsed']:.1f}s) {origem or result['error']}")
+    finally:
+        service.shutdown()
+
+    print(f"\nTempo total: {time.perf_counter() - inicio:.1f}s")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 80)
+    print("TREINO PARALELO DE TODAS AS LIGAS")
+    print("=" * 80)
+
+    train_all_leagues(sys.argv[1:] or None)
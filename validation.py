@@ -13,11 +13,12 @@ import numpy as np
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import json
+import logging
 import os
 
-from logger_config import setup_logger, log_model_training
+from logger_config import log_model_training
 
-logger = setup_logger(__name__)
+logger = logging.getLogger(__name__)
 
 
 class ModelValidator:
@@ -28,7 +29,8 @@ class ModelValidator:
         Inicializa validador
         
         Args:
-            model: Modelo a ser validado (deve ter métodos fit() e predict_match())
+            model: Modelo a ser validado (deve ter métodos fit() e predict_match();
+                   walk_forward também exige replay())
             df: DataFrame com dados históricos
             model_name: Nome do modelo para logs
         """
@@ -36,6 +38,10 @@ class ModelValidator:
         self.df = df.sort_values('data').reset_index(drop=True)
         self.model_name = model_name
         
+        # Predições fora da amostra do último cross_validate/walk_forward
+        # ({índice em self.df: predição}), usadas por stacking.learn_ensemble_weights
+        self.oos_predictions = {}
+        
         logger.info(f"Validador criado para modelo {model_name} com {len(df)} partidas")
     
     def time_series_split(self, n_splits: int = 5) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
@@ -241,13 +247,54 @@ class ModelValidator:
             'betting_simulation': betting_results
         }
     
-    def cross_validate(self, n_splits: int = 5, save_results: bool = True) -> Dict:
+    def _predict_fold(self, test: pd.DataFrame) -> Dict:
+        """
+        Gera as predições de um fold de teste
+        
+        Usa predict_many (todas as partidas de uma vez) quando o modelo oferece,
+        senão cai para predict_match partida a partida.
+        
+        Args:
+            test: DataFrame de teste
+            
+        Returns:
+            Dicionário {index: prediction}
+        """
+        predictions = {}
+        
+        if hasattr(self.model, 'predict_many') and test is not None and len(test) > 0:
+            known = set(self.model.teams)
+            mask = test['time_casa'].isin(known) & test['time_visitante'].isin(known)
+            for _, row in test[~mask].iterrows():
+                logger.warning(f"Erro ao predizer {row['time_casa']} vs {row['time_visitante']}: "
+                               f"time nao encontrado no treino")
+            
+            batch = self.model.predict_many(test[mask])
+            prob_keys = [key for key in batch if key.startswith('prob_') and key != 'prob_matrix']
+            for pos, idx in enumerate(test.index[mask]):
+                predictions[idx] = {key: batch[key][pos] for key in prob_keys}
+            return predictions
+        
+        for idx, row in test.iterrows():
+            try:
+                pred = self.model.predict_match(row['time_casa'], row['time_visitante'])
+                predictions[idx] = pred
+            except Exception as e:
+                logger.warning(f"Erro ao predizer {row['time_casa']} vs {row['time_visitante']}: {e}")
+                continue
+        
+        return predictions
+    
+    def cross_validate(self, n_splits: int = 5, save_results: bool = True, warm_start: bool = False) -> Dict:
         """
         Executa cross-validation completa
         
         Args:
             n_splits: Número de splits temporais
             save_results: Se True, salva resultados em arquivo JSON
+            warm_start: Se True, cada fold (a partir do 2º) parte dos parâmetros do
+                        fold anterior. Os treinos são janelas crescentes, então o ótimo
+                        muda pouco e a otimização converge em menos iterações
             
         Returns:
             Dict com resultados agregados
@@ -255,23 +302,26 @@ class ModelValidator:
         logger.info(f"Iniciando cross-validation de {self.model_name} com {n_splits} splits")
         
         results = []
+        self.oos_predictions = {}
         
         for i, (train, test) in enumerate(self.time_series_split(n_splits)):
             logger.info(f"Fold {i+1}/{n_splits}: Treino={len(train)}, Teste={len(test)}")
             
             # Treina modelo
             with log_model_training(logger, f"{self.model_name} (Fold {i+1})"):
-                self.model.fit(train, time_decay=False)
+                if warm_start and i > 0:
+                    self.model.fit(train, time_decay=False, warm_start=True)
+                else:
+                    self.model.fit(train, time_decay=False)
+            
+            warm_start_info = getattr(self.model, 'warm_start_info', None)
+            if warm_start_info and warm_start_info['iterations_saved'] is not None:
+                logger.info(f"Fold {i+1} - Warm start: {warm_start_info['iterations']} iteracoes "
+                           f"({warm_start_info['iterations_saved']} economizadas)")
             
             # Gera predições
-            predictions = {}
-            for idx, row in test.iterrows():
-                try:
-                    pred = self.model.predict_match(row['time_casa'], row['time_visitante'])
-                    predictions[idx] = pred
-                except Exception as e:
-                    logger.warning(f"Erro ao predizer {row['time_casa']} vs {row['time_visitante']}: {e}")
-                    continue
+            predictions = self._predict_fold(test)
+            self.oos_predictions.update(predictions)
             
             # Calcula métricas
             metrics = self.calculate_metrics(test, predictions)
@@ -323,6 +373,59 @@ class ModelValidator:
         
         return avg_results
     
+    def walk_forward(self, initial_train_size: Optional[int] = None, save_results: bool = False) -> Dict:
+        """
+        Backtest walk-forward: cada partida é prevista só com o que se sabia antes do seu dia
+        
+        Requer um modelo com replay() (HeuristicasModel): o modelo é ajustado uma
+        vez no histórico inicial e as partidas seguintes são repetidas em ordem
+        cronológica numa única passada, sem recarregar os dados a cada predição.
+        
+        Args:
+            initial_train_size: Partidas do histórico inicial (padrão: mesmo
+                                tamanho do primeiro treino de cross_validate com 5 splits)
+            save_results: Se True, salva resultados em arquivo JSON
+            
+        Returns:
+            Dict com as métricas de calculate_metrics e model_name
+        """
+        if not hasattr(self.model, 'replay'):
+            raise ValueError(f"Modelo {self.model_name} nao suporta backtest walk-forward (sem replay())")
+        
+        if initial_train_size is None:
+            initial_train_size = len(self.df) // 6
+        train = self.df.iloc[:initial_train_size]
+        test = self.df.iloc[initial_train_size:]
+        
+        logger.info(f"Walk-forward de {self.model_name}: historico inicial={len(train)}, partidas={len(test)}")
+        
+        with log_model_training(logger, f"{self.model_name} (walk-forward)"):
+            self.model.fit(train, time_decay=False)
+            batch = self.model.replay(test)
+        
+        prob_keys = [key for key in batch if key.startswith('prob_')]
+        predictions = {idx: {key: batch[key][pos] for key in prob_keys}
+                       for pos, idx in enumerate(test.index)}
+        self.oos_predictions = predictions
+        
+        metrics = self.calculate_metrics(test, predictions)
+        metrics['model_name'] = self.model_name
+        
+        logger.info(f"Walk-forward - Brier: {metrics['brier_score']:.4f}, "
+                   f"Log Loss: {metrics['log_loss']:.4f}, ROI: {metrics['roi_percent']:.2f}%")
+        
+        if save_results:
+            output_dir = 'data/validation'
+            os.makedirs(output_dir, exist_ok=True)
+            
+            filename = f"{output_dir}/{self.model_name.lower().replace(' ', '_')}_walk_forward.json"
+            with open(filename, 'w') as f:
+                json.dump(metrics, f, indent=2, default=str)
+            
+            logger.info(f"Resultados salvos em: {filename}")
+        
+        return metrics
+    
     def print_results(self, results: Dict):
         """Exibe resultados formatados"""
         print(f"\n{'='*60}")
@@ -412,6 +515,9 @@ def compare_models(models: Dict[str, Tuple], df: pd.DataFrame, n_splits: int = 5
 
 if __name__ == "__main__":
     """Exemplo de uso"""
+    from logger_config import setup_logger
+    setup_logger(__name__)
+
     print("🔬 Sistema de Validação e Backtesting\n")
     
     # Importa modelos
@@ -51,10 +51,13 @@ try:
     print("\n3. PROBABILIDADES INDIVIDUAIS DOS MODELOS:")
     print("-" * 80)
     
+    # Pesos podem ser por mercado/liga: usa os do 1X2
+    pesos_1x2 = ensemble.market_weights()['prob_casa']
+    
     for model_name, pred in prediction['individual'].items():
         if pred:
-            weight = prediction['weights'][model_name]
-            print(f"\n{model_name.upper()} (peso: {weight*100:.0f}%):")
+            weight = pesos_1x2.get(model_name, 0.0)
+            print(f"\n{model_name.upper()} (peso 1X2: {weight*100:.0f}%):")
             print(f"  Casa:    {pred['prob_casa']*100:>6.2f}%")
             print(f"  Empate:  {pred['prob_empate']*100:>6.2f}%")
             print(f"  Fora:    {pred['prob_fora']*100:>6.2f}%")
@@ -72,7 +75,7 @@ try:
     for model_name, pred in prediction['individual'].items():
         if pred and pred['prob_casa'] is not None:
             probs_casa.append(pred['prob_casa'])
-            weights_casa.append(prediction['weights'][model_name])
+            weights_casa.append(pesos_1x2.get(model_name, 0.0))
     
     # Normaliza pesos
     total_weight = sum(weights_casa)